@@ -120,6 +120,75 @@ USE_L10N = True
 USE_TZ = True
 
 
+# Solver results
+# By default, each process caches the results for the 1024 most recently solved
+# boards. Set BOGGLE_RESULT_CACHE_ALIAS to the name of a cache in CACHES to
+# share results between processes instead, or BOGGLE_RESULT_CACHE_SIZE to 0 to
+# disable caching.
+
+BOGGLE_RESULT_CACHE_SIZE = 1024
+
+# Look up boards solved ahead of time by manage.py solve_boards (stored in the
+# database) before solving them, so that each day's puzzles needn't be solved
+# by every process that serves them.
+
+BOGGLE_BOARD_STORE = True
+
+# Time limit, in seconds, for solving the boards in a request. When the limit
+# is reached, the words found so far are returned with an X-Boggle-Partial
+# header. Set to None for no limit. The time taken to load a word list that
+# isn't in memory yet doesn't count towards the limit.
+
+BOGGLE_SOLVE_TIMEOUT = 5.0
+
+# Limits on the work done and words kept by each search, to bound the memory
+# and CPU used by a request for an adversarial board (see BoggleSolver): any
+# of max_words, max_steps, min_length, max_length and longest. A search that
+# reaches max_words or max_steps returns the words found so far with an
+# X-Boggle-Partial header, as for the timeout. Results filtered by min_length,
+# max_length or longest are cached like any other, so clear a shared result
+# cache when changing those.
+
+BOGGLE_SOLVE_LIMITS = {}
+
+# The largest board width or height accepted by the solve views. Each board
+# size solved keeps a few tables in memory, so this bounds what a client can
+# make a process hold.
+
+BOGGLE_MAX_BOARD_SIZE = 32
+
+# Count solver operations and time each phase of solve requests. Per-request
+# stats are returned in an X-Boggle-Stats header, and totals for each process
+# are served from /boggle/metrics.
+
+BOGGLE_SOLVER_METRICS = False
+
+
+# Word lists that solve requests can choose between with a word_list query
+# parameter. Each list is loaded the first time it is used, and each process
+# keeps at most BOGGLE_MAX_LOADED_WORD_LISTS in memory, dropping the least
+# recently used when another is needed.
+
+BOGGLE_WORD_LISTS = {
+    'en': 'boggle_app/word_lists/en.txt',
+}
+BOGGLE_DEFAULT_WORD_LIST = 'en'
+BOGGLE_MAX_LOADED_WORD_LISTS = 2
+
+# How word lists are stored: 'trie' for WordList, or 'dawg' for DawgWordList,
+# which merges shared word endings and takes a third of the memory.
+
+BOGGLE_WORD_LIST_BACKEND = 'trie'
+
+# Number of board editors (clients sending an X-Boggle-Editor header) whose
+# solvers each process keeps, so that a board that differs from the editor's
+# last board in a cell or two can be solved by searching only those cells.
+# Set to 0 to solve every board in full. Editor sessions aren't used while
+# BOGGLE_SOLVE_LIMITS is set, since they keep every word on each board.
+
+BOGGLE_EDITOR_SESSIONS = 256
+
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/1.11/howto/static-files/
 
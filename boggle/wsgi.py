@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "boggle.settings")
 
 application = get_wsgi_application()
+
+# Load the default word list as each worker starts, rather than while it
+# serves its first request
+from boggle_app.views import preload_word_lists
+
+preload_word_lists()
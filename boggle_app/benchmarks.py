@@ -0,0 +1,696 @@
+# Benchmarks for the solver, word list and views. Run them with
+#    manage.py benchmark [name ...] [--output results.json]
+# Each benchmark is a function taking a sample count and a random seed, and
+# returning a list of measurements made by _measure. Boards are generated from
+# the seed, so two runs with the same arguments time the same work, and their
+# JSON output can be compared between releases.
+
+import gc
+import json
+import os
+import random
+import resource
+import shutil
+import string
+import sys
+import tempfile
+import timeit
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from django.test import Client
+from marisa_trie import Trie
+
+import views
+from boggle_solver import (
+    BoggleBoard, BoggleSolver, IncrementalSolver, WordFinder, solve_many
+)
+from bulk_solver import BulkSolver
+from parallel_solver import SolverPool
+from word_list import EN_US_FILE, DawgWordList, WordList, open_word_list
+
+try:
+    import tracemalloc
+except ImportError:
+    # Allocation tracing needs Python 3.4+; _retained_kb is used instead
+    tracemalloc = None
+
+en_us = open_word_list(EN_US_FILE)
+
+
+def _measure(label, calls, inner=1, batch=1):
+    """
+    Time a list of zero-argument callables, each of which is one sample.
+
+    :param label: A description of what is being measured.
+    :param calls: A list of callables. Each is called inner times in a row,
+    and the average time taken is recorded as a single sample.
+    :param inner: The number of times to call each callable per sample; use
+    more than one for operations too quick to time individually.
+    :param batch: The number of items (e.g. boards) each call processes;
+    times and throughput are reported per item.
+    :return: a dict containing the label, the number of samples, the mean and
+    50th, 95th and 99th percentile seconds per item, the throughput in items
+    per second, the peak resident set size of the process so far in kilobytes,
+    and the kilobytes allocated while making one more call of each callable:
+    the peak traced by tracemalloc where it is available, or else the size of
+    the objects the calls leave alive (see _retained_kb).
+    """
+    timer = timeit.default_timer
+    samples = []
+    for func in calls:
+        start = timer()
+        for _ in range(0, inner):
+            func()
+        samples.append((timer() - start) / (inner * batch))
+    allocated_kb = None
+    if tracemalloc is not None:
+        tracemalloc.start()
+        for func in calls:
+            func()
+        allocated_kb = tracemalloc.get_traced_memory()[1] / 1024.0
+        tracemalloc.stop()
+    else:
+        allocated_kb = _retained_kb(calls)
+    samples.sort()
+    return OrderedDict([
+        ('label', label),
+        ('samples', len(samples)),
+        ('mean', sum(samples) / len(samples)),
+        ('p50', _percentile(samples, 50)),
+        ('p95', _percentile(samples, 95)),
+        ('p99', _percentile(samples, 99)),
+        ('throughput', len(samples) / sum(samples) if sum(samples) else None),
+        ('peak_rss_kb',
+         resource.getrusage(resource.RUSAGE_SELF).ru_maxrss),
+        ('allocated_kb', allocated_kb),
+    ])
+
+
+# Count the kilobytes of the objects created by calling each of a list of
+# callables that are still alive once they have all returned, including their
+# results, for Pythons without tracemalloc. The objects tracked by the garbage
+# collector (containers) are compared before and after the calls, and the
+# sizes of the new ones and of the untracked values (such as strings) they
+# hold are added up. Collection is paused meanwhile, so objects left in
+# reference cycles are counted too; temporary objects freed during a call,
+# such as a search's stack, aren't.
+def _retained_kb(calls):
+    gc.collect()
+    gc.disable()
+    try:
+        before = set(id(item) for item in gc.get_objects())
+        results = [func() for func in calls]
+        seen = set([id(before), id(results)])
+        seen.add(id(seen))
+        size = 0
+        for item in gc.get_objects():
+            if id(item) in before or id(item) in seen:
+                continue
+            seen.add(id(item))
+            size += sys.getsizeof(item)
+            if isinstance(item, dict):
+                members = list(item.keys()) + list(item.values())
+            elif isinstance(item, (list, tuple, set, frozenset)):
+                members = item
+            else:
+                continue
+            for member in members:
+                if id(member) not in seen and not gc.is_tracked(member):
+                    seen.add(id(member))
+                    size += sys.getsizeof(member)
+        return size / 1024.0
+    finally:
+        gc.enable()
+
+
+# Nearest-rank percentile of an already sorted list.
+def _percentile(values, percent):
+    rank = int(round(percent / 100.0 * len(values) + 0.5)) - 1
+    return values[max(0, min(rank, len(values) - 1))]
+
+
+# Generate a reproducible list of random boards of the given size (square if
+# board_height is omitted).
+def _random_boards(board_width, count, seed, letters=string.ascii_lowercase,
+                   board_height=None):
+    rng = random.Random(seed)
+    cell_count = board_width * (board_height or board_width)
+    return [
+        [rng.choice(letters) for _ in range(cell_count)]
+        for _ in range(count)
+    ]
+
+
+# Count the kilobytes held by a finished solver's own structures: the board's
+# values and neighbor table, the neighbor masks built for the search, and the
+# set of words found. The search's stack of partial paths holds at most eight
+# entries for each cell of the path being followed, and isn't counted.
+def _solver_kb(solver):
+    board = solver.board
+    objects = [solver.matches, board.cells, board.neighbors]
+    objects.extend(solver.matches)
+    objects.extend(board.cells)
+    objects.extend(board.neighbors)
+    if solver._neighbor_mask_list is not None:
+        objects.append(solver._neighbor_mask_list)
+        objects.extend(solver._neighbor_mask_list)
+    return sum(sys.getsizeof(item) for item in objects) / 1024.0
+
+
+def _solve_call(values, board_width, board_height=None):
+    return lambda: BoggleSolver(
+        BoggleBoard(values, board_width, board_height), en_us
+    ).find_words()
+
+
+def _post_call(client, url, body, **extra):
+    return lambda: client.post(
+        url, body, content_type='application/json', **extra
+    )
+
+
+# Make a request to the solve view, so that the word list is loaded before
+# requests are timed.
+def _warm_up(client):
+    _post_call(client, '/boggle/solve', json.dumps(['a'] * 16))()
+
+
+# Generate a reproducible list of (board, node_id, new value) edits, one for
+# each of a list of boards.
+def _random_edits(boards, seed):
+    rng = random.Random(seed)
+    return [
+        (values, rng.randrange(0, len(values)),
+         rng.choice(string.ascii_lowercase))
+        for values in boards
+    ]
+
+
+def _edited(values, node_id, value):
+    values = list(values)
+    values[node_id] = value
+    return values
+
+
+# Disable the views' result cache, so that repeated boards are solved each
+# time they are posted.
+@contextmanager
+def _without_result_cache():
+    result_cache = views.result_cache
+    views.result_cache = None
+    try:
+        yield
+    finally:
+        views.result_cache = result_cache
+
+
+@contextmanager
+def _without_ujson():
+    codec = views.ujson
+    views.ujson = None
+    try:
+        yield
+    finally:
+        views.ujson = codec
+
+
+# Adapts a marisa_trie.Trie (the word list's original storage) to the cursor
+# API used by BoggleSolver, so that solving against it can be compared with the
+# other backends. Cursors are the prefixes themselves.
+class _MarisaWordList(object):
+    ALL_LETTERS = (1 << 27) - 1
+
+    def __init__(self, words):
+        self.trie = Trie(words)
+        self.letter_mask = WordList.letter_mask
+
+    def root(self):
+        return u''
+
+    def advance(self, cursor, letters):
+        cursor += letters
+        if self.trie.has_keys_with_prefix(cursor):
+            return cursor
+        return None
+
+    def is_terminal(self, cursor):
+        return cursor in self.trie
+
+    def child_letters(self, cursor):
+        for key in self.trie.iterkeys(cursor):
+            if len(key) > len(cursor):
+                return _MarisaWordList.ALL_LETTERS
+        return 0
+
+
+# Size in kilobytes of a word list saved to a file.
+def _saved_size_kb(word_list, path):
+    word_list.save(path)
+    return os.path.getsize(path) / 1024.0
+
+
+# Build a marisa_trie.Trie from en_us's text file, as the word list was built
+# before it was stored as a flattened trie.
+def _marisa_from_text():
+    with open(EN_US_FILE) as word_file:
+        return Trie([word.lower().strip() for word in word_file])
+
+
+def word_list_load(number=3, seed=0):
+    """
+    Compare the time taken to build en_us from its text file with the time
+    taken to map in a compiled copy, and with building the marisa_trie.Trie
+    that the word list was originally stored in.
+    """
+    compiled_dir = tempfile.mkdtemp()
+    try:
+        compiled_file = os.path.join(compiled_dir, 'en.trie')
+        WordList(EN_US_FILE).save(compiled_file)
+        return [
+            _measure('WordList from text',
+                     [lambda: WordList(EN_US_FILE)] * number),
+            _measure('WordList.load compiled',
+                     [lambda: WordList.load(compiled_file)] * number),
+            _measure('marisa Trie from text',
+                     [_marisa_from_text] * number),
+        ]
+    finally:
+        shutil.rmtree(compiled_dir)
+
+
+def prefix_lookup(number=1000, seed=0):
+    """
+    Compare prefix checks against en_us using the old approach (enumerating
+    every key under the prefix of a marisa trie) and the cursor-based
+    contains_prefix.
+    """
+    with open(EN_US_FILE) as word_file:
+        trie = Trie([word.strip() for word in word_file])
+    inner = max(1, number // 10)
+    results = []
+    for prefix in ['s', 'co', 'thi', 'ecumenic', 'kzn']:
+        results.append(_measure(
+            "keys() prefix check '{}'".format(prefix),
+            [lambda: len(trie.keys(prefix)) > 1] * 10, inner
+        ))
+        results.append(_measure(
+            "contains_prefix '{}'".format(prefix),
+            [lambda: en_us.contains_prefix(prefix)] * 10, inner
+        ))
+    return results
+
+
+def word_list_backends(number=20, seed=0):
+    """
+    Compare the storage size of en_us, and the time taken to solve random 4x4
+    and 5x5 boards against it, for a marisa_trie.Trie, a WordList and a
+    DawgWordList. Each measurement's size_kb is the size of the list as saved
+    to disk, which for the mapped backends is also their memory footprint.
+    """
+    with open(EN_US_FILE) as word_file:
+        words = [word.strip().decode('ascii') for word in word_file]
+    word_lists = OrderedDict([
+        ('marisa Trie', _MarisaWordList(words)),
+        ('WordList', en_us),
+        ('DawgWordList', DawgWordList.from_trie(en_us)),
+    ])
+    saved_dir = tempfile.mkdtemp()
+    try:
+        sizes = dict(
+            (name, _saved_size_kb(
+                word_list.trie if name == 'marisa Trie' else word_list,
+                os.path.join(saved_dir, name)
+            ))
+            for name, word_list in word_lists.items()
+        )
+    finally:
+        shutil.rmtree(saved_dir)
+    results = []
+    for board_width in (4, 5):
+        boards = [
+            BoggleBoard(values, board_width)
+            for values in _random_boards(board_width, number, seed)
+        ]
+        for name, word_list in word_lists.items():
+            measurement = _measure(
+                '{} find_words {}x{}'.format(name, board_width, board_width),
+                [(lambda b=b, w=word_list: BoggleSolver(b, w).find_words())
+                 for b in boards]
+            )
+            measurement['size_kb'] = sizes[name]
+            results.append(measurement)
+    return results
+
+
+def solve_random_boards(number=20, seed=0):
+    """
+    Time BoggleSolver.find_words, including board construction, on random
+    square boards from 3x3 to 12x12 and on rectangular boards of similar
+    sizes, to show how time and memory scale with the number of cells. Boards
+    of 64 cells and over use a quarter of the samples. Each size's memory is
+    reported as solver_kb, the largest of its solvers' own structures (see
+    _solver_kb); the process-wide measurements can't tell the sizes apart.
+    """
+    sizes = [(width, width) for width in range(3, 13)] + [
+        (4, 6), (5, 8), (6, 10), (8, 12), (4, 16), (12, 8)
+    ]
+    results = []
+    for board_width, board_height in sizes:
+        cells = board_width * board_height
+        count = number if cells < 64 else max(1, number // 4)
+        boards = _random_boards(
+            board_width, count, seed, board_height=board_height
+        )
+        measurement = _measure(
+            'find_words {}x{}'.format(board_width, board_height),
+            [_solve_call(b, board_width, board_height) for b in boards]
+        )
+        solver_kb = 0
+        for values in boards:
+            solver = BoggleSolver(
+                BoggleBoard(values, board_width, board_height), en_us
+            )
+            solver.find_words()
+            solver_kb = max(solver_kb, _solver_kb(solver))
+        measurement['solver_kb'] = solver_kb
+        results.append(measurement)
+    return results
+
+
+def solve_adversarial_boards(number=10, seed=0):
+    """
+    Time BoggleSolver.find_words on 5x5 boards built from few letters (a
+    single repeated letter, or mostly vowels), alongside random boards for
+    comparison.
+    """
+    boards = OrderedDict([
+        ('random', _random_boards(5, number, seed)),
+        ('all E', [['e'] * 25]),
+        ('all Z', [['z'] * 25]),
+        ('vowels + S, T', _random_boards(5, number, seed, 'aeiouaeioust')),
+    ])
+    return [
+        _measure('find_words 5x5 {}'.format(name),
+                 [_solve_call(b, 5) for b in values])
+        for name, values in boards.items()
+    ]
+
+
+def solve_limited(number=10, seed=0):
+    """
+    Time BoggleSolver.find_words on vowel-heavy 6x6 boards, which have very
+    many words, without limits and with each of the solver's limits.
+    """
+    boards = [
+        BoggleBoard(values, 6)
+        for values in _random_boards(6, number, seed, 'aeiouaeioustrnl')
+    ]
+    limits = OrderedDict([
+        ('no limits', {}),
+        ('longest=20', {'longest': 20}),
+        ('max_words=100', {'max_words': 100}),
+        ('max_steps=20000', {'max_steps': 20000}),
+        ('min_length=6', {'min_length': 6}),
+        ('max_length=5', {'max_length': 5}),
+    ])
+    return [
+        _measure('find_words 6x6 {}'.format(name), [
+            (lambda b=b, kwargs=kwargs:
+             BoggleSolver(b, en_us, **kwargs).find_words())
+            for b in boards
+        ])
+        for name, kwargs in limits.items()
+    ]
+
+
+def solve_tiles(number=20, seed=0):
+    """
+    Time BoggleSolver.find_words, including board construction, on random 4x4
+    and 5x5 boards of single letters, and on the same boards with each Q
+    replaced by a Qu tile and a quarter of the other letters by two-letter
+    tiles. The single-letter results are comparable with solve_random_boards.
+    """
+    results = []
+    for board_width in (4, 5):
+        boards = _random_boards(board_width, number, seed)
+        rng = random.Random(seed)
+        tiles = ['th', 'er', 'in', 'an', 'he']
+        tile_boards = [
+            [('qu' if value == 'q' else
+              rng.choice(tiles) if rng.random() < 0.25 else value)
+             for value in values]
+            for values in boards
+        ]
+        results.append(_measure(
+            'find_words {0}x{0} single letters'.format(board_width),
+            [_solve_call(b, board_width) for b in boards]
+        ))
+        results.append(_measure(
+            'find_words {0}x{0} with tiles'.format(board_width),
+            [_solve_call(b, board_width) for b in tile_boards]
+        ))
+    return results
+
+
+def solve_incremental(number=50, seed=0):
+    """
+    Compare solving a random board again from scratch after changing one cell
+    with updating an IncrementalSolver for the board, for 4x4 and 5x5 boards,
+    and the same for POST requests to /boggle/solve with and without an
+    X-Boggle-Editor header (with the result cache disabled).
+    """
+    results = []
+    for board_width in (4, 5):
+        edits = _random_edits(
+            _random_boards(board_width, number, seed), seed
+        )
+        solvers = [
+            IncrementalSolver(BoggleBoard(values, board_width), en_us)
+            for values, _, _ in edits
+        ]
+        results.append(_measure(
+            'find_words {0}x{0} after one change'.format(board_width),
+            [_solve_call(_edited(*edit), board_width) for edit in edits]
+        ))
+        results.append(_measure(
+            'IncrementalSolver.set_cell {0}x{0}'.format(board_width),
+            [(lambda s=solver, e=edit: s.set_cell(e[1], e[2]))
+             for solver, edit in zip(solvers, edits)]
+        ))
+    client = Client(HTTP_HOST='localhost')
+    _warm_up(client)
+    edits = _random_edits(_random_boards(4, number, seed), seed)
+    with _without_result_cache():
+        results.append(_measure('POST /boggle/solve, one change', [
+            _post_call(client, '/boggle/solve', json.dumps(_edited(*edit)))
+            for edit in edits
+        ]))
+        calls = []
+        for idx, edit in enumerate(edits):
+            editor = {'HTTP_X_BOGGLE_EDITOR': 'benchmark-{}'.format(idx)}
+            _post_call(client, '/boggle/solve', json.dumps(edit[0]), **editor)()
+            calls.append(_post_call(
+                client, '/boggle/solve', json.dumps(_edited(*edit)), **editor
+            ))
+        results.append(_measure(
+            'POST /boggle/solve, one change, editor', calls
+        ))
+    return results
+
+
+def solve_endpoint(number=100, seed=0):
+    """
+    Time POST requests to /boggle/solve through the Django test client, for
+    random 4x4 boards solved from scratch, and for a board already in the
+    result cache.
+    """
+    client = Client(HTTP_HOST='localhost')
+    _warm_up(client)
+    bodies = [json.dumps(b) for b in _random_boards(4, number, seed)]
+    with _without_result_cache():
+        uncached = _measure('POST /boggle/solve', [
+            _post_call(client, '/boggle/solve', body) for body in bodies
+        ])
+    results = [uncached]
+    if views.result_cache is not None:
+        _post_call(client, '/boggle/solve', bodies[0])()
+        results.append(_measure('POST /boggle/solve, cached', [
+            _post_call(client, '/boggle/solve', bodies[0])
+        ] * number))
+    return results
+
+
+def request_overhead(number=100, seed=0):
+    """
+    Time the parts of a solve request other than the search: parsing a random
+    4x4 board's JSON body and building the board, serializing a result, and
+    whole POST requests to /boggle/solve for a board already in the result
+    cache (or, without a result cache, for a board with no words). Each is
+    timed with the json module and, if it's installed, with ujson; the
+    throughput of the requests is the requests per second of one worker.
+    """
+    client = Client(HTTP_HOST='localhost')
+    _warm_up(client)
+    bodies = [json.dumps(b) for b in _random_boards(4, number, seed)]
+    words = BoggleSolver(
+        BoggleBoard(json.loads(bodies[0])), en_us
+    ).find_words()
+    body = bodies[0] if views.result_cache is not None else json.dumps(
+        ['x'] * 16
+    )
+    _post_call(client, '/boggle/solve', body)()
+
+    def measure(codec):
+        return [
+            _measure('parse and build board, {}'.format(codec), [
+                (lambda b=b: views._make_board(views._loads(b)))
+                for b in bodies
+            ], inner=10),
+            _measure('serialize result, {}'.format(codec),
+                     [lambda: views._json_response(words)] * number,
+                     inner=10),
+            _measure('POST /boggle/solve, {}'.format(codec), [
+                _post_call(client, '/boggle/solve', body)
+            ] * number),
+        ]
+
+    with _without_ujson():
+        results = measure('json')
+    if views.ujson is not None:
+        results += measure('ujson')
+    return results
+
+
+def solve_batch(number=100, seed=0):
+    """
+    Compare per-board times for solving random 4x4 boards one at a time with
+    solving them as a batch, both through the Python API and through HTTP
+    requests to the solve and solve_batch views.
+    """
+    boards = _random_boards(4, number, seed)
+    client = Client(HTTP_HOST='localhost')
+    _warm_up(client)
+    body = json.dumps(boards)
+    with _without_result_cache():
+        results = [
+            _measure('find_words, one board at a time',
+                     [_solve_call(b, 4) for b in boards]),
+            _measure('solve_many',
+                     [lambda: solve_many(boards, en_us)] * 3, batch=number),
+            _measure('POST /boggle/solve per board', [
+                _post_call(client, '/boggle/solve', json.dumps(b))
+                for b in boards
+            ]),
+            _measure('POST /boggle/solve_batch', [
+                _post_call(client, '/boggle/solve_batch', body)
+            ] * 3, batch=number),
+        ]
+    return results
+
+
+def solve_parallel(number=20, seed=0):
+    """
+    Compare solving random 8x8 boards, and a batch of random 4x4 boards, in a
+    single process with solving them in a SolverPool (one worker per CPU).
+    Pool startup is not included.
+    """
+    large_boards = [
+        BoggleBoard(b, 8)
+        for b in _random_boards(8, max(1, number // 4), seed)
+    ]
+    batch = _random_boards(4, number * 10, seed)
+    pool = SolverPool()
+    try:
+        # Wait for the workers to start and load the word list
+        pool.solve_many(batch)
+        return [
+            _measure('find_words 8x8', [
+                (lambda b=b: BoggleSolver(b, en_us).find_words())
+                for b in large_boards
+            ]),
+            _measure('SolverPool.find_words 8x8', [
+                (lambda b=b: pool.find_words(b)) for b in large_boards
+            ]),
+            _measure('solve_many 4x4',
+                     [lambda: solve_many(batch, en_us)], batch=len(batch)),
+            _measure('SolverPool.solve_many 4x4',
+                     [lambda: pool.solve_many(batch)], batch=len(batch)),
+        ]
+    finally:
+        pool.close()
+
+
+def solve_bulk(number=20, seed=0):
+    """
+    Compare boards per second for solving batches of random 4x4 and 5x5
+    boards with solve_many (one board at a time) and with BulkSolver, both
+    spelling out each board's words and only counting them. Each sample is a
+    batch of 50 boards per requested sample.
+    """
+    bulk_solver = BulkSolver(en_us)
+    results = []
+    for board_width in (4, 5):
+        batch = _random_boards(board_width, number * 50, seed)
+        results += [
+            _measure('solve_many {0}x{0}'.format(board_width),
+                     [lambda: solve_many(batch, en_us, board_width)] * 3,
+                     batch=len(batch)),
+            _measure('BulkSolver.find_words {0}x{0}'.format(board_width),
+                     [lambda: bulk_solver.find_words(batch, board_width)] * 3,
+                     batch=len(batch)),
+            _measure('BulkSolver.count_words {0}x{0}'.format(board_width),
+                     [lambda: bulk_solver.count_words(batch, board_width)] * 3,
+                     batch=len(batch)),
+        ]
+    return results
+
+
+def check_words(number=100, seed=0):
+    """
+    Compare checking which of 50 words are on a random 4x4 board by solving it
+    and filtering the result with checking with WordFinder, including board
+    construction. Half the words are on the board where it has enough words,
+    and the rest are random words from the word list.
+    """
+    rng = random.Random(seed)
+    with open(EN_US_FILE) as word_file:
+        dictionary = [word.strip() for word in word_file]
+    cases = []
+    for values in _random_boards(4, number, seed):
+        found = BoggleSolver(BoggleBoard(values), en_us).find_words()
+        words = rng.sample(found, min(25, len(found)))
+        words += rng.sample(dictionary, 50 - len(words))
+        cases.append((values, words))
+    return [
+        _measure('find_words and filter', [
+            (lambda v=v, w=w: set(w).intersection(
+                BoggleSolver(BoggleBoard(v), en_us).find_words()
+            ))
+            for v, w in cases
+        ]),
+        _measure('WordFinder.find_present', [
+            (lambda v=v, w=w: WordFinder(BoggleBoard(v)).find_present(
+                w, en_us
+            ))
+            for v, w in cases
+        ]),
+    ]
+
+
+BENCHMARKS = OrderedDict([
+    ('word_list_load', word_list_load),
+    ('prefix_lookup', prefix_lookup),
+    ('word_list_backends', word_list_backends),
+    ('solve_random_boards', solve_random_boards),
+    ('solve_adversarial_boards', solve_adversarial_boards),
+    ('solve_limited', solve_limited),
+    ('solve_tiles', solve_tiles),
+    ('solve_incremental', solve_incremental),
+    ('solve_endpoint', solve_endpoint),
+    ('request_overhead', request_overhead),
+    ('solve_batch', solve_batch),
+    ('solve_parallel', solve_parallel),
+    ('solve_bulk', solve_bulk),
+    ('check_words', check_words),
+])
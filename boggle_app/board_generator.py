@@ -0,0 +1,266 @@
+import math
+import random
+
+from boggle_solver import BoggleBoard, BoggleSolver, IncrementalSolver
+from parallel_solver import word_list_pool, worker_word_list
+
+# The sixteen dice of a standard (1987 onwards) Boggle set. Each die is a tuple
+# of its six faces; one face is the two-letter 'qu' tile.
+STANDARD_DICE = (
+    ('a', 'a', 'e', 'e', 'g', 'n'),
+    ('a', 'b', 'b', 'j', 'o', 'o'),
+    ('a', 'c', 'h', 'o', 'p', 's'),
+    ('a', 'f', 'f', 'k', 'p', 's'),
+    ('a', 'o', 'o', 't', 't', 'w'),
+    ('c', 'i', 'm', 'o', 't', 'u'),
+    ('d', 'e', 'i', 'l', 'r', 'x'),
+    ('d', 'e', 'l', 'r', 'v', 'y'),
+    ('d', 'i', 's', 't', 't', 'y'),
+    ('e', 'e', 'g', 'h', 'n', 'w'),
+    ('e', 'e', 'i', 'n', 's', 'u'),
+    ('e', 'h', 'r', 't', 'v', 'w'),
+    ('e', 'i', 'o', 's', 's', 't'),
+    ('e', 'l', 'r', 't', 't', 'y'),
+    ('h', 'i', 'm', 'n', 'u', 'qu'),
+    ('h', 'l', 'n', 'n', 'r', 'z'),
+)
+
+# Points for a word of each length under the official rules; words of eight or
+# more letters score the same as eight. Words of fewer than three letters
+# score nothing.
+WORD_POINTS = (0, 0, 0, 1, 1, 2, 3, 5, 11)
+
+# Things a board search can maximize: the board's total score, or the number
+# of words on it.
+OBJECTIVES = ('score', 'words')
+
+
+def score_word(word):
+    """
+    Get the points scored by a word under the official rules. A 'qu' tile
+    counts as two letters.
+
+    :param word: A word found on a board.
+    :return: an int.
+    """
+    return WORD_POINTS[min(len(word), len(WORD_POINTS) - 1)]
+
+
+def score_words(words):
+    """
+    Get the total points scored by a collection of (distinct) words.
+
+    :param words: An iterable of words found on a board.
+    :return: an int.
+    """
+    return sum(score_word(word) for word in words)
+
+
+def roll_board(rng, board_width=4, board_height=None):
+    """
+    Roll a random board from the standard dice. For a board of sixteen cells
+    each die is used once, in a random position; larger or smaller boards
+    choose each cell's die at random from the standard set.
+
+    :param rng: A random.Random to roll with.
+    :param board_width: An int containing the width of the board.
+    :param board_height: An int containing the height of the board; if
+    omitted, the board is square.
+    :return: a pair of lists: the index in STANDARD_DICE of the die in each
+    cell, and the value of each cell, in row-major order.
+    """
+    if board_height is None:
+        board_height = board_width
+    cell_count = board_width * board_height
+    if cell_count == len(STANDARD_DICE):
+        dice = list(range(0, cell_count))
+        rng.shuffle(dice)
+    else:
+        dice = [
+            rng.randrange(0, len(STANDARD_DICE)) for _ in range(0, cell_count)
+        ]
+    return dice, [rng.choice(STANDARD_DICE[die]) for die in dice]
+
+
+class BoardSearch(object):
+    """
+    Searches for a high-scoring board that can be rolled with the standard
+    dice, by simulated annealing.
+
+    Starting from a random roll, each step makes a small change to the board:
+    either turning one die to another face, or swapping the dice in two cells.
+    A change that improves the objective is always kept, and one that makes it
+    worse is kept with a probability that falls as the search cools, which
+    lets the search escape local maxima early on. With a temperature of 0 the
+    search is a plain hill climb.
+
+    Each change touches only one or two cells, so the board is kept solved
+    with an IncrementalSolver rather than being solved from scratch at every
+    step.
+    """
+
+    def __init__(self, word_list, board_width=4, objective='score', rng=None,
+                 board_height=None):
+        """
+        :param word_list: The WordList to find words from.
+        :param board_width: An int containing the width of the boards to
+        search.
+        :param objective: One of OBJECTIVES.
+        :param rng: A random.Random to make choices with.
+        :param board_height: An int containing the height of the boards to
+        search; if omitted, the boards are square.
+        """
+        if objective not in OBJECTIVES:
+            raise ValueError(u"Unknown objective {}".format(objective))
+        self.word_list = word_list
+        self.board_width = board_width
+        self.board_height = board_height or board_width
+        self.objective = objective
+        self.rng = rng or random.Random()
+
+    def run(self, iterations=2000, temperature=5.0, cooling=None):
+        """
+        Search for a high-scoring board.
+
+        :param iterations: The number of changes to try.
+        :param temperature: The starting temperature: roughly, the size of a
+        drop in the objective that the search will accept a third of the time
+        at the start. It is reduced geometrically to a hundredth of its
+        starting value by the end of the search.
+        :param cooling: The factor to reduce the temperature by at each step,
+        overriding the default schedule.
+        :return: a dict describing the best board found, as returned by
+        describe_board.
+        """
+        rng = self.rng
+        dice, values = roll_board(rng, self.board_width, self.board_height)
+        solver = IncrementalSolver(
+            BoggleBoard(values, self.board_width, self.board_height),
+            self.word_list
+        )
+        cells = solver.board.cells
+        value = self._value(solver.words())
+        best_value = value
+        best_cells = list(cells)
+        if cooling is None:
+            cooling = 0.01 ** (1.0 / max(iterations, 1))
+        for _ in range(0, iterations):
+            changes = self._propose(dice, cells)
+            delta = 0
+            for node_id, die, face, _ in changes:
+                added, removed = solver.set_cell(node_id, face)
+                delta += self._value(added) - self._value(removed)
+            if delta >= 0 or (temperature > 0 and
+                              rng.random() < math.exp(delta / temperature)):
+                value += delta
+                for node_id, die, _, _ in changes:
+                    dice[node_id] = die
+                if value > best_value:
+                    best_value = value
+                    best_cells = list(cells)
+            else:
+                # Put the old faces back; the dice haven't been moved yet
+                for node_id, _, _, old_face in changes:
+                    solver.set_cell(node_id, old_face)
+            temperature *= cooling
+        return describe_board(
+            best_cells, self.board_width, self.word_list, self.board_height
+        )
+
+    # Get the objective's value for a collection of words.
+    def _value(self, words):
+        if self.objective == 'words':
+            return len(words)
+        return score_words(words)
+
+    # Choose a random change to the board: either a new face for one die, or
+    # a swap of two dice (each landing on a random face). Returns a list of
+    # (node_id, die, face, old face) tuples giving the new die and face for
+    # each cell that changes, and the face it shows now.
+    def _propose(self, dice, cells):
+        rng = self.rng
+        first = rng.randrange(0, len(cells))
+        if rng.random() < 0.5:
+            moves = [(first, dice[first])]
+        else:
+            second = rng.randrange(0, len(cells) - 1)
+            if second >= first:
+                second += 1
+            moves = [(first, dice[second]), (second, dice[first])]
+        return [
+            (node_id, die, rng.choice(STANDARD_DICE[die]), cells[node_id])
+            for node_id, die in moves
+        ]
+
+
+def describe_board(values, board_width, word_list, board_height=None):
+    """
+    Solve a board and summarize it.
+
+    :param values: The board's values, in the form accepted by BoggleBoard.
+    :param board_width: An int containing the width of the board.
+    :param word_list: The WordList to find words from.
+    :param board_height: An int containing the height of the board; if
+    omitted, the board is square.
+    :return: a dict with the board's values (lower case, row-major), its score,
+    its word count and its words (sorted by length as for
+    BoggleSolver.find_words).
+    """
+    board = BoggleBoard(values, board_width, board_height)
+    words = BoggleSolver(board, word_list).find_words()
+    return {
+        'board': [str(value.lower()) for value in values],
+        'score': score_words(words),
+        'word_count': len(words),
+        'words': words,
+    }
+
+
+def search_boards(word_file, restarts=8, iterations=2000, board_width=4,
+                  objective='score', seed=None, processes=None,
+                  backend='trie', board_height=None):
+    """
+    Run several independent board searches in parallel, one per restart, and
+    return their results from best to worst.
+
+    :param word_file: The path to the text word list to search with (its
+    compiled copy is used if there is one).
+    :param restarts: The number of searches to run.
+    :param iterations: The number of changes tried by each search.
+    :param board_width: An int containing the width of the boards to search.
+    :param objective: One of OBJECTIVES.
+    :param seed: An optional int; searches with the same seed and arguments
+    give the same results.
+    :param processes: The number of worker processes; defaults to the number
+    of CPUs.
+    :param backend: The word list backend to load the list with (see
+    open_word_list).
+    :param board_height: An int containing the height of the boards to search;
+    if omitted, the boards are square.
+    :return: a list of dicts as returned by describe_board.
+    """
+    rng = random.Random(seed)
+    tasks = [
+        (board_width, board_height, objective, rng.randrange(0, 1 << 30),
+         iterations)
+        for _ in range(0, restarts)
+    ]
+    pool = word_list_pool(word_file, processes, backend)
+    try:
+        results = pool.map(_search_board, tasks)
+    finally:
+        pool.close()
+        pool.join()
+    key = 'word_count' if objective == 'words' else 'score'
+    results.sort(key=lambda result: result[key], reverse=True)
+    return results
+
+
+# Run in a worker process: run a single board search.
+def _search_board(task):
+    board_width, board_height, objective, seed, iterations = task
+    search = BoardSearch(
+        worker_word_list(), board_width, objective, random.Random(seed),
+        board_height
+    )
+    return search.run(iterations)
@@ -0,0 +1,121 @@
+import json
+
+from django.db import DatabaseError, transaction
+
+from board_generator import score_word
+from boggle_solver import BoggleBoard, BoggleSolver, encode_path, make_boards
+from models import SolvedBoard
+from parallel_solver import word_list_pool, worker_word_list
+from result_cache import board_cache_key
+
+
+def path_results(paths, cell_count, all_paths=False):
+    """
+    Convert the paths found by BoggleSolver.find_paths into the compact form
+    returned by the solve view and stored in SolvedBoard.results.
+
+    :param paths: A dict mapping words to lists of paths, as returned by
+    BoggleSolver.find_paths.
+    :param cell_count: The number of nodes on the board.
+    :param all_paths: If True, give every path for each word; otherwise, give
+    the first.
+    :return: a list with a [word, score, path] list for each word, sorted by
+    length as for BoggleSolver.find_words. Each path is encoded by
+    encode_path; with all_paths, the third item is a list of encoded paths.
+    """
+    results = []
+    for word in sorted(paths, key=len, reverse=True):
+        encoded = [encode_path(path, cell_count) for path in paths[word]]
+        results.append([
+            word, score_word(word), encoded if all_paths else encoded[0]
+        ])
+    return results
+
+
+def lookup(board, word_list_name):
+    """
+    Find the stored results for a board, in any orientation.
+
+    :param board: A BoggleBoard.
+    :param word_list_name: The name of the word list the board is solved
+    against.
+    :return: a SolvedBoard, or None if the board hasn't been stored (or the
+    store's table hasn't been created).
+    """
+    try:
+        return SolvedBoard.objects.filter(
+            key=board_cache_key(board, word_list_name)
+        ).first()
+    except DatabaseError:
+        return None
+
+
+def store_boards(boards, word_list_name, word_file, board_width=4,
+                 board_height=None, puzzle_date=None, processes=None,
+                 backend='trie'):
+    """
+    Solve a list of boards in parallel, one board per task, and store their
+    results, replacing any stored results for the same boards. Boards are
+    validated before any are solved.
+
+    :param boards: A list of boards, each given as a list of values in the form
+    accepted by BoggleBoard.
+    :param word_list_name: The name of the word list the boards are solved
+    against, as used in the boards' keys.
+    :param word_file: The path to that word list's text file (its compiled
+    copy is used if there is one).
+    :param board_width: An int containing the width of every board.
+    :param board_height: An int containing the height of every board; if
+    omitted, the boards are square.
+    :param puzzle_date: An optional date to mark the boards as puzzles for.
+    :param processes: The number of worker processes; defaults to the number
+    of CPUs.
+    :param backend: The word list backend to load the list with (see
+    open_word_list).
+    :return: a list of the SolvedBoards stored, in the order given.
+    """
+    boards = make_boards(boards, board_width, board_height)
+    pool = word_list_pool(word_file, processes, backend)
+    try:
+        results = pool.map(_solve_board, [
+            (board.cells, board.board_width, board.board_height)
+            for board in boards
+        ])
+    finally:
+        pool.close()
+        pool.join()
+    stored = []
+    with transaction.atomic():
+        for board, board_results in zip(boards, results):
+            fields = {
+                'word_list': word_list_name,
+                'board': ','.join(board.cells),
+                'board_width': board.board_width,
+                'board_height': board.board_height,
+                'results': json.dumps(board_results, separators=(',', ':')),
+                'word_count': len(board_results),
+                'score': sum(result[1] for result in board_results),
+            }
+            if puzzle_date is not None:
+                fields['puzzle_date'] = puzzle_date
+            stored.append(SolvedBoard.objects.update_or_create(
+                key=board_cache_key(board, word_list_name), defaults=fields
+            )[0])
+    return stored
+
+
+def puzzles_for(date):
+    """
+    :param date: A date.
+    :return: a list of the SolvedBoards marked as puzzles for the date.
+    """
+    return list(SolvedBoard.objects.filter(puzzle_date=date))
+
+
+# Run in a worker process: solve a board, returning its results as for
+# path_results.
+def _solve_board(task):
+    cells, board_width, board_height = task
+    board = BoggleBoard(cells, board_width, board_height)
+    paths = BoggleSolver(board, worker_word_list()).find_paths()
+    return path_results(paths, len(cells))
@@ -1,62 +1,88 @@
+import heapq
 import string
+import sys
+import threading
+import time
+from collections import OrderedDict
 
 
 class BoggleBoard(object):
     """
-    Internal representation of an nxn Boggle board. For the purposes of the 
-    solver,  the board can be thought of as an undirected graph, where each node
+    Internal representation of an mxn Boggle board (square by default). For
+    the purposes of the solver,  the board can be thought of as an undirected graph, where each node
     contains  a letter and is connected by edges to its immediate and diagonal
     neighbors. 
 
-    Since we're going to be calculating neighbors frequently, we can optimize
-    our representation to simplify this case by padding the outside of the board
-    with None values. For a 3x3 board, for example, we visualize the board as:
+    To represent the board in memory, we encode the graph as a simple list of 
+    characters in row-major order, so the node identifier for the cell at
+    (row, col) is row * board_width + col. For a 3x3 board, for example:
 
-    0 0 0 0 0
-    0 A B C 0
-    0 D E F 0
-    0 G H I 0
-    0 0 0 0 0
+    A B C        0 1 2
+    D E F   ->   3 4 5   ->   [A, B, C, D, E, F, G, H, I]
+    G H I        6 7 8
 
-    This cuts down on edge cases as we calculate the neighbor set for a given
-    node; rather than having to check for the edges of the board, we just check
-    whether the value returned is None. There may be some performance
-    improvement from this approach (due to fewer and simpler conditionals), but 
-    the main benefit is the simplicity of the code.
+    Since we're going to be calculating neighbors frequently, and the edge set
+    for each node depends only on the dimensions of the board, the neighbors of
+    every node are calculated once per board size and shared by all boards of
+    that size. The table is a tuple holding, for each node, a tuple of its
+    neighbors' identifiers. For the board above:
+
+    (
+        (1, 3, 4), (0, 2, 3, 4, 5), (1, 4, 5),
+        (0, 1, 4, 6, 7), (0, 1, 2, 3, 5, 6, 7, 8), (1, 2, 4, 7, 8),
+        (3, 4, 7), (3, 4, 5, 6, 8), (4, 5, 7)
+    )
+
+    Because node identifiers are small integers, a set of nodes (such as the
+    nodes already used on a path) can be held in a single int, with bit x set
+    if node x is in the set. The solver walks the board through the cells and
+    neighbors attributes using such bitmasks, so its inner loop makes no set or
+    list allocations; get_nodes and get_neighbors provide the same information
+    as lists of (node_id, node_value) pairs.
+
+    A node's value is usually a single letter, but can be a tile of up to
+    MAX_TILE_LENGTH letters (such as the 'Qu' tile of a standard set of dice),
+    which is used whole: a path through a 'qu' node spells both letters.
 
-    To represent the board in memory, we encode the graph as a simple list of 
-    characters. Since the edge set for each node is fixed, the list 
-    representation lets us use simple arithmetic to calculate a node's 
-    neighbors. So the above 3x3 board is represented by:
-
-    00 01 02 03 04 05 06 07 08 09 10 11 12 13 14 15 16 17 18 19 20 21 22 23 24
-    0  0  0  0  0  0  A  B  C  0  0  D  E  F  0  0  G  H  I  0  0  0  0  0  0
-
-    From this representation, we can calculate the neighbors of node x in a grid 
-    of size n as:
-        NW: x-n-3
-         N: x-n-2
-        NE: x-n-1
-         W: x-1
-         E: x+1
-        SW: x+n+1
-         S: x+n+2
-        SE: x+n+3
-        
     For simplicity in comparisons, we normalize all characters by converting
-    them to lower case.
+    them to lower case. Values are also stored as native strings, so that they
+    can be compared directly against the word list without any conversion.
     """
 
-    def __init__(self, values, board_width=4):
+    # The most letters allowed on a single tile
+    MAX_TILE_LENGTH = 2
+
+    # The most neighbor tables kept at once; the least recently used table is
+    # dropped when another board size is needed
+    MAX_NEIGHBOR_TABLES = 64
+
+    # Neighbor tables, keyed by (board width, board height), in order of use
+    _neighbor_tables = OrderedDict()
+    _neighbor_tables_lock = threading.Lock()
+
+    # The internal (lower-case, native string) form of each single-letter
+    # value, so that most values are validated and normalized by a single
+    # lookup
+    _normalized_letters = dict(
+        (letter, str(letter.lower())) for letter in string.ascii_letters
+    )
+
+    def __init__(self, values, board_width=4, board_height=None):
         """
         Create a new board with the size and values supplied
-        :param values: A list of single-character ASCII strings.
-        :param board_width: An int containg the width of a square Boggle board.
+        :param values: A list of ASCII strings in row-major order, each a single
+        letter or a multi-letter tile of up to MAX_TILE_LENGTH letters.
+        :param board_width: An int containg the width of the Boggle board.
+        :param board_height: An int containing the height of the Boggle board;
+        if omitted, the board is square.
         """
-        BoggleBoard._check_input(board_width, values)
+        if board_height is None:
+            board_height = board_width
+        BoggleBoard._check_input(board_width, board_height, values)
         self.board_width = board_width
-        self.board = BoggleBoard._to_internal_representation(board_width,
-                                                             values)
+        self.board_height = board_height
+        self.cells = BoggleBoard._to_internal_representation(values)
+        self.neighbors = BoggleBoard._neighbor_table(board_width, board_height)
 
     def get_nodes(self):
         """
@@ -72,11 +98,7 @@ class BoggleBoard(object):
         :return: a list of two-value tuples, each of which contains a
         (node_id, node_value) pair. Node values will be returned in lower case.
         """
-        nodes = []
-        for idx in range(0, len(self.board)):
-            if self.board[idx]:
-                nodes.append((idx, self.board[idx]))
-        return nodes
+        return list(enumerate(self.cells))
 
     def get_neighbors(self, node_id, exclude=None):
         """
@@ -96,93 +118,909 @@ class BoggleBoard(object):
         # TODO: Check that incoming node IDs are valid
         if not exclude:
             exclude = set()
-        neighbors = []
-        offset_north = node_id - self.board_width - 2
-        offset_south = node_id + self.board_width + 2
-        for neighbor_idx in [
-                    offset_north - 1,
-            offset_north,
-                    offset_north + 1,
-                    node_id - 1,
-                    node_id + 1,
-                    offset_south - 1,
-            offset_south,
-                    offset_south + 1
-        ]:
-            value = self.board[neighbor_idx]
-            if value and neighbor_idx not in exclude:
-                neighbors.append((neighbor_idx, value))
-        return neighbors
-
-    # Convert a list of values representing a (grid_size x grid_size) boggle
-    # board into the internal representation described in the class
-    # documentation (a None-padded, single list representation, where all
-    # characters are lower-case).
+        return [
+            (neighbor_id, self.cells[neighbor_id])
+            for neighbor_id in self.neighbors[node_id]
+            if neighbor_id not in exclude
+        ]
+
+    # Convert a list of values representing a (board_width x board_height)
+    # boggle board into the internal representation described in the class
+    # documentation (a single row-major list, where all characters are
+    # lower-case), validating each value on the way. Boards of single letters
+    # take one pass of dict lookups; if any value isn't a single letter, the
+    # values are checked one by one instead.
     @staticmethod
-    def _to_internal_representation(board_width, values):
-        board = [None] * (board_width + 2)
-        for row in range(0, board_width):
-            board += [None] + [
-                v.lower() for v in values[
-                                   (row * board_width):
-                                   (row * board_width) + board_width]
-            ] + [None]
-        board += [None] * (board_width + 2)
-        return board
-
-    # Validate input for the initializer; expect the grid size to be an int >= 1
-    # and values be a list of ascii strings, each one character long.
+    def _to_internal_representation(values):
+        normalized_letters = BoggleBoard._normalized_letters
+        try:
+            return [normalized_letters[value] for value in values]
+        except (KeyError, TypeError):
+            return [BoggleBoard._normalize_value(value) for value in values]
+
+    # Validate a single node value, as for _check_value, and convert it to its
+    # internal form.
     @staticmethod
-    def _check_input(grid_size, values):
-        if not type(grid_size) == int:
-            raise ValueError(u"Grid size {} must be an int.".format(
-                grid_size
-            ))
-        if not grid_size > 0:
-            raise ValueError(u"Invalid grid size {}.".format(
-                grid_size
-            ))
-        if len(values) != grid_size * grid_size:
+    def _normalize_value(value):
+        BoggleBoard._check_value(value)
+        return str(value.lower())
+
+    # Get the neighbor table described in the class documentation for boards
+    # of the given size, building it on first use and keeping at most
+    # MAX_NEIGHBOR_TABLES tables.
+    @staticmethod
+    def _neighbor_table(board_width, board_height):
+        key = (board_width, board_height)
+        tables = BoggleBoard._neighbor_tables
+        with BoggleBoard._neighbor_tables_lock:
+            table = tables.pop(key, None)
+            if table is not None:
+                tables[key] = table
+                return table
+        table = tuple(
+            tuple(
+                (row + d_row) * board_width + col + d_col
+                for d_row in (-1, 0, 1)
+                for d_col in (-1, 0, 1)
+                if (d_row or d_col)
+                and 0 <= row + d_row < board_height
+                and 0 <= col + d_col < board_width
+            )
+            for row in range(0, board_height)
+            for col in range(0, board_width)
+        )
+        with BoggleBoard._neighbor_tables_lock:
+            tables[key] = table
+            while len(tables) > BoggleBoard.MAX_NEIGHBOR_TABLES:
+                tables.popitem(last=False)
+        return table
+
+    # Validate the size of the input for the initializer; expect the grid width
+    # and height to be ints >= 1 and values to have a value for each node. The
+    # values themselves are checked by _to_internal_representation.
+    @staticmethod
+    def _check_input(grid_width, grid_height, values):
+        for size in (grid_width, grid_height):
+            if not type(size) == int:
+                raise ValueError(u"Grid size {} must be an int.".format(
+                    size
+                ))
+            if not size > 0:
+                raise ValueError(u"Invalid grid size {}.".format(
+                    size
+                ))
+        if len(values) != grid_width * grid_height:
             raise ValueError(u"Expected {} values, saw {}.".format(
-                grid_size * grid_size, len(values)
+                grid_width * grid_height, len(values)
             ))
-        for value in values:
-            if not value or value not in string.ascii_letters:
-                raise ValueError(u"Invalid value {} in input".format(
-                    value
-                ))
-            if len(value) != 1:
-                raise ValueError(u"Expected single character, saw {}.".format(
-                    value
+
+    # Validate a single node value: a string of one to MAX_TILE_LENGTH ascii
+    # letters.
+    @staticmethod
+    def _check_value(value):
+        if not isinstance(value, basestring) or not value or any(
+                letter not in string.ascii_letters for letter in value):
+            raise ValueError(u"Invalid value {} in input".format(
+                value
+            ))
+        if len(value) > BoggleBoard.MAX_TILE_LENGTH:
+            raise ValueError(
+                u"Expected at most {} characters, saw {}.".format(
+                    BoggleBoard.MAX_TILE_LENGTH, value
                 ))
 
 
 class BoggleSolver(object):
-    def __init__(self, board, word_list):
+    """
+    Finds all words from a WordList that can be spelled out on a BoggleBoard by
+    following a path of neighboring nodes, using each node at most once.
+
+    The search is a depth-first traversal of the board from each node in turn.
+    Alongside the board path, the traversal carries a word list cursor that is
+    advanced by one node value at each step, so each step costs a single trie
+    edge lookup (one per letter, for a multi-letter tile) rather than a fresh
+    lookup of the whole prefix. A path is abandoned as soon as the cursor
+    shows that no word continues from it.
+
+    Before searching, each node's value is converted to a word list letter
+    mask (of the first letter, for a multi-letter tile). When extending a
+    path, a neighbor is only visited if its letter is one of the cursor's
+    child letters, so steps to letters that no word continues with are pruned
+    before they are taken. On sparse or repetitive
+    boards, where few letters are available, this removes most of the work of
+    the search. (There's no need to prune on letter counts as well, since a
+    path can't use a node twice.)
+
+    The traversal keeps its own stack of partial paths rather than recursing,
+    which lets iter_words hand back each word as soon as it is found.
+
+    find_paths also reports the board path spelling each word. The search
+    already carries the set of nodes on each path as a bitmask, so when it
+    reaches a word it just records that set and the path's last node, which
+    costs nothing per step. The order of the other nodes is worked out
+    afterwards, only for the words found, in a single walk back from the last
+    node through the recorded set (backtracking only where repeated letters
+    leave a choice of node).
+
+    A search can be bounded by a deadline, or stopped by calling cancel() (for
+    example, from another thread). The search checks for either every
+    CHECK_INTERVAL steps, and stops with the words it has found so far; the
+    complete attribute records whether the last search ran to the end.
+
+    The work and memory of a search can also be bounded, for boards (such as
+    large boards, or boards full of vowels) with very many words:
+
+        max_words:  stop once this many words have been found.
+        max_steps:  stop after stepping onto this many board nodes.
+        min_length: don't report words shorter than this.
+        max_length: don't report words longer than this, and don't extend
+                    paths that already spell this many letters.
+        longest:    keep only this many of the longest words found, in a
+                    heap. Once the heap is full, words no longer than the
+                    shortest word in it aren't reported, so matches never
+                    holds more than this many words (it is emptied, and the
+                    heap started afresh, by each search), and find_words
+                    sorts only those.
+
+    A search stopped by max_words or max_steps ends as if its deadline had
+    passed, except that limit_reached is set.
+    """
+
+    # Number of search steps between checks for cancellation or a passed
+    # deadline
+    CHECK_INTERVAL = 1024
+
+    def __init__(self, board, word_list, deadline=None, max_words=None,
+                 max_steps=None, min_length=None, max_length=None,
+                 longest=None):
+        """
+        :param board: The BoggleBoard to search.
+        :param word_list: The WordList to find words from.
+        :param deadline: An optional time (as returned by time.time()) after
+        which searches will stop early.
+        :param max_words: An optional int; the most words a search will find.
+        :param max_steps: An optional int; the most board nodes a search will
+        step onto.
+        :param min_length: An optional int; the length of the shortest words
+        to find.
+        :param max_length: An optional int; the length of the longest words to
+        find.
+        :param longest: An optional int; if given, only this many of the
+        longest words are kept.
+        """
+        check_limits({
+            'max_words': max_words, 'max_steps': max_steps,
+            'min_length': min_length, 'max_length': max_length,
+            'longest': longest,
+        })
         self.board = board
         self.word_list = word_list
+        self.deadline = deadline
+        self.max_words = max_words
+        self.max_steps = max_steps
+        self.min_length = min_length
+        self.max_length = max_length
+        self.longest = longest
         self.matches = set()
+        self.complete = False
+        self.limit_reached = False
+        self._cancelled = False
+        # The (node set before the last node, last node) pairs of the paths to
+        # each word found, recorded by find_paths
+        self._path_masks = None
+        self._all_paths = False
+        self._neighbor_mask_list = None
 
-    def find_words(self):
+    def cancel(self):
+        """
+        Stop a search in progress at its next check. Words found before the
+        search stops remain in self.matches.
+        """
+        self._cancelled = True
+
+    def find_words(self, start_nodes=None):
         """
         Find all words within the Boggle board.
-        :return: a list of Strings containing all matching words.
+        :param start_nodes: An optional list of node identifiers; if given, only
+        words whose paths start at one of these nodes will be found.
+        :return: a list of Strings containing all matching words. If the search
+        is cancelled or passes its deadline, the list holds the words found
+        before it stopped, and self.complete is False.
         """
-        for node_id, node_val in self.board.get_nodes():
-            self._find_suffix_words(node_id, node_val, '', set())
+        for _ in self.iter_words(start_nodes):
+            pass
         result_list = list(self.matches)
         result_list.sort(key=lambda s: len(s), reverse=True)
         return result_list
 
-    def _find_suffix_words(self, node_id, node_val, prefix, exclude):
-        word_at_node = "{}{}".format(prefix, node_val)
-        if self.word_list.contains_word(word_at_node):
-            self.matches.add(word_at_node)
-        if self.word_list.contains_prefix(word_at_node):
-            neighbor_exclude = exclude.union({node_id})
-            for neighbor_id, neighbor_val in self.board.get_neighbors(
-                    node_id, neighbor_exclude
-            ):
-                self._find_suffix_words(
-                    neighbor_id, neighbor_val, word_at_node, neighbor_exclude
-                )
+    def find_paths(self, all_paths=False, start_nodes=None):
+        """
+        Find all words within the Boggle board, along with the paths of nodes
+        that spell them.
+        :param all_paths: If True, find every path that spells each word;
+        otherwise, find one path per word.
+        :param start_nodes: An optional list of node identifiers; if given, only
+        words whose paths start at one of these nodes will be found.
+        :return: a dict mapping each word found to a list of paths, each of
+        which is a list of node identifiers in the order they spell the word.
+        If the search is cancelled or passes its deadline, the dict holds the
+        words found before it stopped, and self.complete is False.
+        """
+        self._path_masks = {}
+        self._all_paths = all_paths
+        try:
+            for _ in self.iter_words(start_nodes):
+                pass
+            return self._ordered_paths(self._path_masks, all_paths)
+        finally:
+            self._path_masks = None
+            self._all_paths = False
+
+    def iter_words(self, start_nodes=None):
+        """
+        Generate the words within the Boggle board as they are found, rather
+        than waiting for the whole search to finish. Each word is generated
+        once, in no particular order, and is also added to self.matches, which
+        is emptied when the search starts. The generator finishes early if the search is cancelled, passes its
+        deadline or reaches max_words or max_steps. With longest, a word is
+        generated when it joins the longest words found so far, and may later
+        be displaced from self.matches by a longer word.
+        :param start_nodes: An optional list of node identifiers; if given, only
+        words whose paths start at one of these nodes will be found.
+        :return: a generator of Strings.
+        """
+        if start_nodes is None:
+            start_nodes = range(0, len(self.board.cells))
+        cells = self.board.cells
+        neighbors = self.board.neighbors
+        self.matches = matches = set()
+        advance = self.word_list.advance
+        is_terminal = self.word_list.is_terminal
+        child_letters = self.word_list.child_letters
+        letter_masks = [self.word_list.letter_mask(value) for value in cells]
+        root = self.word_list.root()
+        path_masks = self._path_masks
+        all_paths = self._all_paths
+        min_length = self.min_length or 0
+        max_length = self.max_length
+        report_length = max_length or sys.maxsize
+        longest = self.longest
+        # With longest, (length, word) pairs for the words in matches
+        heap = []
+        max_words = self.max_words
+        found = 0
+        # Steps not yet counted against max_steps
+        steps_left = self.max_steps
+        # Each entry is a path still to be extended by a node: the node, the
+        # word spelled by the path so far, the bitmask of nodes on the path and
+        # the word list cursor for the path so far.
+        stack = [(node_id, '', 0, root) for node_id in reversed(start_nodes)]
+        self.complete = False
+        self.limit_reached = False
+        # Check once before starting, in case the deadline has already passed
+        countdown = 1
+        while stack:
+            countdown -= 1
+            if not countdown:
+                if self._should_stop():
+                    return
+                countdown = BoggleSolver.CHECK_INTERVAL
+                if steps_left is not None:
+                    if not steps_left:
+                        self.limit_reached = True
+                        return
+                    countdown = min(countdown, steps_left)
+                    steps_left -= countdown
+            node_id, prefix, visited, cursor = stack.pop()
+            node_val = cells[node_id]
+            cursor = advance(cursor, node_val)
+            if cursor is None:
+                continue
+            word_at_node = prefix + node_val
+            if is_terminal(cursor):
+                if word_at_node in matches:
+                    if all_paths:
+                        path_masks[word_at_node].append((visited, node_id))
+                elif min_length <= len(word_at_node) <= report_length:
+                    if longest is not None:
+                        entry = (len(word_at_node), word_at_node)
+                        if len(heap) < longest:
+                            heapq.heappush(heap, entry)
+                        else:
+                            displaced = heapq.heapreplace(heap, entry)[1]
+                            matches.discard(displaced)
+                            if path_masks is not None:
+                                del path_masks[displaced]
+                        if len(heap) == longest:
+                            min_length = heap[0][0] + 1
+                    matches.add(word_at_node)
+                    if path_masks is not None:
+                        path_masks[word_at_node] = [(visited, node_id)]
+                    found += 1
+                    yield word_at_node
+                    if found == max_words:
+                        self.limit_reached = True
+                        return
+            next_letters = child_letters(cursor)
+            if next_letters and (
+                    max_length is None or len(word_at_node) < max_length):
+                visited |= 1 << node_id
+                for neighbor_id in neighbors[node_id]:
+                    if (next_letters & letter_masks[neighbor_id] and
+                            not visited >> neighbor_id & 1):
+                        stack.append(
+                            (neighbor_id, word_at_node, visited, cursor)
+                        )
+        self.complete = True
+
+    def _should_stop(self):
+        return self._cancelled or (
+            self.deadline is not None and time.time() > self.deadline
+        )
+
+    # Find the paths spelling each word recorded by find_paths, from the sets
+    # of nodes (as bitmasks) before each path's last node: every ordering of
+    # each set that, followed by the last node, spells the word if all_paths
+    # is True, otherwise just the first. Works back from the last node, each
+    # step taking the recorded neighbor whose value ends the rest of the word,
+    # found by ANDing the remaining nodes, the neighbors and the nodes holding
+    # that value as bitmasks. Only when several nodes fit (repeated letters)
+    # are the others kept to try later, so a path is usually found in a single
+    # pass over the word. The nodes after each step are held as a chain of
+    # (node, rest of chain) pairs, so nothing is copied until a path is found.
+    # Returns a dict mapping each word to a list of paths, each a list of node
+    # identifiers.
+    def _ordered_paths(self, path_masks, all_paths):
+        cells = self.board.cells
+        lengths = [len(value) for value in cells]
+        neighbor_masks = self._neighbor_masks()
+        value_masks = {}
+        for node_id, value in enumerate(cells):
+            value_masks[value] = value_masks.get(value, 0) | 1 << node_id
+        tiles = any(length > 1 for length in lengths)
+        results = {}
+        for word, ends in path_masks.items():
+            found = []
+            stack = [
+                (last, len(word) - lengths[last], visited, None)
+                for visited, last in (set(ends) if all_paths else ends)
+            ]
+            stack.reverse()
+            while stack:
+                node_id, end, remaining, later = stack.pop()
+                later = (node_id, later)
+                while remaining and end:
+                    candidates = value_masks.get(word[end - 1], 0)
+                    if tiles and end > 1:
+                        candidates |= value_masks.get(word[end - 2:end], 0)
+                    candidates &= remaining & neighbor_masks[node_id]
+                    if not candidates:
+                        break
+                    bit = candidates & -candidates
+                    candidates ^= bit
+                    while candidates:
+                        other = candidates & -candidates
+                        candidates ^= other
+                        other_id = other.bit_length() - 1
+                        stack.append((
+                            other_id, end - lengths[other_id],
+                            remaining ^ other, later
+                        ))
+                    node_id = bit.bit_length() - 1
+                    end -= lengths[node_id]
+                    remaining ^= bit
+                    later = (node_id, later)
+                if remaining or end:
+                    continue
+                path = []
+                while later is not None:
+                    path.append(later[0])
+                    later = later[1]
+                found.append(path)
+                if not all_paths:
+                    break
+            results[word] = found
+        return results
+
+    # Get the neighbors of each node as a bitmask, building the list on first
+    # use.
+    def _neighbor_masks(self):
+        if self._neighbor_mask_list is None:
+            self._neighbor_mask_list = [
+                sum(1 << neighbor_id for neighbor_id in node_neighbors)
+                for node_neighbors in self.board.neighbors
+            ]
+        return self._neighbor_mask_list
+
+
+def encode_path(path, cell_count):
+    """
+    Encode a path of nodes compactly, as a string of hexadecimal digits: two
+    digits per node for boards of up to 256 nodes, and four for larger boards.
+    For example, the path [0, 1, 5, 10] is encoded as '0001050a'.
+
+    :param path: A list of node identifiers.
+    :param cell_count: The number of nodes on the board.
+    :return: a string.
+    """
+    node_format = '{:02x}' if cell_count <= 256 else '{:04x}'
+    return ''.join(node_format.format(node_id) for node_id in path)
+
+
+class IncrementalSolver(object):
+    """
+    Keeps the words on a board up to date as its cells are changed one at a
+    time, without solving the whole board again after each change.
+
+    The initial solve is the same search as BoggleSolver's, except that it
+    records every path it finds that spells a word or that some longer word
+    could continue from (a live prefix), as a [word so far, nodes on the
+    path, word list cursor, spells a word, extensions] list, where extensions
+    lists the recorded paths that continue it by one node. The recorded paths
+    thus form the same tree as the search, and are also indexed by the node
+    each ends at.
+
+    Node sets are bitmasks, as in BoggleSolver. Every path through a cell
+    either ends there or extends a path that does, so the recorded paths that
+    use a cell are exactly those indexed by it and their extensions. When a
+    cell changes, only those paths are visited and dropped, and any word left
+    without a path is removed. Every path through the changed cell either
+    starts there or steps onto it from a live prefix ending at one of its
+    neighbors, and those prefixes don't use the cell, so they are still valid.
+    The search is restarted only from those points, and finds exactly the
+    paths that were dropped or are newly possible. Other than the prefixes
+    ending next to the changed cell, paths that don't touch it aren't
+    visited.
+
+    A dropped path has its node set cleared, and is skipped wherever it is
+    still referenced (in the index, or by the path it extends). The index is
+    rebuilt without them once more paths have been dropped than are recorded,
+    so each change costs time in proportion to the paths it drops and finds.
+
+    The board passed in is updated in place as cells change.
+
+    As with BoggleSolver, searches can be bounded by a deadline, which can be
+    changed between calls. A search that passes its deadline stops, and the
+    complete attribute becomes False; the recorded paths are then incomplete,
+    so the solver's words are only those found before it stopped, and later
+    changes can't be relied on to give the same words as a full solve.
+    """
+
+    def __init__(self, board, word_list, deadline=None):
+        """
+        Solve a board, recording its paths for later updates.
+
+        :param board: The BoggleBoard to solve.
+        :param word_list: The WordList to find words from.
+        :param deadline: An optional time (as returned by time.time()) after
+        which searches will stop early.
+        """
+        self.board = board
+        self.word_list = word_list
+        self.deadline = deadline
+        self.complete = True
+        self._letter_masks = [word_list.letter_mask(v) for v in board.cells]
+        # The recorded paths ending at each node
+        self._ends = [[] for _ in board.cells]
+        # Numbers of recorded paths, and of dropped paths still referenced
+        self._recorded = 0
+        self._dropped = 0
+        # Number of recorded paths for each word found
+        self._path_counts = {}
+        root = word_list.root()
+        self._search([
+            (node_id, '', 0, root, IncrementalSolver._empty_path())
+            for node_id in reversed(range(0, len(board.cells)))
+        ])
+
+    def words(self):
+        """
+        Get the words on the board as it currently stands.
+
+        :return: a list of Strings, sorted by length as for
+        BoggleSolver.find_words.
+        """
+        result_list = list(self._path_counts)
+        result_list.sort(key=lambda s: len(s), reverse=True)
+        return result_list
+
+    def set_cell(self, node_id, value):
+        """
+        Change the value of a single cell and update the words found.
+
+        :param node_id: The node identifier of the cell to change.
+        :param value: The new value, in the form accepted by BoggleBoard.
+        :return: a pair of sets of Strings: the words added to the board by
+        the change, and the words removed from it.
+        """
+        cells = self.board.cells
+        cells[node_id] = BoggleBoard._normalize_value(value)
+        letter_mask = self.word_list.letter_mask(cells[node_id])
+        self._letter_masks[node_id] = letter_mask
+
+        path_counts = self._path_counts
+        removed = set()
+        dropping = self._ends[node_id]
+        self._ends[node_id] = []
+        dropped = 0
+        while dropping:
+            path = dropping.pop()
+            if not path[1]:
+                continue
+            path[1] = 0
+            dropped += 1
+            if path[3]:
+                word = path[0]
+                path_counts[word] -= 1
+                if not path_counts[word]:
+                    del path_counts[word]
+                    removed.add(word)
+            dropping.extend(path[4])
+        self._recorded -= dropped
+        self._dropped += dropped
+        if self._dropped > self._recorded:
+            self._reindex()
+
+        child_letters = self.word_list.child_letters
+        stack = [(
+            node_id, '', 0, self.word_list.root(),
+            IncrementalSolver._empty_path()
+        )]
+        for neighbor_id in self.board.neighbors[node_id]:
+            for path in self._ends[neighbor_id]:
+                if path[1] and child_letters(path[2]) & letter_mask:
+                    stack.append((node_id, path[0], path[1], path[2], path))
+        added = self._search(stack)
+        return added - removed, removed - added
+
+    # Make a stand-in for the (unrecorded) empty path, which paths starting at a
+    # node extend.
+    @staticmethod
+    def _empty_path():
+        return ['', 0, None, False, []]
+
+    # Drop the references to dropped paths from the index and from the paths
+    # they extended.
+    def _reindex(self):
+        self._ends = [
+            [path for path in paths if path[1]] for paths in self._ends
+        ]
+        for paths in self._ends:
+            for path in paths:
+                if path[4]:
+                    path[4] = [
+                        extension for extension in path[4] if extension[1]
+                    ]
+        self._dropped = 0
+
+    # Run the depth-first search from the paths on the stack, as described for
+    # BoggleSolver.iter_words, recording the paths found. Each entry on the
+    # stack also holds the recorded path it extends, or a stand-in from
+    # _empty_path. Returns the set of words that had no path before the
+    # search.
+    def _search(self, stack):
+        deadline = self.deadline
+        cells = self.board.cells
+        neighbors = self.board.neighbors
+        letter_masks = self._letter_masks
+        advance = self.word_list.advance
+        is_terminal = self.word_list.is_terminal
+        child_letters = self.word_list.child_letters
+        ends = self._ends
+        path_counts = self._path_counts
+        recorded = 0
+        added = set()
+        countdown = 1
+        while stack:
+            countdown -= 1
+            if not countdown:
+                if deadline is not None and time.time() > deadline:
+                    self.complete = False
+                    break
+                countdown = BoggleSolver.CHECK_INTERVAL
+            node_id, prefix, visited, cursor, parent = stack.pop()
+            node_val = cells[node_id]
+            cursor = advance(cursor, node_val)
+            if cursor is None:
+                continue
+            word_at_node = prefix + node_val
+            visited |= 1 << node_id
+            terminal = is_terminal(cursor)
+            if terminal:
+                if word_at_node in path_counts:
+                    path_counts[word_at_node] += 1
+                else:
+                    path_counts[word_at_node] = 1
+                    added.add(word_at_node)
+            next_letters = child_letters(cursor)
+            if not (terminal or next_letters):
+                continue
+            path = [word_at_node, visited, cursor, terminal, []]
+            recorded += 1
+            ends[node_id].append(path)
+            parent[4].append(path)
+            if next_letters:
+                for neighbor_id in neighbors[node_id]:
+                    if (next_letters & letter_masks[neighbor_id] and
+                            not visited >> neighbor_id & 1):
+                        stack.append((
+                            neighbor_id, word_at_node, visited, cursor, path
+                        ))
+        self._recorded += recorded
+        return added
+
+
+class WordFinder(object):
+    """
+    Checks whether particular words can be spelled out on a BoggleBoard,
+    without finding every word on the board. This is much cheaper than a
+    solve when only a few words matter, such as when validating the words a
+    player has submitted.
+
+    The board is indexed once, from get_nodes, as a map from each node value
+    to the bitmask of nodes holding it; neighbors are also held as bitmasks.
+    A search for a word starts only from the nodes holding its first letter
+    (or first tile), and each step considers only the unused neighbors of the
+    path's last node that hold the word's next letters, found with a single
+    AND of two masks. Most words that aren't on the board are ruled out in a
+    step or two, and the index is reused for every word checked.
+    """
+
+    def __init__(self, board):
+        """
+        :param board: The BoggleBoard to search.
+        """
+        self.board = board
+        self._positions = {}
+        for node_id, value in board.get_nodes():
+            self._positions[value] = (
+                self._positions.get(value, 0) | 1 << node_id
+            )
+        self._neighbor_masks = [
+            sum(1 << neighbor_id for neighbor_id in node_neighbors)
+            for node_neighbors in board.neighbors
+        ]
+
+    def contains_word(self, word):
+        """
+        Check whether a word can be spelled out on the board. The word list
+        isn't consulted.
+
+        :param word: A string; case is ignored.
+        :return: True if some path of neighboring nodes, using each node at
+        most once, spells the word.
+        """
+        return self.find_path(word) is not None
+
+    def find_path(self, word):
+        """
+        Find a path of nodes that spells a word.
+
+        :param word: A string; case is ignored.
+        :return: a list of node identifiers, in the order they spell the word,
+        or None if the word can't be spelled out on the board.
+        """
+        word = word.lower()
+        if not word:
+            return None
+        positions = self._positions
+        neighbor_masks = self._neighbor_masks
+        # Each entry is a path still to be extended: the length of the word it
+        # spells so far, the bitmask of nodes on it, and its nodes in order.
+        stack = [(0, 0, ())]
+        while stack:
+            offset, visited, path = stack.pop()
+            if offset == len(word):
+                return list(path)
+            available = ~visited
+            if path:
+                available &= neighbor_masks[path[-1]]
+            for length in range(1, BoggleBoard.MAX_TILE_LENGTH + 1):
+                if offset + length > len(word):
+                    break
+                candidates = positions.get(
+                    word[offset:offset + length], 0
+                ) & available
+                while candidates:
+                    bit = candidates & -candidates
+                    candidates ^= bit
+                    stack.append((
+                        offset + length, visited | bit,
+                        path + (bit.bit_length() - 1,)
+                    ))
+        return None
+
+    def find_present(self, words, word_list=None):
+        """
+        Find which of a list of words can be spelled out on the board.
+
+        :param words: A list of strings; case is ignored.
+        :param word_list: An optional WordList; if given, only words in the
+        list are reported.
+        :return: a list of the words (in lower case) that are on the board, in
+        the order given, each reported once.
+        """
+        present = []
+        seen = set()
+        for word in words:
+            word = word.lower()
+            if word in seen:
+                continue
+            seen.add(word)
+            if word_list is not None and not word_list.contains_word(word):
+                continue
+            if self.find_path(word) is not None:
+                present.append(word)
+        return present
+
+
+def make_boards(boards, board_width=4, board_height=None):
+    """
+    Create a BoggleBoard for each of a list of boards.
+
+    :param boards: A list of boards, each given as a list of values in the form
+    accepted by BoggleBoard, or as a BoggleBoard (which is used as it is,
+    whatever its size).
+    :param board_width: An int containing the width of every board in the list
+    given as values.
+    :param board_height: An int containing the height of every board in the
+    list given as values; if omitted, the boards are square.
+    :return: a list of BoggleBoards, in the order given.
+    :raises ValueError: if any board is invalid. The message identifies the
+    board by its index in the list.
+    """
+    if not isinstance(boards, list):
+        raise ValueError(u"Expected a list of boards.")
+    result = []
+    for idx, values in enumerate(boards):
+        if isinstance(values, BoggleBoard):
+            result.append(values)
+            continue
+        try:
+            result.append(BoggleBoard(values, board_width, board_height))
+        except (TypeError, ValueError) as e:
+            raise ValueError(u"Board {}: {}".format(idx, e.message))
+    return result
+
+
+# The keyword arguments of BoggleSolver that limit a search
+SOLVE_LIMITS = ('max_words', 'max_steps', 'min_length', 'max_length',
+                'longest')
+
+
+def check_limits(limits):
+    """
+    Check a dict of search limits, as passed to BoggleSolver.
+
+    :param limits: A dict mapping names from SOLVE_LIMITS to ints or None.
+    :raises ValueError: if a name isn't a limit, or a value isn't None or a
+    positive int.
+    """
+    for name, limit in sorted(limits.items()):
+        if name not in SOLVE_LIMITS:
+            raise ValueError(u"Unknown limit {}.".format(name))
+        if limit is not None and not (type(limit) == int and limit > 0):
+            raise ValueError(u"Invalid {} {}.".format(name, limit))
+
+
+def apply_limits(words, limits):
+    """
+    Apply search limits to the complete list of words on a board, found
+    without searching it under those limits (for example, a stored board's
+    words), so that the result matches what a limited search would find.
+    max_steps bounds the work of a search, so it has no effect here. Which
+    words are kept among those of the same length may differ from a search.
+
+    :param words: A list of words sorted by length, as returned by
+    BoggleSolver.find_words.
+    :param limits: A dict of limits, as passed to BoggleSolver.
+    :return: a pair of the list of words kept, in the order given, and
+    whether max_words cut the list short (as BoggleSolver.limit_reached).
+    :raises ValueError: if the limits are invalid, as for check_limits.
+    """
+    check_limits(limits)
+    min_length = limits.get('min_length') or 0
+    max_length = limits.get('max_length') or sys.maxsize
+    words = [word for word in words if min_length <= len(word) <= max_length]
+    if limits.get('longest') is not None:
+        words = words[0:limits['longest']]
+    max_words = limits.get('max_words')
+    if max_words is not None and len(words) > max_words:
+        return words[0:max_words], True
+    return words, False
+
+
+def solve_each(boards, word_list, board_width=4, deadline=None,
+               board_height=None, limits=None):
+    """
+    Find all words within each of a list of Boggle boards, reporting whether
+    each board's search ran to the end. Boards are solved as for solve_many.
+
+    :param boards: A list of boards, as for solve_many.
+    :param word_list: The WordList to find words from.
+    :param board_width: An int containing the width of every board in the list
+    given as values.
+    :param deadline: An optional time (as returned by time.time()) by which to
+    stop solving.
+    :param board_height: An int containing the height of every board in the
+    list given as values; if omitted, the boards are square.
+    :param limits: An optional dict of limits (max_words, max_steps and so on)
+    to pass to BoggleSolver for each board.
+    :return: a list containing, for each board in the order given, a pair of
+    the list of matching words that BoggleSolver.find_words would return for
+    it and whether its search was complete. If the deadline passes, boards
+    that weren't completely solved in time have None in place of their word
+    list; a board that reaches max_words or max_steps has the words found
+    before it stopped. Either way, the board's search isn't complete.
+    """
+    solved = {}
+    results = []
+    for board in make_boards(boards, board_width, board_height):
+        key = (board.board_width, board.board_height, tuple(board.cells))
+        if key not in solved:
+            solver = BoggleSolver(board, word_list, deadline, **(limits or {}))
+            words = solver.find_words()
+            solved[key] = (
+                words if solver.complete or solver.limit_reached else None,
+                solver.complete
+            )
+        results.append(solved[key])
+    return results
+
+
+def solve_many(boards, word_list, board_width=4, deadline=None,
+               board_height=None, limits=None):
+    """
+    Find all words within each of a list of Boggle boards.
+
+    Work that doesn't depend on a board's values is shared across the batch:
+    the neighbor table for the board size is built at most once, and a board
+    that appears more than once in the batch is only solved the first time.
+
+    :param boards: A list of boards, each given as a list of values in the form
+    accepted by BoggleBoard, or as a BoggleBoard (see make_boards).
+    :param word_list: The WordList to find words from.
+    :param board_width: An int containing the width of every board in the list
+    given as values.
+    :param deadline: An optional time (as returned by time.time()) by which to
+    stop solving.
+    :param board_height: An int containing the height of every board in the
+    list given as values; if omitted, the boards are square.
+    :param limits: An optional dict of limits (max_words, max_steps and so on)
+    to pass to BoggleSolver for each board.
+    :return: a list containing, for each board in the order given, the list of
+    matching words that BoggleSolver.find_words would return for it. If the
+    deadline passes, boards that weren't completely solved in time have None
+    in place of their word list; a board that reaches max_words or max_steps
+    has the words found before it stopped.
+    """
+    return [
+        words
+        for words, _ in solve_each(
+            boards, word_list, board_width, deadline, board_height, limits
+        )
+    ]
+
+
+def boards_containing(word, boards, board_width=4, board_height=None):
+    """
+    Find which of a list of Boggle boards a word can be spelled out on, using
+    WordFinder rather than solving each board. The word list isn't consulted.
+
+    :param word: A string; case is ignored.
+    :param boards: A list of boards, each given as a list of values in the form
+    accepted by BoggleBoard.
+    :param board_width: An int containing the width of every board in the list.
+    :param board_height: An int containing the height of every board in the
+    list; if omitted, the boards are square.
+    :return: a list of the indexes, in the list given, of the boards that
+    contain the word.
+    :raises ValueError: if any board is invalid, as for make_boards.
+    """
+    return [
+        idx
+        for idx, board in enumerate(
+            make_boards(boards, board_width, board_height)
+        )
+        if WordFinder(board).contains_word(word)
+    ]
@@ -0,0 +1,241 @@
+import numpy as np
+
+from boggle_solver import BoggleBoard, make_boards
+
+
+class BulkSolver(object):
+    """
+    Finds the words on many boards at once, for offline jobs (such as board
+    curation) that evaluate far more boards than BoggleSolver can search one
+    at a time.
+
+    Rather than following one path at a time, the search keeps a frontier of
+    every partial path on every board in a chunk, as parallel NumPy arrays
+    (the board, the node the path ends at, the bitmask of nodes on the path
+    and the word list cursor), and extends the whole frontier by one node per
+    step. Each step is a handful of array operations: gathering the tile at
+    each path's end, advancing every cursor by it, recording the paths that
+    spell words, and gathering the neighbors that the cursor's child letters
+    allow and the path hasn't used, which become the next frontier. The
+    pruning is the same as BoggleSolver's, so the same paths are searched;
+    they are just searched breadth-first, a level at a time.
+
+    The word list's trie is flattened into a sorted table of transitions, one
+    per edge, keyed by parent node * 256 + the byte of the edge's letter.
+    Since children are numbered contiguously and in label order (see
+    WordList), the key of each edge is larger than the last, and the child
+    reached by edge i is node i + 1; advancing every cursor is a single
+    binary search of the table. A cursor is a trie node, so each node that
+    ends a word identifies the word; words are spelled out from the node's
+    ancestors only once the search of a chunk is done.
+
+    Boards are encoded as arrays of tile numbers (uint8 unless a chunk has
+    more than 256 different tiles), so that multi-letter tiles cost no more
+    than single letters. Visited sets are uint64 bitmasks, which limits boards
+    to MAX_CELLS nodes.
+
+    Only WordList tries can be searched this way: a DawgWordList's nodes are
+    shared between different words.
+    """
+
+    # The most nodes a board may have, so that a path's nodes fit in a uint64
+    MAX_CELLS = 64
+
+    # Number of boards searched together; the frontier for each step of a
+    # chunk grows with the number of partial paths on all its boards
+    DEFAULT_CHUNK_SIZE = 1024
+
+    def __init__(self, word_list, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        :param word_list: The WordList to find words from.
+        :param chunk_size: The number of boards to search together.
+        :raises ValueError: if the word list isn't stored as a trie.
+        """
+        trie = word_list.flat_trie()
+        if trie is None:
+            raise ValueError(u"BulkSolver needs a word list stored as a trie.")
+        labels, first, terminal, child_letters = trie
+        node_count = len(terminal)
+        first = np.array(first, dtype=np.int64)
+        self.word_list = word_list
+        self.chunk_size = chunk_size
+        self._node_count = node_count
+        self._labels = np.frombuffer(labels, dtype=np.uint8, count=node_count)
+        self._parents = np.repeat(
+            np.arange(0, node_count, dtype=np.int64), np.diff(first)
+        )
+        self._keys = self._parents * 256 + self._labels[1:]
+        self._terminal = np.array(terminal, dtype=np.uint8).astype(bool)
+        self._child_letters = np.array(child_letters, dtype=np.int64)
+        self._neighbor_arrays = {}
+
+    def find_words(self, boards, board_width=4, board_height=None):
+        """
+        Find all words within each of a list of Boggle boards. Boards are
+        validated before any are solved.
+
+        :param boards: A list of boards, each given as a list of values in the
+        form accepted by BoggleBoard.
+        :param board_width: An int containing the width of every board.
+        :param board_height: An int containing the height of every board; if
+        omitted, the boards are square.
+        :return: a list containing, for each board in the order given, the list
+        of matching words that BoggleSolver.find_words would return for it.
+        """
+        results = []
+        for chunk, found in self._search(boards, board_width, board_height):
+            found_boards = found // self._node_count
+            bounds = np.searchsorted(
+                found_boards, np.arange(0, len(chunk) + 1)
+            )
+            for idx in range(0, len(chunk)):
+                words = [
+                    self._spell(node)
+                    for node in found[bounds[idx]:bounds[idx + 1]] %
+                    self._node_count
+                ]
+                words.sort(key=lambda s: len(s), reverse=True)
+                results.append(words)
+        return results
+
+    def count_words(self, boards, board_width=4, board_height=None):
+        """
+        Count the words within each of a list of Boggle boards, without
+        spelling them out. Boards are validated before any are solved.
+
+        :param boards: A list of boards, as for find_words.
+        :param board_width: An int containing the width of every board.
+        :param board_height: An int containing the height of every board; if
+        omitted, the boards are square.
+        :return: a list containing, for each board in the order given, the
+        number of distinct words on it.
+        """
+        counts = []
+        for chunk, found in self._search(boards, board_width, board_height):
+            counts.extend(np.bincount(
+                found // self._node_count, minlength=len(chunk)
+            ).tolist())
+        return counts
+
+    # Validate a list of boards and search them a chunk at a time, generating
+    # (chunk, found) pairs: the chunk's list of BoggleBoards, and a sorted
+    # array of the distinct words found on them, each encoded as the board's
+    # index in the chunk * the trie's node count + the word's node.
+    def _search(self, boards, board_width, board_height):
+        boards = make_boards(boards, board_width, board_height)
+        if boards and len(boards[0].cells) > BulkSolver.MAX_CELLS:
+            raise ValueError(u"Expected at most {} cells, saw {}.".format(
+                BulkSolver.MAX_CELLS, len(boards[0].cells)
+            ))
+        for start in range(0, len(boards), self.chunk_size):
+            chunk = boards[start:start + self.chunk_size]
+            yield chunk, self._search_chunk(chunk)
+
+    # Run the level-at-a-time search described in the class documentation
+    # over a list of boards of the same size.
+    def _search_chunk(self, boards):
+        tiles = {}
+        codes = [
+            [tiles.setdefault(value, len(tiles)) for value in board.cells]
+            for board in boards
+        ]
+        codes = np.array(
+            codes, dtype=np.uint8 if len(tiles) <= 256 else np.uint16
+        )
+        tile_bytes = np.full(
+            (len(tiles), BoggleBoard.MAX_TILE_LENGTH), -1, dtype=np.int64
+        )
+        tile_masks = np.zeros(len(tiles), dtype=np.int64)
+        for value, code in tiles.items():
+            tile_bytes[code, 0:len(value)] = [ord(letter) for letter in value]
+            tile_masks[code] = self.word_list.letter_mask(value)
+        neighbors, has_neighbor = self._neighbor_array(boards[0])
+        terminal = self._terminal
+        child_letters = self._child_letters
+        node_count = self._node_count
+        cell_count = codes.shape[1]
+
+        board_ids = np.repeat(
+            np.arange(0, len(boards), dtype=np.int64), cell_count
+        )
+        node_ids = np.tile(
+            np.arange(0, cell_count, dtype=np.int64), len(boards)
+        )
+        cursors = np.zeros(len(board_ids), dtype=np.int64)
+        visited = np.zeros(len(board_ids), dtype=np.uint64)
+        found = []
+        while len(board_ids):
+            cursors = self._advance(
+                cursors, tile_bytes[codes[board_ids, node_ids]]
+            )
+            live = cursors >= 0
+            board_ids = board_ids[live]
+            node_ids = node_ids[live]
+            cursors = cursors[live]
+            visited = visited[live] | np.left_shift(
+                np.uint64(1), node_ids.astype(np.uint64)
+            )
+            ends_word = terminal[cursors]
+            found.append(board_ids[ends_word] * node_count + cursors[ends_word])
+
+            next_letters = child_letters[cursors]
+            live = next_letters != 0
+            board_ids = board_ids[live]
+            node_ids = node_ids[live]
+            cursors = cursors[live]
+            visited = visited[live]
+            next_letters = next_letters[live]
+
+            steps = neighbors[node_ids]
+            allowed = (
+                has_neighbor[node_ids] &
+                (next_letters[:, None] &
+                 tile_masks[codes[board_ids[:, None], steps]] != 0) &
+                (np.right_shift(visited[:, None], steps.astype(np.uint64)) &
+                 np.uint64(1) == 0)
+            )
+            paths, slots = np.nonzero(allowed)
+            board_ids = board_ids[paths]
+            node_ids = steps[paths, slots]
+            cursors = cursors[paths]
+            visited = visited[paths]
+        return np.unique(np.concatenate(found))
+
+    # Advance each cursor by the bytes of a tile (padded with -1 for tiles
+    # shorter than MAX_TILE_LENGTH), giving -1 for those that no word
+    # continues from.
+    def _advance(self, cursors, tile_bytes):
+        keys = self._keys
+        for idx in range(0, tile_bytes.shape[1]):
+            letters = tile_bytes[:, idx]
+            wanted = cursors * 256 + letters
+            edges = np.minimum(np.searchsorted(keys, wanted), len(keys) - 1)
+            step = (letters >= 0) & (cursors >= 0)
+            cursors = np.where(
+                step, np.where(keys[edges] == wanted, edges + 1, -1), cursors
+            )
+        return cursors
+
+    # Get the word spelled by the path from the root of the trie to a node.
+    def _spell(self, node):
+        parents = self._parents
+        letters = []
+        while node:
+            letters.append(chr(self._labels[node]))
+            node = parents[node - 1]
+        return ''.join(reversed(letters))
+
+    # Get a board size's neighbor table as a (nodes x 8) array, with a
+    # matching array marking which entries are real neighbors (the others are
+    # padding, pointing at node 0), building them on first use.
+    def _neighbor_array(self, board):
+        key = (board.board_width, board.board_height)
+        arrays = self._neighbor_arrays.get(key)
+        if arrays is None:
+            neighbors = np.zeros((len(board.neighbors), 8), dtype=np.int64)
+            has_neighbor = np.zeros((len(board.neighbors), 8), dtype=bool)
+            for node_id, node_neighbors in enumerate(board.neighbors):
+                neighbors[node_id, 0:len(node_neighbors)] = node_neighbors
+                has_neighbor[node_id, 0:len(node_neighbors)] = True
+            arrays = self._neighbor_arrays[key] = (neighbors, has_neighbor)
+        return arrays
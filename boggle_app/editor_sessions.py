@@ -0,0 +1,106 @@
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+from boggle_solver import IncrementalSolver
+
+
+class EditorSessions(object):
+    """
+    Keeps an IncrementalSolver for each client that is editing a board, so
+    that when the client solves a board that differs from its last one in a
+    cell or two, only the changed cells are searched again.
+
+    Clients identify themselves with a token of their choosing. At most
+    max_sessions solvers are kept, evicting the least recently used when
+    full. Each process (e.g. each gunicorn worker) has its own sessions; a
+    request served by a process that hasn't seen the client before is simply
+    solved in full, and starts a session there.
+    """
+
+    # Boards that differ from the session's last board in more cells than
+    # this are solved from scratch, which is quicker than updating that many
+    # cells one at a time.
+    MAX_CHANGED_CELLS = 2
+
+    def __init__(self, max_sessions=256):
+        self.max_sessions = max_sessions
+        self._solvers = OrderedDict()
+        self._lock = threading.Lock()
+
+    def solve(self, token, board, word_list_name, word_list, deadline=None):
+        """
+        Find the words on a board, updating the client's previous solve if it
+        was for a board of the same size and word list.
+
+        :param token: A string identifying the client.
+        :param board: The BoggleBoard to solve.
+        :param word_list_name: The name of the word list to solve against.
+        :param word_list: The WordList with that name.
+        :param deadline: An optional time (as returned by time.time()) by which
+        to stop solving.
+        :return: a triple of the list of words found (sorted by length as for
+        BoggleSolver.find_words), whether the solve was incremental, and
+        whether it completed before the deadline.
+        """
+        # Take the client's solver out of the sessions while it's in use, so
+        # that concurrent requests from the same client can't both update it
+        with self._lock:
+            session = self._solvers.pop(token, None)
+        changed = None
+        if session is not None:
+            changed = EditorSessions._changed_cells(
+                session, board, word_list_name
+            )
+        if changed is None:
+            solver = IncrementalSolver(board, word_list, deadline)
+        else:
+            solver = session[1]
+            solver.deadline = deadline
+            for node_id in changed:
+                solver.set_cell(node_id, board.cells[node_id])
+        if solver.complete:
+            with self._lock:
+                self._solvers[token] = (word_list_name, solver)
+                while len(self._solvers) > self.max_sessions:
+                    self._solvers.popitem(last=False)
+        return solver.words(), changed is not None, solver.complete
+
+    def __len__(self):
+        return len(self._solvers)
+
+    # Get the list of cells that differ between a session's board and a new
+    # board, or None if the new board can't be reached by updating the
+    # session's solver.
+    @staticmethod
+    def _changed_cells(session, board, word_list_name):
+        session_list_name, solver = session
+        old_board = solver.board
+        if (session_list_name != word_list_name or
+                old_board.board_width != board.board_width or
+                old_board.board_height != board.board_height):
+            return None
+        changed = [
+            node_id for node_id, value in enumerate(board.cells)
+            if old_board.cells[node_id] != value
+        ]
+        if len(changed) > EditorSessions.MAX_CHANGED_CELLS:
+            return None
+        return changed
+
+
+def get_editor_sessions():
+    """
+    Create the editor sessions described by the project settings:
+
+        BOGGLE_EDITOR_SESSIONS: the number of clients whose solvers each
+            process keeps (default 256). Setting this to 0 disables
+            incremental solving.
+
+    :return: an EditorSessions, or None if incremental solving is disabled.
+    """
+    size = getattr(settings, 'BOGGLE_EDITOR_SESSIONS', 256)
+    if not size:
+        return None
+    return EditorSessions(size)
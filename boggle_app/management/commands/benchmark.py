@@ -0,0 +1,78 @@
+import json
+import platform
+import sys
+import time
+from collections import OrderedDict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from boggle_app.benchmarks import BENCHMARKS
+
+
+class Command(BaseCommand):
+    help = ('Runs solver, word list and view benchmarks, printing latency '
+            'percentiles and throughput, and optionally saving them as JSON')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'benchmarks', nargs='*', type=str,
+            help='Names of benchmarks to run (default: all). Available: '
+                 '{}'.format(', '.join(BENCHMARKS.keys()))
+        )
+        parser.add_argument('--number', type=int, default=None,
+                            help='Number of samples (default: per benchmark)')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Seed for generating random boards')
+        parser.add_argument('--output', type=str, default=None,
+                            help='File to write results to, as JSON')
+
+    def handle(self, *args, **options):
+        names = options['benchmarks'] or list(BENCHMARKS.keys())
+        for name in names:
+            if name not in BENCHMARKS:
+                raise CommandError(u"Unknown benchmark {}".format(name))
+        results = OrderedDict()
+        for name in names:
+            self.stdout.write(self.style.SUCCESS(name))
+            self.stdout.write(
+                u"  {:<40} {:>10} {:>10} {:>10} {:>12} {:>10}".format(
+                    'operation', 'p50 (us)', 'p95 (us)', 'p99 (us)',
+                    'per second', 'mem (kB)'
+                ))
+            kwargs = {'seed': options['seed']}
+            if options['number']:
+                kwargs['number'] = options['number']
+            results[name] = BENCHMARKS[name](**kwargs)
+            for measurement in results[name]:
+                self.stdout.write(
+                    u"  {:<40} {:>10.1f} {:>10.1f} {:>10.1f} {:>12.1f} "
+                    u"{:>10}".format(
+                        measurement['label'], measurement['p50'] * 1e6,
+                        measurement['p95'] * 1e6, measurement['p99'] * 1e6,
+                        measurement['throughput'] or 0,
+                        _memory_kb(measurement)
+                    ))
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                json.dump(OrderedDict([
+                    ('time', time.time()),
+                    ('python', sys.version),
+                    ('platform', platform.platform()),
+                    ('arguments', {
+                        'number': options['number'], 'seed': options['seed']
+                    }),
+                    ('results', results),
+                ]), output_file, indent=2)
+            self.stdout.write(self.style.SUCCESS(
+                "Wrote results to {}".format(options['output']))
+            )
+
+
+# Format the memory used by a measurement's calls for the results table: the
+# size of the solver's own structures where the benchmark counted them, or
+# else the peak allocated while tracing, or '-' if neither was measured.
+def _memory_kb(measurement):
+    for name in ('solver_kb', 'allocated_kb'):
+        if measurement.get(name) is not None:
+            return u"{:.0f}".format(measurement[name])
+    return u"-"
@@ -0,0 +1,86 @@
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+
+from boggle_app.board_generator import (
+    OBJECTIVES, describe_board, roll_board, search_boards
+)
+from boggle_app.word_list import get_word_list_registry
+
+
+class Command(BaseCommand):
+    help = ('Rolls random boards from the standard Boggle dice, or searches '
+            'for high-scoring boards, and prints them with their scores')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=10,
+                            help='Number of boards to print (default: 10)')
+        parser.add_argument(
+            '--search', action='store_true', default=False,
+            help='Search for high-scoring boards by simulated annealing, '
+                 'running one search per board in parallel, rather than '
+                 'rolling boards at random'
+        )
+        parser.add_argument('--iterations', type=int, default=2000,
+                            help='Changes tried by each search (default: 2000)')
+        parser.add_argument(
+            '--objective', choices=OBJECTIVES, default='score',
+            help='What to maximize when searching (default: score)'
+        )
+        parser.add_argument('--width', type=int, default=4,
+                            help='Board width (default: 4)')
+        parser.add_argument('--height', type=int, default=None,
+                            help='Board height (default: the board width)')
+        parser.add_argument('--seed', type=int, default=None,
+                            help='Seed for rolling and searching')
+        parser.add_argument('--processes', type=int, default=None,
+                            help='Number of processes to search with '
+                                 '(default: the number of CPUs)')
+        parser.add_argument('--word-list', type=str, default='en',
+                            help='Name of the word list to use (default: en)')
+        parser.add_argument('--words', action='store_true', default=False,
+                            help='Print the words on each board')
+
+    def handle(self, *args, **options):
+        registry = get_word_list_registry()
+        name = options['word_list']
+        if name not in registry.word_files:
+            raise CommandError(u"Unknown word list {}".format(name))
+        board_width = options['width']
+        board_height = options['height'] or board_width
+        if options['search']:
+            results = search_boards(
+                registry.word_files[name], options['count'],
+                options['iterations'], board_width, options['objective'],
+                options['seed'], options['processes'], registry.backend,
+                board_height
+            )
+        else:
+            word_list = registry.get(name)
+            rng = random.Random(options['seed'])
+            results = [
+                describe_board(
+                    roll_board(rng, board_width, board_height)[1],
+                    board_width, word_list, board_height
+                )
+                for _ in range(0, options['count'])
+            ]
+        for result in results:
+            self.stdout.write(u"{}  score {}, {} words".format(
+                Command._format_board(
+                    result['board'], board_width, board_height
+                ),
+                result['score'], result['word_count']
+            ))
+            if options['words']:
+                self.stdout.write(u"    {}".format(u' '.join(result['words'])))
+
+    # Format a board as space-separated rows of capitalized tiles, e.g.
+    # 'QuAB CDEF ...'.
+    @staticmethod
+    def _format_board(values, board_width, board_height):
+        tiles = [value.capitalize() for value in values]
+        return u' '.join(
+            u''.join(tiles[row * board_width:(row + 1) * board_width])
+            for row in range(0, board_height)
+        )
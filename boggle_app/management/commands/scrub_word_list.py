@@ -1,31 +1,195 @@
+import heapq
+import multiprocessing
+import os
 import re
+import tempfile
+import time
+from collections import deque
+
 from django.core.management.base import BaseCommand, CommandError
 
+from boggle_app.word_list import WORD_LIST_BACKENDS
+
+# A valid word on a line of its own (ignoring surrounding whitespace): 3 to 16
+# ASCII letters, once the input has been converted to lower case. Matched
+# against a whole chunk of lines at a time rather than line by line.
+VALID_WORD = re.compile(br'^[ \t\r\f\v]*([a-z]{3,16})[ \t\r\f\v]*$', re.M)
+
 
 class Command(BaseCommand):
-    help = 'Removes invalid words from a text file (assuming one word per line)'
+    help = ('Removes invalid words from a text file (assuming one word per '
+            'line), writing the remaining words sorted and de-duplicated')
 
     def add_arguments(self, parser):
         parser.add_argument('input_file', type=str)
         parser.add_argument('output_file', type=str)
+        parser.add_argument(
+            '--compile', action='store_true', default=False,
+            help='Write the scrubbed words as a compiled word list (see '
+                 'WordList.save) rather than as text'
+        )
+        parser.add_argument(
+            '--backend', choices=sorted(WORD_LIST_BACKENDS), default='trie',
+            help='The word list format to compile to (default: trie)'
+        )
+        parser.add_argument(
+            '--processes', type=int, default=None,
+            help='Number of processes to filter the input with (default: the '
+                 'number of CPUs)'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=4 << 20,
+            help='Bytes of input to read and filter at a time (default: 4MB)'
+        )
+        parser.add_argument(
+            '--max-words', type=int, default=1000000,
+            help='Number of distinct words to hold in memory before sorting '
+                 'them into a temporary file (default: 1000000)'
+        )
 
     def handle(self, *args, **options):
         in_filename = options['input_file']
         out_filename = options['output_file']
-        # TODO: Check file locations exist, correct access, etc
+        if not os.path.isfile(in_filename):
+            raise CommandError(u"No such file: {}".format(in_filename))
         self.stdout.write(
             u"Scrubbing file {} and writing to {}".format(
                 in_filename, out_filename
             )
         )
-        ascii_letters = re.compile(r'^([a-zA-Z]+)$')
-        with open(in_filename) as in_file:
-            with open(out_filename, 'w') as out_file:
-                for word in in_file:
-                    word = word.strip()
-                    if len(word) >= 3 and len(
-                            word) <= 16 and ascii_letters.match(word):
-                        out_file.write("{}\n".format(word.lower()))
+        self._start = time.time()
+        self._last_report = self._start
+        self._bytes_read = 0
+        self._input_size = os.path.getsize(in_filename)
+        with open(in_filename, 'rb') as in_file:
+            runs = self._sort_runs(
+                _read_chunks(in_file, options['chunk_size']),
+                options['processes'], options['max_words']
+            )
+        try:
+            words = _merge_runs(runs)
+            if options['compile']:
+                word_list_class = WORD_LIST_BACKENDS[options['backend']]
+                word_list_class.from_words(words).save(out_filename)
+            else:
+                with open(out_filename, 'wb') as out_file:
+                    for word in words:
+                        out_file.write(word + b'\n')
+        finally:
+            # Every run but the last is a temporary file
+            for run in runs[:-1]:
+                run.close()
+        elapsed = max(time.time() - self._start, 1e-6)
         self.stdout.write(self.style.SUCCESS(
-            "Wrote output to {}".format(out_filename))
-        )
\ No newline at end of file
+            u"Wrote output to {} in {:.1f}s ({:.1f} MB/s)".format(
+                out_filename, elapsed, _megabytes(self._bytes_read) / elapsed
+            )
+        ))
+
+    # Filter chunks of input, collecting the valid words into sorted runs of
+    # at most max_words distinct words each. Every full run is written to a
+    # temporary file, so memory use doesn't grow with the size of the input.
+    # Returns a list of the run files, positioned at their starts, followed by
+    # a list holding the final run; every run is a sequence of sorted,
+    # newline-terminated words.
+    def _sort_runs(self, chunks, processes, max_words):
+        runs = []
+        words = set()
+        processes = processes or multiprocessing.cpu_count()
+        pool = None
+        if processes > 1:
+            pool = multiprocessing.Pool(processes)
+        try:
+            for size, scrubbed in _filter_chunks(chunks, pool, processes):
+                words.update(scrubbed)
+                self._bytes_read += size
+                self._report_progress()
+                if len(words) >= max_words:
+                    runs.append(_write_run(sorted(words)))
+                    words = set()
+        except BaseException:
+            for run in runs:
+                run.close()
+            raise
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        runs.append([word + b'\n' for word in sorted(words)])
+        return runs
+
+    # Report throughput, at most once a second.
+    def _report_progress(self):
+        now = time.time()
+        if now - self._last_report < 1:
+            return
+        self._last_report = now
+        megabytes = _megabytes(self._bytes_read)
+        self.stdout.write(
+            u"  {:.1f} of {:.1f} MB read ({:.1f} MB/s)".format(
+                megabytes, _megabytes(self._input_size),
+                megabytes / (now - self._start)
+            )
+        )
+
+
+def _megabytes(size):
+    return size / float(1 << 20)
+
+
+# Generate chunks of around chunk_size bytes from a file opened in binary mode,
+# each extended to the end of its last line.
+def _read_chunks(in_file, chunk_size):
+    while True:
+        chunk = in_file.read(chunk_size)
+        if not chunk:
+            return
+        if not chunk.endswith(b'\n'):
+            chunk += in_file.readline()
+        yield chunk
+
+
+# Filter chunks, in a pool of processes if one is given, generating a (chunk
+# size, set of valid words) pair for each chunk in order. At most two chunks
+# per process are read ahead of the results being used, however fast the
+# input can be read.
+def _filter_chunks(chunks, pool, processes):
+    if pool is None:
+        for chunk in chunks:
+            yield len(chunk), _scrub_chunk(chunk)
+        return
+    window = 2 * processes
+    pending = deque()
+    for chunk in chunks:
+        pending.append((len(chunk), pool.apply_async(_scrub_chunk, (chunk,))))
+        if len(pending) >= window:
+            size, result = pending.popleft()
+            yield size, result.get()
+    while pending:
+        size, result = pending.popleft()
+        yield size, result.get()
+
+
+# Get the set of valid words in a chunk of lines, converted to lower case. Run
+# in the pool processes.
+def _scrub_chunk(chunk):
+    return set(VALID_WORD.findall(chunk.lower()))
+
+
+# Write a sorted run of words to a temporary file, returning the file
+# positioned at its start.
+def _write_run(words):
+    run = tempfile.TemporaryFile()
+    run.writelines(word + b'\n' for word in words)
+    run.seek(0)
+    return run
+
+
+# Merge sorted runs of newline-terminated words, generating each distinct word
+# once, in order and without its newline.
+def _merge_runs(runs):
+    previous = None
+    for line in heapq.merge(*runs):
+        if line != previous:
+            previous = line
+            yield line[:-1]
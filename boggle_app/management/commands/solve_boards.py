@@ -0,0 +1,79 @@
+import json
+import random
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from boggle_app.board_generator import roll_board
+from boggle_app.board_store import store_boards
+from boggle_app.word_list import get_word_list_registry
+
+
+class Command(BaseCommand):
+    help = ('Solves boards ahead of time, in parallel, and stores their words '
+            'and paths in the database for the solve view to serve, '
+            'optionally as the puzzles for a given day')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'boards_file', nargs='?', type=str, default=None,
+            help='File of boards to solve, one per line, each a JSON list of '
+                 'values in row-major order'
+        )
+        parser.add_argument('--random', type=int, default=0,
+                            help='Number of boards to roll from the standard '
+                                 'dice, as well as any in the file')
+        parser.add_argument('--seed', type=int, default=None,
+                            help='Seed for rolling boards')
+        parser.add_argument('--width', type=int, default=4,
+                            help='Board width (default: 4)')
+        parser.add_argument('--height', type=int, default=None,
+                            help='Board height (default: the board width)')
+        parser.add_argument('--date', type=str, default=None,
+                            help='Mark the boards as the puzzles for a day, '
+                                 'given as YYYY-MM-DD')
+        parser.add_argument('--processes', type=int, default=None,
+                            help='Number of processes to solve with '
+                                 '(default: the number of CPUs)')
+        parser.add_argument('--word-list', type=str, default='en',
+                            help='Name of the word list to use (default: en)')
+
+    def handle(self, *args, **options):
+        registry = get_word_list_registry()
+        name = options['word_list']
+        if name not in registry.word_files:
+            raise CommandError(u"Unknown word list {}".format(name))
+        board_width = options['width']
+        board_height = options['height'] or board_width
+        puzzle_date = None
+        if options['date']:
+            try:
+                puzzle_date = datetime.strptime(
+                    options['date'], '%Y-%m-%d'
+                ).date()
+            except ValueError:
+                raise CommandError(u"Invalid date {}".format(options['date']))
+        boards = []
+        if options['boards_file']:
+            with open(options['boards_file']) as boards_file:
+                boards += [json.loads(line) for line in boards_file
+                           if line.strip()]
+        rng = random.Random(options['seed'])
+        boards += [
+            roll_board(rng, board_width, board_height)[1]
+            for _ in range(0, options['random'])
+        ]
+        if not boards:
+            raise CommandError(u"No boards to solve")
+        try:
+            stored = store_boards(
+                boards, name, registry.word_files[name], board_width,
+                board_height, puzzle_date, options['processes'],
+                registry.backend
+            )
+        except ValueError as e:
+            raise CommandError(e.message)
+        for solved in stored:
+            self.stdout.write(u"{}  score {}, {} words".format(
+                solved.board, solved.score, solved.word_count
+            ))
@@ -0,0 +1,201 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+class SolveStats(object):
+    """
+    Counters and phase timings for a single solve request.
+
+    The search counters are filled in by solving against an
+    InstrumentedWordList (max_depth once its update_max_depth is called):
+
+        nodes_visited:   board nodes the search stepped onto.
+        prefix_checks:   checks for longer words continuing from a prefix.
+        word_checks:     checks for whether a prefix is a complete word.
+        pruned_branches: paths abandoned because no word continues from them.
+        max_depth:       length of the longest prefix the search reached.
+
+    Phase timings (in seconds) are recorded with the phase() context manager.
+    """
+
+    COUNTERS = ('nodes_visited', 'prefix_checks', 'word_checks',
+                'pruned_branches')
+
+    def __init__(self):
+        self.nodes_visited = 0
+        self.prefix_checks = 0
+        self.word_checks = 0
+        self.pruned_branches = 0
+        self.max_depth = 0
+        self.phase_seconds = OrderedDict()
+
+    def header_value(self):
+        """
+        Format the stats for a response header, as semicolon-separated
+        name=value pairs with phase timings in milliseconds.
+        """
+        values = [
+            u'{}={}'.format(name, getattr(self, name))
+            for name in SolveStats.COUNTERS + ('max_depth',)
+        ]
+        values += [
+            u'{}_ms={:.3f}'.format(name, seconds * 1000)
+            for name, seconds in self.phase_seconds.items()
+        ]
+        return u'; '.join(values)
+
+
+@contextmanager
+def phase(stats, name):
+    """
+    Time the enclosed block as a phase of a solve request.
+
+    :param stats: A SolveStats to record the time in, or None to record
+    nothing.
+    :param name: The name of the phase.
+    """
+    if stats is None:
+        yield
+        return
+    start = time.time()
+    try:
+        yield
+    finally:
+        stats.phase_seconds[name] = (
+            stats.phase_seconds.get(name, 0) + time.time() - start
+        )
+
+
+class InstrumentedWordList(object):
+    """
+    Wraps a WordList, counting the cursor operations made on it in a
+    SolveStats. It can be passed to BoggleSolver in place of the WordList it
+    wraps; since the solver is unchanged, solves that aren't instrumented pay
+    nothing for the counting.
+    """
+
+    def __init__(self, word_list, stats):
+        self.word_list = word_list
+        self.stats = stats
+        self._deepest = word_list.root()
+        self.letter_mask = word_list.letter_mask
+
+    def root(self):
+        return self.word_list.root()
+
+    def advance(self, cursor, letters):
+        self.stats.nodes_visited += 1
+        cursor = self.word_list.advance(cursor, letters)
+        if cursor is None:
+            self.stats.pruned_branches += 1
+        elif cursor > self._deepest:
+            self._deepest = cursor
+        return cursor
+
+    def is_terminal(self, cursor):
+        self.stats.word_checks += 1
+        return self.word_list.is_terminal(cursor)
+
+    def has_children(self, cursor):
+        self.stats.prefix_checks += 1
+        return self.word_list.has_children(cursor)
+
+    def child_letters(self, cursor):
+        self.stats.prefix_checks += 1
+        letters = self.word_list.child_letters(cursor)
+        if not letters:
+            self.stats.pruned_branches += 1
+        return letters
+
+    def contains_word(self, word):
+        self.stats.word_checks += 1
+        return self.word_list.contains_word(word)
+
+    def contains_prefix(self, prefix):
+        self.stats.prefix_checks += 1
+        return self.word_list.contains_prefix(prefix)
+
+    def update_max_depth(self):
+        """
+        Record the length of the longest prefix reached so far in the stats.
+        Cursors are numbered breadth-first, so this is the depth of the highest
+        cursor that advance has returned. Word lists that can't report depth
+        (see DawgWordList) leave max_depth unchanged.
+        """
+        depth = self.word_list.depth(self._deepest)
+        if depth is not None:
+            self.stats.max_depth = max(self.stats.max_depth, depth)
+
+
+class MetricsRegistry(object):
+    """
+    Running totals of the SolveStats recorded by this process, which can be
+    rendered in the Prometheus text exposition format. Each server process
+    keeps its own totals.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.counters = OrderedDict((name, 0) for name in SolveStats.COUNTERS)
+        self.max_depth = 0
+        self.phase_seconds = OrderedDict()
+
+    def record(self, stats):
+        """
+        Add the stats for a request to the totals.
+        """
+        with self._lock:
+            self.requests += 1
+            for name in SolveStats.COUNTERS:
+                self.counters[name] += getattr(stats, name)
+            self.max_depth = max(self.max_depth, stats.max_depth)
+            for name, seconds in stats.phase_seconds.items():
+                self.phase_seconds[name] = (
+                    self.phase_seconds.get(name, 0) + seconds
+                )
+
+    def render(self, result_cache=None):
+        """
+        Render the totals in the Prometheus text format.
+
+        :param result_cache: An optional result cache whose hit and miss
+        counts should be included.
+        :return: a string.
+        """
+        lines = []
+
+        def metric(name, metric_type, help_text, samples):
+            lines.append(u'# HELP {} {}'.format(name, help_text))
+            lines.append(u'# TYPE {} {}'.format(name, metric_type))
+            for labels, value in samples:
+                lines.append(u'{}{} {}'.format(name, labels, value))
+
+        with self._lock:
+            metric('boggle_solve_requests_total', 'counter',
+                   'Instrumented solve requests.', [('', self.requests)])
+            for name, value in self.counters.items():
+                metric('boggle_solver_{}_total'.format(name), 'counter',
+                       'Solver {} across all requests.'.format(
+                           name.replace('_', ' ')),
+                       [('', value)])
+            metric('boggle_solver_max_depth', 'gauge',
+                   'Longest prefix reached by any search.',
+                   [('', self.max_depth)])
+            metric('boggle_solve_phase_seconds_total', 'counter',
+                   'Time spent in each phase of solve requests.', [
+                       (u'{{phase="{}"}}'.format(name), seconds)
+                       for name, seconds in self.phase_seconds.items()
+                   ])
+        if result_cache is not None:
+            metric('boggle_result_cache_hits_total', 'counter',
+                   'Result cache hits.', [('', result_cache.hits)])
+            metric('boggle_result_cache_misses_total', 'counter',
+                   'Result cache misses.', [('', result_cache.misses)])
+        return u'\n'.join(lines) + u'\n'
+
+
+# Totals for this process
+registry = MetricsRegistry()
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SolvedBoard',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=1024, unique=True)),
+                ('word_list', models.CharField(max_length=64)),
+                ('board', models.TextField()),
+                ('board_width', models.PositiveSmallIntegerField()),
+                ('board_height', models.PositiveSmallIntegerField()),
+                ('results', models.TextField()),
+                ('word_count', models.PositiveIntegerField()),
+                ('score', models.PositiveIntegerField()),
+                ('puzzle_date', models.DateField(blank=True, db_index=True, null=True)),
+                ('solved_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ('puzzle_date', 'id'),
+            },
+        ),
+    ]
@@ -1,6 +1,66 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
+import json
+
 from django.db import models
+from django.utils.encoding import python_2_unicode_compatible
+
+
+@python_2_unicode_compatible
+class SolvedBoard(models.Model):
+    """
+    A board solved ahead of time by manage.py solve_boards, so that the solve
+    view can answer it without searching (see boggle_app/board_store.py).
+
+    Boards are found by key, the board's board_cache_key, which every
+    rotation and reflection of the board shares. The results are stored for
+    the board in the orientation it was solved in, as the compact JSON list
+    returned by the solve view's paths result mode: a [word, score, path]
+    array for each word, sorted by length as for BoggleSolver.find_words.
+
+    A board can be marked as one of the puzzles for a given day.
+    """
+
+    key = models.CharField(max_length=1024, unique=True)
+    word_list = models.CharField(max_length=64)
+    # The board's values, lower case, row-major and separated by commas
+    board = models.TextField()
+    board_width = models.PositiveSmallIntegerField()
+    board_height = models.PositiveSmallIntegerField()
+    results = models.TextField()
+    word_count = models.PositiveIntegerField()
+    score = models.PositiveIntegerField()
+    puzzle_date = models.DateField(null=True, blank=True, db_index=True)
+    solved_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ('puzzle_date', 'id')
+
+    def __str__(self):
+        return self.key
+
+    def get_results(self):
+        """
+        :return: the stored results, as a list of [word, score, path] lists.
+        """
+        return json.loads(self.results)
+
+    def get_words(self):
+        """
+        :return: the words on the board, as BoggleSolver.find_words would
+        return them.
+        """
+        return [result[0] for result in self.get_results()]
+
+    def same_orientation(self, board):
+        """
+        Check whether a board is the one that was solved in the same
+        orientation, so that the stored paths apply to it.
 
-# Create your models here.
+        :param board: A BoggleBoard with the same key.
+        :return: True if the board's cells are in the same places as the
+        stored board's.
+        """
+        return (board.board_width == self.board_width and
+                ','.join(board.cells) == self.board)
@@ -0,0 +1,140 @@
+import multiprocessing
+from collections import OrderedDict
+
+from boggle_solver import BoggleBoard, BoggleSolver, make_boards
+from word_list import EN_US_FILE, open_word_list
+
+# The word list used by the current worker process, loaded by _init_worker
+# when the process starts.
+_worker_word_list = None
+
+
+class SolverPool(object):
+    """
+    Spreads the work of solving boards across a pool of worker processes.
+
+    Each worker loads the word list once, when it starts, and then solves
+    whatever it is sent. Work is split in one of two ways:
+
+    - find_words splits a single board by start node. The searches from
+      different start nodes never share any state, so each worker finds the
+      words starting at its own nodes and the match sets are merged afterwards.
+    - solve_many sends each (distinct) board in a batch to a worker as a whole.
+
+    Sending work to a process costs far more than a small search, so this is
+    only worthwhile for large boards and for large batches; the web views use
+    BoggleSolver directly.
+
+    Pools hold operating system processes, so should be closed when no longer
+    needed, either with close() or by using the pool as a context manager.
+    """
+
+    def __init__(self, word_file=EN_US_FILE, processes=None):
+        """
+        Start a pool of worker processes.
+
+        :param word_file: The path to the text word list that the workers will
+        load (using its compiled copy if there is one).
+        :param processes: The number of worker processes to start; defaults to
+        the number of CPUs.
+        """
+        self._pool = word_list_pool(word_file, processes)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Shut down the worker processes, waiting for any work in progress.
+        """
+        self._pool.close()
+        self._pool.join()
+
+    def find_words(self, board):
+        """
+        Find all words within a single Boggle board, searching from different
+        start nodes in parallel.
+
+        :param board: The BoggleBoard to solve.
+        :return: a list of Strings containing all matching words, sorted by
+        length as for BoggleSolver.find_words.
+        """
+        tasks = [
+            (board.cells, board.board_width, board.board_height, [node_id])
+            for node_id in range(0, len(board.cells))
+        ]
+        matches = set()
+        for words in self._pool.imap_unordered(_find_words_from, tasks):
+            matches.update(words)
+        result_list = list(matches)
+        result_list.sort(key=lambda s: len(s), reverse=True)
+        return result_list
+
+    def solve_many(self, boards, board_width=4, board_height=None):
+        """
+        Find all words within each of a list of Boggle boards, solving
+        different boards in parallel. Boards are validated before any are
+        sent to the workers.
+
+        :param boards: A list of boards, each given as a list of values in the
+        form accepted by BoggleBoard.
+        :param board_width: An int containing the width of every board.
+        :param board_height: An int containing the height of every board; if
+        omitted, the boards are square.
+        :return: a list containing, for each board in the order given, the list
+        of matching words that BoggleSolver.find_words would return for it.
+        """
+        keys = [
+            tuple(board.cells)
+            for board in make_boards(boards, board_width, board_height)
+        ]
+        unique = list(OrderedDict.fromkeys(keys))
+        results = self._pool.map(_find_words_from, [
+            (key, board_width, board_height, None) for key in unique
+        ])
+        solved = dict(zip(unique, results))
+        return [solved[key] for key in keys]
+
+
+def word_list_pool(word_file, processes=None, backend='trie'):
+    """
+    Start a pool of worker processes that each load a word list once, when
+    they start, for functions run in the pool to get with worker_word_list.
+    The caller is responsible for closing the pool.
+
+    :param word_file: The path to the text word list that the workers will
+    load (using its compiled copy if there is one).
+    :param processes: The number of worker processes to start; defaults to
+    the number of CPUs.
+    :param backend: The word list backend to load the list with (see
+    open_word_list).
+    :return: a multiprocessing.Pool.
+    """
+    return multiprocessing.Pool(
+        processes, _init_worker, (word_file, backend)
+    )
+
+
+def worker_word_list():
+    """
+    :return: the word list loaded by the current worker process of a pool
+    started by word_list_pool.
+    """
+    return _worker_word_list
+
+
+# Pool initializer; runs once in each worker process.
+def _init_worker(word_file, backend):
+    global _worker_word_list
+    _worker_word_list = open_word_list(word_file, backend)
+
+
+# Run in a worker process: solve the board described by task, starting only
+# from the given nodes (or from all nodes if start_nodes is None).
+def _find_words_from(task):
+    cells, board_width, board_height, start_nodes = task
+    board = BoggleBoard(cells, board_width, board_height)
+    return BoggleSolver(board, worker_word_list()).find_words(start_nodes)
@@ -0,0 +1,215 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+# The longest key board_cache_key returns. Memcached allows keys of up to 250
+# characters, including the prefix and version that Django adds to each key.
+MAX_KEY_LENGTH = 200
+
+
+def board_cache_key(board, word_list_name, limits=None):
+    """
+    Get a cache key for the words found on a board.
+
+    Rotating or reflecting a board doesn't change which nodes are neighbors,
+    so all eight orientations of a board contain the same words (for a
+    rectangular board, four of them are turned on their side, swapping its
+    width and height). The key is built from whichever orientation sorts
+    first, so that every orientation of a board shares a single cache entry.
+    For large boards, where listing the cells would make the key longer than
+    MAX_KEY_LENGTH, the key holds a SHA-1 hash of the cells instead.
+
+    :param board: A BoggleBoard.
+    :param word_list_name: A string identifying the word list that the board is
+    solved against.
+    :param limits: An optional dict of the limits (as passed to BoggleSolver)
+    that the board is solved with; results found with different limits have
+    different keys.
+    :return: a string key, safe for use with any Django cache backend.
+    """
+    cells = board.cells
+    width, height, canonical = min(
+        (width, height, [cells[idx] for idx in permutation])
+        for width, height, permutation in _symmetries(
+            board.board_width, board.board_height
+        )
+    )
+    prefix = u'boggle:{}:'.format(word_list_name)
+    limits = sorted(
+        (name, limit) for name, limit in (limits or {}).items()
+        if limit is not None
+    )
+    if limits:
+        prefix += u','.join(
+            u'{}={}'.format(name, limit) for name, limit in limits
+        ) + u':'
+    cells = ','.join(canonical)
+    key = u'{}{}x{}:{}'.format(prefix, width, height, cells)
+    if len(key) > MAX_KEY_LENGTH:
+        key = u'{}{}x{}:sha1:{}'.format(
+            prefix, width, height,
+            hashlib.sha1(cells.encode('utf-8')).hexdigest()
+        )
+    return key
+
+
+class ResultCache(object):
+    """
+    An in-process cache of solver results, holding at most max_entries results
+    and evicting the least recently used when full.
+
+    Each process (e.g. each gunicorn worker) has its own ResultCache; see
+    DjangoResultCache for a cache that can be shared between processes.
+    """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Look up a cached result, marking it as the most recently used.
+
+        :param key: A key from board_cache_key.
+        :return: the cached result, or None if there isn't one.
+        """
+        with self._lock:
+            value = self._entries.pop(key, None)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries[key] = value
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """
+        Add a result to the cache, evicting the least recently used result if
+        the cache is full.
+
+        :param key: A key from board_cache_key.
+        :param value: The result to cache.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = value
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DjangoResultCache(object):
+    """
+    A cache of solver results stored in one of the caches configured in the
+    Django CACHES setting. With a shared backend such as memcached, every
+    process serving the app shares the same entries. Size limits and eviction
+    are left to the backend.
+
+    Hit and miss counts are kept per process.
+    """
+
+    def __init__(self, alias='default', timeout=None):
+        """
+        :param alias: The name of the cache in the CACHES setting.
+        :param timeout: How long, in seconds, to keep results; None keeps
+        them until the backend evicts them.
+        """
+        self.hits = 0
+        self.misses = 0
+        self._cache = caches[alias]
+        self._timeout = timeout
+
+    def get(self, key):
+        value = self._cache.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self._cache.set(key, value, self._timeout)
+
+
+def get_result_cache():
+    """
+    Create the result cache described by the project settings:
+
+        BOGGLE_RESULT_CACHE_ALIAS: the name of a Django cache to store results
+            in. If unset, results are cached in-process.
+        BOGGLE_RESULT_CACHE_SIZE: the number of results held by an in-process
+            cache (default 1024). Setting this to 0 disables caching.
+
+    :return: a ResultCache or DjangoResultCache, or None if caching is
+    disabled.
+    """
+    alias = getattr(settings, 'BOGGLE_RESULT_CACHE_ALIAS', None)
+    if alias:
+        return DjangoResultCache(alias)
+    size = getattr(settings, 'BOGGLE_RESULT_CACHE_SIZE', 1024)
+    if not size:
+        return None
+    return ResultCache(size)
+
+
+# The most symmetry tables kept at once; the least recently used table is
+# dropped when another board size is needed.
+MAX_SYMMETRY_TABLES = 64
+
+# Index permutations for the eight rotations and reflections of a board, keyed
+# by (board width, board height), in order of use.
+_symmetry_tables = OrderedDict()
+_symmetry_tables_lock = threading.Lock()
+
+
+# Get the list of (width, height, permutation) triples for boards of the given
+# size, building it on first use and keeping at most MAX_SYMMETRY_TABLES
+# tables. Each permutation lists, for each node of the transformed board (of
+# the given width and height), the node of the original board that moves
+# there.
+def _symmetries(board_width, board_height):
+    key = (board_width, board_height)
+    with _symmetry_tables_lock:
+        table = _symmetry_tables.pop(key, None)
+        if table is not None:
+            _symmetry_tables[key] = table
+            return table
+    last_row = board_height - 1
+    last_col = board_width - 1
+    # Each transform maps a (row, col) of the transformed board to a
+    # (row, col) of the original; the last four turn the board on its side
+    transforms = [
+        (False, lambda r, c: (r, c)),
+        (False, lambda r, c: (last_row - r, last_col - c)),
+        (False, lambda r, c: (r, last_col - c)),
+        (False, lambda r, c: (last_row - r, c)),
+        (True, lambda r, c: (c, last_col - r)),
+        (True, lambda r, c: (last_row - c, r)),
+        (True, lambda r, c: (c, r)),
+        (True, lambda r, c: (last_row - c, last_col - r)),
+    ]
+    table = []
+    for turned, transform in transforms:
+        width, height = board_width, board_height
+        if turned:
+            width, height = height, width
+        permutation = []
+        for row in range(0, height):
+            for col in range(0, width):
+                from_row, from_col = transform(row, col)
+                permutation.append(from_row * board_width + from_col)
+        table.append((width, height, permutation))
+    with _symmetry_tables_lock:
+        _symmetry_tables[key] = table
+        while len(_symmetry_tables) > MAX_SYMMETRY_TABLES:
+            _symmetry_tables.popitem(last=False)
+    return table
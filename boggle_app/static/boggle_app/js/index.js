@@ -1,18 +1,30 @@
+// Identifies this page to the server, so that solving a board after changing a
+// cell or two only searches the changed cells
+var editorToken = Math.random().toString(36).substring(2) + Date.now().toString(36);
+
+// Set once a cell has been edited by hand, and cleared when the board is
+// randomized. Only boards being edited are solved as an editor: the server
+// sends an editor its words all at once, rather than as each is found.
+var editing = false;
+
 function updateCell(cell_id) {
-    var letter = window.prompt("Enter a single letter.", "-");
+    var letter = window.prompt("Enter a letter, or a two-letter tile such as Qu.", "-");
     letter = scrubInput(letter)
     $(cell_id).text(letter)
+    editing = true;
 }
 
 function scrubInput(letter) {
     letter = letter.toUpperCase()
-    if (letter.length != 1) {
+    if (letter.length < 1 || letter.length > 2) {
         return "-";
     }
-    if (letter.charCodeAt(0) < "A".charCodeAt(0) || letter.charCodeAt(0) > "Z".charCodeAt(0)) {
-        return "-";
+    for (var idx = 0; idx < letter.length; idx++) {
+        if (letter.charCodeAt(idx) < "A".charCodeAt(0) || letter.charCodeAt(idx) > "Z".charCodeAt(0)) {
+            return "-";
+        }
     }
-    return letter;
+    return letter.charAt(0) + letter.substring(1).toLowerCase();
 }
 
 function randomize() {
@@ -21,30 +33,56 @@ function randomize() {
     }).each(function (cell) {
         $(this).text(randomChar());
     })
+    editing = false;
 }
 
 function solve() {
+    // Send the board as a list of rows, so that it needn't be square
     var letters = []
-    for (row=0; row<4; row++) {
-        for (col=0; col<4; col++) {
-            letters.push($("#board_cell_" + row + "_" + col).text())
+    var table = $("#board_table")
+    for (row=0; row<table.data('board_height'); row++) {
+        var cells = []
+        for (col=0; col<table.data('board_width'); col++) {
+            cells.push($("#board_cell_" + row + "_" + col).text())
         }
+        letters.push(cells)
+    }
+    // Ask for newline-delimited JSON, so that each word can be shown as soon
+    // as the server finds it.
+    var results = $("#results")
+    results.html("<P><B>Matching Words</B></P>");
+    var xhr = new XMLHttpRequest();
+    var shown = 0;
+    xhr.open("POST", $("#board_table").data('solve_url'));
+    xhr.setRequestHeader("Accept", "application/x-ndjson");
+    if (editing) {
+        xhr.setRequestHeader("X-Boggle-Editor", editorToken);
     }
-    $.ajax({
-        type: "POST",
-        url: $("#board_table").data('solve_url'),
-        data: JSON.stringify(letters),
-        dataType: "json"
-    }).done(function (words) {
-        console.log("Words: " + words);
-        var results = $("#results")
-        results.html("<P><B>Matching Words</B></P>");
-        for (idx in words) {
-            results.html("<P>" + results.html() + words[idx] + "</P>");
+    xhr.onprogress = function () {
+        shown = showWords(results, xhr.responseText, shown);
+    };
+    xhr.onload = function () {
+        if (xhr.status != 200) {
+            window.alert("Error: " + xhr.responseText);
+            return;
         }
-    }).fail(function (message) {
-        window.alert("Error: " + message.responseText);
-    });
+        showWords(results, xhr.responseText, shown);
+    };
+    xhr.send(JSON.stringify(letters));
+}
+
+// Add the complete lines of text after offset to the results, and return the
+// offset of the first line not yet shown.
+function showWords(results, text, offset) {
+    var end = text.lastIndexOf("\n") + 1;
+    if (end <= offset) {
+        return offset;
+    }
+    var lines = text.substring(offset, end - 1).split("\n");
+    for (idx in lines) {
+        results.append("<P>" + JSON.parse(lines[idx]) + "</P>");
+    }
+    return end;
 }
 
 function randomChar() {
@@ -2,11 +2,42 @@
 from __future__ import unicode_literals
 
 from ddt import ddt, data
+import json
+import os
+import random
+import shutil
 import string
+import tempfile
+import threading
+import time
 import unittest
+from datetime import date
 
-from boggle_solver import BoggleBoard
-from word_list import WordList
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.utils.six import StringIO
+
+import board_store
+from board_generator import (
+    STANDARD_DICE, BoardSearch, roll_board, score_word, score_words
+)
+from boggle_solver import (
+    BoggleBoard, BoggleSolver, IncrementalSolver, WordFinder, apply_limits,
+    boards_containing, encode_path, solve_each, solve_many
+)
+from bulk_solver import BulkSolver
+from editor_sessions import EditorSessions
+from metrics import InstrumentedWordList, SolveStats
+from models import SolvedBoard
+from parallel_solver import SolverPool
+import result_cache
+from result_cache import MAX_KEY_LENGTH, ResultCache, board_cache_key
+import views
+from word_list import (
+    EN_US_FILE, DawgWordList, WordList, WordListRegistry, open_word_list
+)
+
+en_us = open_word_list(EN_US_FILE)
 
 
 class FourByFourBoardTest(unittest.TestCase):
@@ -96,6 +127,120 @@ class FourByFourExcludeTest(FourByFourBoardTest):
             )
 
 
+class NeighborTableTest(unittest.TestCase):
+    def test_table_shared_by_width(self):
+        first = BoggleBoard(string.ascii_uppercase[0:9], 3)
+        second = BoggleBoard(string.ascii_uppercase[9:18], 3)
+        self.assertIs(first.neighbors, second.neighbors)
+
+    def test_three_by_three_table(self):
+        # A B C
+        # D E F
+        # G H I
+        board = BoggleBoard(string.ascii_uppercase[0:9], 3)
+        id_map = {v: i for i, v in board.get_nodes()}
+        self.assertEqual(
+            sorted(board.cells[n] for n in board.neighbors[id_map['a']]),
+            ['b', 'd', 'e']
+        )
+        self.assertEqual(len(board.neighbors[id_map['e']]), 8)
+
+    def test_rectangular_table(self):
+        # A B C
+        # D E F
+        board = BoggleBoard(string.ascii_uppercase[0:6], 3, 2)
+        id_map = {v: i for i, v in board.get_nodes()}
+        self.assertEqual(
+            sorted(board.cells[n] for n in board.neighbors[id_map['a']]),
+            ['b', 'd', 'e']
+        )
+        self.assertEqual(
+            sorted(board.cells[n] for n in board.neighbors[id_map['e']]),
+            ['a', 'b', 'c', 'd', 'f']
+        )
+        self.assertIsNot(
+            board.neighbors, BoggleBoard(string.ascii_uppercase[0:6], 2, 3)
+            .neighbors
+        )
+
+    def test_wrong_value_count(self):
+        with self.assertRaises(ValueError):
+            BoggleBoard(string.ascii_uppercase[0:6], 3)
+
+    def test_tables_bounded(self):
+        board = BoggleBoard('ABCD', 2)
+        for width in range(1, BoggleBoard.MAX_NEIGHBOR_TABLES + 2):
+            BoggleBoard(['A'] * width, width, 1)
+        self.assertEqual(
+            len(BoggleBoard._neighbor_tables), BoggleBoard.MAX_NEIGHBOR_TABLES
+        )
+        self.assertNotIn((2, 2), BoggleBoard._neighbor_tables)
+        self.assertEqual(BoggleBoard('ABCD', 2).neighbors, board.neighbors)
+
+
+@ddt
+class BoardValueTest(unittest.TestCase):
+    def test_values_normalized(self):
+        board = BoggleBoard([u'A', 'b'] + ['X'] * 14)
+        self.assertEqual(board.cells[0:3], ['a', 'b', 'x'])
+        self.assertTrue(all(type(cell) == str for cell in board.cells))
+
+    @data(
+        '1', ' ', 5, None, ['a'], '\xe9'
+    )
+    def test_invalid_value(self, value):
+        with self.assertRaises(ValueError):
+            BoggleBoard([value] + ['X'] * 15)
+
+
+@ddt
+class MultiLetterTileTest(unittest.TestCase):
+    # Qu I  T  E
+    # X  X  X  Th
+    # X  X  X  Er
+    # X  X  X  X
+    TILE_BOARD = ['Qu', 'I', 'T', 'E', 'X', 'X', 'X', 'Th', 'X', 'X', 'X', 'Er',
+                  'X', 'X', 'X', 'X']
+
+    @classmethod
+    def setUpClass(cls):
+        cls.word_list = WordList('boggle_app/word_lists/en.txt')
+
+    def test_tiles_stored_whole(self):
+        board = BoggleBoard(MultiLetterTileTest.TILE_BOARD)
+        self.assertEqual(board.cells[0:4], ['qu', 'i', 't', 'e'])
+        self.assertEqual(board.cells[7], 'th')
+
+    @data(
+        'quit', 'quite', 'tether', 'ether'
+    )
+    def test_words_through_tiles(self, word):
+        board = BoggleBoard(MultiLetterTileTest.TILE_BOARD)
+        words = BoggleSolver(board, MultiLetterTileTest.word_list).find_words()
+        self.assertIn(word, words)
+
+    def test_q_is_not_qu(self):
+        values = ['Q'] + MultiLetterTileTest.TILE_BOARD[1:]
+        board = BoggleBoard(values)
+        words = BoggleSolver(board, MultiLetterTileTest.word_list).find_words()
+        self.assertNotIn('quit', words)
+
+    @data(
+        'Que', '', 'Q1', '\xe9'
+    )
+    def test_invalid_tile(self, tile):
+        with self.assertRaises(ValueError):
+            BoggleBoard([tile] + MultiLetterTileTest.TILE_BOARD[1:])
+
+    def test_cache_keys_differ(self):
+        tiles = ['Qu', 'I'] + ['X'] * 14
+        letters = ['Q', 'Ui'] + ['X'] * 14
+        self.assertNotEqual(
+            board_cache_key(BoggleBoard(tiles), 'en'),
+            board_cache_key(BoggleBoard(letters), 'en')
+        )
+
+
 # To test:
 #   Invalid constructor arguments
 #   Exclude sets containing nodes that wouldn't be expected in the neighbor set
@@ -130,7 +275,7 @@ class WordListTest(unittest.TestCase):
         )
 
     @data(
-        'a', 'thi', 'yes', 'no', 'ecumenic'
+        'a', 'thi', 'yes', 'no', 'ecumenic', 'ff'
     )
     def test_expected_prefix(self, prefix):
         self.assertTrue(
@@ -139,10 +284,1594 @@ class WordListTest(unittest.TestCase):
         )
 
     @data(
-        'kzn', 'eee', 'crazycat'
+        'kzn', 'eee', 'crazycat', 'caf\xe9'
     )
     def test_missing_prefix(self, prefix):
         self.assertFalse(
             WordListTest.word_list.contains_prefix(prefix),
             "Unexpected prefix '{}' found in list".format(prefix)
         )
+
+
+@ddt
+class WordListCursorTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.word_list = WordList('boggle_app/word_lists/en.txt')
+
+    def _cursor_for(self, letters):
+        return WordListCursorTest.word_list.advance(
+            WordListCursorTest.word_list.root(), letters
+        )
+
+    @data(
+        'still', 'crazy', 'after', 'all', 'these', 'years'
+    )
+    def test_expected_word(self, word):
+        cursor = self._cursor_for(word)
+        self.assertIsNotNone(cursor)
+        self.assertTrue(WordListCursorTest.word_list.is_terminal(cursor))
+
+    @data(
+        'a', 'thi', 'yes', 'no', 'ecumenic', 'ff'
+    )
+    def test_expected_prefix(self, prefix):
+        cursor = self._cursor_for(prefix)
+        self.assertIsNotNone(cursor)
+        self.assertTrue(WordListCursorTest.word_list.has_children(cursor))
+
+    @data(
+        'kzn', 'qxz'
+    )
+    def test_missing_prefix(self, prefix):
+        self.assertIsNone(self._cursor_for(prefix))
+
+    def test_incremental_matches_whole_prefix(self):
+        word_list = WordListCursorTest.word_list
+        cursor = word_list.root()
+        for letter in 'ecumenic':
+            cursor = word_list.advance(cursor, letter)
+        self.assertEqual(cursor, self._cursor_for('ecumenic'))
+
+    def test_word_without_children(self):
+        cursor = self._cursor_for('ffa')
+        self.assertTrue(WordListCursorTest.word_list.is_terminal(cursor))
+        self.assertFalse(WordListCursorTest.word_list.has_children(cursor))
+        self.assertEqual(
+            WordListCursorTest.word_list.child_letters(cursor), 0
+        )
+
+    @data(
+        ('', 0), ('a', 1), ('thi', 3), ('ecumenic', 8), ('ffa', 3)
+    )
+    def test_depth(self, (prefix, depth)):
+        self.assertEqual(
+            WordListCursorTest.word_list.depth(self._cursor_for(prefix)), depth
+        )
+
+    def test_child_letters(self):
+        word_list = WordListCursorTest.word_list
+        # 'ff' is only continued by 'ffa'
+        self.assertEqual(
+            word_list.child_letters(self._cursor_for('ff')),
+            WordList.letter_mask('a')
+        )
+        mask = word_list.child_letters(self._cursor_for('th'))
+        for letter in 'aeiory':
+            self.assertTrue(mask & WordList.letter_mask(letter))
+        self.assertFalse(mask & WordList.letter_mask('q'))
+
+    def test_from_words_layout(self):
+        # Words of different lengths sharing prefixes, a non-letter child
+        # and an empty word, which makes the root a word
+        labels, first, terminal, child_letters = WordList.from_words(
+            ['', 'ab', 'ab-', 'abc', 'b', 'bca']
+        ).flat_trie()
+        # Nodes: '', a, b, ab, bc, ab-, abc, bca
+        self.assertEqual(labels, '\x00abbc-ca')
+        self.assertEqual(list(first), [1, 3, 4, 5, 7, 8, 8, 8, 8])
+        self.assertEqual(list(terminal), [1, 0, 1, 1, 0, 1, 1, 1])
+        self.assertEqual(list(child_letters), [
+            WordList.letter_mask('a') | WordList.letter_mask('b'),
+            WordList.letter_mask('b'),
+            WordList.letter_mask('c'),
+            WordList.letter_mask('-') | WordList.letter_mask('c'),
+            WordList.letter_mask('a'),
+            0, 0, 0
+        ])
+
+
+@ddt
+class CompiledWordListTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.compiled_dir = tempfile.mkdtemp()
+        cls.text_list = WordList('boggle_app/word_lists/en.txt')
+        compiled_file = os.path.join(cls.compiled_dir, 'en.trie')
+        cls.text_list.save(compiled_file)
+        cls.word_list = WordList.load(compiled_file)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.compiled_dir)
+
+    @data(
+        'still', 'crazy', 'after', 'all', 'these', 'years'
+    )
+    def test_expected_word(self, word):
+        self.assertTrue(CompiledWordListTest.word_list.contains_word(word))
+
+    @data(
+        'foob', 'grug', 'pubbawup', 'wattoom', 'gazork', 'spuzz'
+    )
+    def test_missing_word(self, word):
+        self.assertFalse(CompiledWordListTest.word_list.contains_word(word))
+
+    @data(
+        'a', 'thi', 'yes', 'no', 'ecumenic', 'ff', 'kzn', 'crazycat'
+    )
+    def test_same_cursors_as_text(self, prefix):
+        text_list = CompiledWordListTest.text_list
+        word_list = CompiledWordListTest.word_list
+        self.assertEqual(
+            word_list.advance(word_list.root(), prefix),
+            text_list.advance(text_list.root(), prefix)
+        )
+        self.assertEqual(
+            word_list.contains_prefix(prefix),
+            text_list.contains_prefix(prefix)
+        )
+        cursor = word_list.advance(word_list.root(), prefix)
+        if cursor is not None:
+            self.assertEqual(
+                word_list.child_letters(cursor),
+                text_list.child_letters(cursor)
+            )
+
+    def test_rejects_text_file(self):
+        with self.assertRaises(ValueError):
+            WordList.load('boggle_app/word_lists/en.txt')
+
+    def test_scrub_and_compile(self):
+        in_file = os.path.join(CompiledWordListTest.compiled_dir, 'raw.txt')
+        out_file = os.path.join(CompiledWordListTest.compiled_dir, 'raw.trie')
+        with open(in_file, 'w') as raw:
+            raw.write(b'Cat\ncaf\xc3\xa9\nox\ndog\ncat\n')
+        call_command(
+            'scrub_word_list', in_file, out_file, compile=True,
+            stdout=StringIO()
+        )
+        word_list = WordList.load(out_file)
+        self.assertTrue(word_list.contains_word('cat'))
+        self.assertTrue(word_list.contains_word('dog'))
+        self.assertFalse(word_list.contains_word('ox'))
+        self.assertFalse(word_list.contains_prefix('caf'))
+
+
+@ddt
+class DawgWordListTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.compiled_dir = tempfile.mkdtemp()
+        cls.text_list = WordList('boggle_app/word_lists/en.txt')
+        cls.dawg = DawgWordList.from_trie(cls.text_list)
+        compiled_file = os.path.join(cls.compiled_dir, 'en.dawg')
+        cls.dawg.save(compiled_file)
+        cls.word_lists = [cls.dawg, DawgWordList.load(compiled_file)]
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.compiled_dir)
+
+    def test_smaller_than_trie(self):
+        self.assertLess(
+            len(DawgWordListTest.dawg._terminal),
+            len(DawgWordListTest.text_list._terminal) / 4
+        )
+
+    @data(
+        'still', 'crazy', 'after', 'all', 'these', 'years'
+    )
+    def test_expected_word(self, word):
+        for word_list in DawgWordListTest.word_lists:
+            self.assertTrue(word_list.contains_word(word))
+
+    @data(
+        'foob', 'grug', 'pubbawup', 'wattoom', 'gazork', 'spuzz'
+    )
+    def test_missing_word(self, word):
+        for word_list in DawgWordListTest.word_lists:
+            self.assertFalse(word_list.contains_word(word))
+
+    @data(
+        'a', 'thi', 'yes', 'no', 'ecumenic', 'ff', 'ffa', 'kzn', 'crazycat',
+        'caf\xe9', 'ing', 'shortness'
+    )
+    def test_same_answers_as_trie(self, prefix):
+        text_list = DawgWordListTest.text_list
+        text_cursor = text_list.advance(text_list.root(), str(
+            prefix.encode('utf-8')))
+        for word_list in DawgWordListTest.word_lists:
+            self.assertEqual(
+                word_list.contains_word(prefix),
+                text_list.contains_word(prefix)
+            )
+            self.assertEqual(
+                word_list.contains_prefix(prefix),
+                text_list.contains_prefix(prefix)
+            )
+            cursor = word_list.advance(word_list.root(), str(
+                prefix.encode('utf-8')))
+            self.assertEqual(cursor is None, text_cursor is None)
+            if cursor is not None:
+                self.assertEqual(
+                    word_list.child_letters(cursor),
+                    text_list.child_letters(text_cursor)
+                )
+
+    def test_solve(self):
+        board = BoggleBoard('SERATLINEOSTARETNILEAROST', 5)
+        self.assertEqual(
+            set(BoggleSolver(board, DawgWordListTest.dawg).find_words()),
+            set(BoggleSolver(board, DawgWordListTest.text_list).find_words())
+        )
+
+    def test_rejects_trie_file(self):
+        trie_file = os.path.join(DawgWordListTest.compiled_dir, 'en.trie')
+        DawgWordListTest.text_list.save(trie_file)
+        with self.assertRaises(ValueError):
+            DawgWordList.load(trie_file)
+
+    def test_scrub_and_compile(self):
+        in_file = os.path.join(DawgWordListTest.compiled_dir, 'raw.txt')
+        out_file = os.path.join(DawgWordListTest.compiled_dir, 'raw.dawg')
+        with open(in_file, 'w') as raw:
+            raw.write(b'Cat\ncats\nrats\nox\nrat\n')
+        call_command(
+            'scrub_word_list', in_file, out_file, compile=True,
+            backend='dawg', stdout=StringIO()
+        )
+        word_list = DawgWordList.load(out_file)
+        self.assertTrue(word_list.contains_word('rats'))
+        self.assertTrue(word_list.contains_prefix('ca'))
+        self.assertFalse(word_list.contains_word('ox'))
+        self.assertEqual(
+            word_list.advance(word_list.root(), 'ca'),
+            word_list.advance(word_list.root(), 'ra')
+        )
+
+
+class ScrubWordListTest(unittest.TestCase):
+    RAW_WORDS = (b'Zebra\ncat\n  Dog \r\ncaf\xc3\xa9\nox\nabcdefghijklmnopq\n'
+                 b'two words\ncat\nCAT\nbee\nyak')
+
+    def setUp(self):
+        self.word_dir = tempfile.mkdtemp()
+        self.in_file = os.path.join(self.word_dir, 'raw.txt')
+        self.out_file = os.path.join(self.word_dir, 'scrubbed.txt')
+        with open(self.in_file, 'wb') as raw:
+            raw.write(ScrubWordListTest.RAW_WORDS)
+
+    def tearDown(self):
+        shutil.rmtree(self.word_dir)
+
+    def _scrub(self, **options):
+        call_command(
+            'scrub_word_list', self.in_file, self.out_file, stdout=StringIO(),
+            **options
+        )
+        with open(self.out_file, 'rb') as scrubbed:
+            return scrubbed.read().splitlines()
+
+    def test_sorted_and_deduplicated(self):
+        self.assertEqual(
+            self._scrub(processes=1),
+            [b'bee', b'cat', b'dog', b'yak', b'zebra']
+        )
+
+    def test_chunks_runs_and_processes(self):
+        # Small chunks and runs, so that lines are split between chunks and
+        # the runs are merged from temporary files
+        self.assertEqual(
+            self._scrub(processes=2, chunk_size=5, max_words=2),
+            [b'bee', b'cat', b'dog', b'yak', b'zebra']
+        )
+
+
+class WordListRegistryTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.word_dir = tempfile.mkdtemp()
+        cls.word_files = {}
+        for name, words in [('cats', 'cat\ncats\n'), ('dogs', 'dog\ndogs\n'),
+                            ('owls', 'owl\nowls\n')]:
+            cls.word_files[name] = os.path.join(cls.word_dir, name + '.txt')
+            with open(cls.word_files[name], 'w') as word_file:
+                word_file.write(words)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.word_dir)
+
+    def test_loads_lazily(self):
+        registry = WordListRegistry(WordListRegistryTest.word_files)
+        self.assertEqual(registry.names(), ['cats', 'dogs', 'owls'])
+        self.assertEqual(registry.loaded(), [])
+        self.assertTrue(registry.get('dogs').contains_word('dog'))
+        self.assertFalse(registry.get('dogs').contains_word('cat'))
+        self.assertEqual(registry.loaded(), ['dogs'])
+        self.assertIs(registry.get('dogs'), registry.get('dogs'))
+
+    def test_evicts_least_recently_used(self):
+        registry = WordListRegistry(WordListRegistryTest.word_files, 2)
+        cats = registry.get('cats')
+        registry.get('dogs')
+        self.assertIs(registry.get('cats'), cats)
+        registry.get('owls')
+        self.assertEqual(registry.loaded(), ['cats', 'owls'])
+        self.assertIs(registry.get('cats'), cats)
+        self.assertTrue(registry.get('dogs').contains_word('dogs'))
+        self.assertEqual(registry.loaded(), ['cats', 'dogs'])
+
+    def test_unknown_list(self):
+        registry = WordListRegistry(WordListRegistryTest.word_files)
+        with self.assertRaises(ValueError):
+            registry.get('en')
+
+    def test_concurrent_gets_load_once(self):
+        registry = WordListRegistry(WordListRegistryTest.word_files)
+        word_lists = []
+        threads = [
+            threading.Thread(
+                target=lambda: word_lists.append(registry.get('cats'))
+            )
+            for _ in range(0, 4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(word_lists), 4)
+        for word_list in word_lists:
+            self.assertIs(word_list, word_lists[0])
+
+    def test_backend(self):
+        registry = WordListRegistry(
+            WordListRegistryTest.word_files, backend='dawg'
+        )
+        self.assertIsInstance(registry.get('cats'), DawgWordList)
+        self.assertTrue(registry.get('cats').contains_word('cats'))
+
+
+@ddt
+class BoggleSolverTest(unittest.TestCase):
+    # S T I L
+    # X X X L
+    # X X X X
+    # X X X X
+    STILL_BOARD = 'STILXXXLXXXXXXXX'
+
+    @classmethod
+    def setUpClass(cls):
+        cls.word_list = WordList('boggle_app/word_lists/en.txt')
+
+    def _solve(self, values, board_width=4):
+        return BoggleSolver(
+            BoggleBoard(values, board_width), BoggleSolverTest.word_list
+        ).find_words()
+
+    def test_finds_word(self):
+        self.assertIn('still', self._solve(BoggleSolverTest.STILL_BOARD))
+
+    def test_words_sorted_by_length(self):
+        words = self._solve(BoggleSolverTest.STILL_BOARD)
+        lengths = [len(w) for w in words]
+        self.assertEqual(lengths, sorted(lengths, reverse=True))
+
+    def test_no_repeated_nodes(self):
+        # 'sis' would need to revisit the single 'S' node
+        self.assertNotIn('sis', self._solve('SIXXXXXXX', 3))
+
+    def test_word_with_single_completion(self):
+        # 'ff' is not a word, and 'ffa' is the only word beginning with it
+        self.assertIn('ffa', self._solve('FFAXXXXXX', 3))
+
+    def test_rectangular_board(self):
+        # S T I L L
+        # X X X X X
+        board = BoggleBoard('STILLXXXXX', 5, 2)
+        self.assertIn(
+            'still', BoggleSolver(board, BoggleSolverTest.word_list)
+            .find_words()
+        )
+
+    def test_path_longer_than_recursion_limit(self):
+        # A single row spelling a word longer than the recursion limit
+        word = 'b' + 'a' * 1499
+        board = BoggleBoard(list(word), len(word), 1)
+        self.assertEqual(
+            BoggleSolver(board, WordList.from_words([word])).find_words(),
+            [word]
+        )
+
+    def test_longest(self):
+        board = BoggleBoard(string.ascii_uppercase[0:25], 5)
+        words = BoggleSolver(board, BoggleSolverTest.word_list).find_words()
+        solver = BoggleSolver(board, BoggleSolverTest.word_list, longest=3)
+        longest = solver.find_words()
+        self.assertEqual(
+            [len(w) for w in longest], [len(w) for w in words[0:3]]
+        )
+        self.assertTrue(set(longest) <= set(words))
+        self.assertEqual(len(solver.matches), 3)
+        self.assertTrue(solver.complete)
+
+    def test_longest_reused_solver(self):
+        solver = BoggleSolver(
+            BoggleBoard(FindPathsTest.BOARD), BoggleSolverTest.word_list,
+            longest=5
+        )
+        longest = solver.find_words()
+        self.assertEqual(len(longest), 5)
+        self.assertEqual(solver.find_words(), longest)
+        self.assertEqual(len(solver.matches), 5)
+        self.assertEqual(set(solver.find_paths()), set(longest))
+
+    def test_length_limits(self):
+        words = BoggleSolver(
+            BoggleBoard(BoggleSolverTest.STILL_BOARD),
+            BoggleSolverTest.word_list, min_length=4, max_length=4
+        ).find_words()
+        self.assertIn('till', words)
+        self.assertNotIn('still', words)
+        self.assertNotIn('its', words)
+
+    def test_max_words(self):
+        solver = BoggleSolver(
+            BoggleBoard(BoggleSolverTest.STILL_BOARD),
+            BoggleSolverTest.word_list, max_words=2
+        )
+        self.assertEqual(len(solver.find_words()), 2)
+        self.assertTrue(solver.limit_reached)
+        self.assertFalse(solver.complete)
+
+    def test_max_steps(self):
+        solver = BoggleSolver(
+            BoggleBoard(string.ascii_uppercase[0:25], 5),
+            BoggleSolverTest.word_list, max_steps=10
+        )
+        solver.find_words()
+        self.assertTrue(solver.limit_reached)
+        self.assertFalse(solver.complete)
+
+    @data(0, -1, 2.5, '3')
+    def test_invalid_limit(self, limit):
+        with self.assertRaises(ValueError):
+            BoggleSolver(
+                BoggleBoard(BoggleSolverTest.STILL_BOARD),
+                BoggleSolverTest.word_list, longest=limit
+            )
+
+    def test_iter_words_matches_find_words(self):
+        board = BoggleBoard(string.ascii_uppercase[0:25], 5)
+        words = list(
+            BoggleSolver(board, BoggleSolverTest.word_list).iter_words()
+        )
+        self.assertEqual(len(words), len(set(words)))
+        self.assertEqual(
+            set(words),
+            set(BoggleSolver(board, BoggleSolverTest.word_list).find_words())
+        )
+
+    def test_complete(self):
+        solver = BoggleSolver(
+            BoggleBoard(BoggleSolverTest.STILL_BOARD),
+            BoggleSolverTest.word_list, time.time() + 60
+        )
+        solver.find_words()
+        self.assertTrue(solver.complete)
+
+    def test_deadline_passed(self):
+        solver = BoggleSolver(
+            BoggleBoard(BoggleSolverTest.STILL_BOARD),
+            BoggleSolverTest.word_list, time.time() - 1
+        )
+        self.assertEqual(solver.find_words(), [])
+        self.assertFalse(solver.complete)
+
+    def test_cancel(self):
+        solver = BoggleSolver(
+            BoggleBoard('SERATLINEOSTARETNILEAROST', 5),
+            BoggleSolverTest.word_list
+        )
+        words = solver.iter_words()
+        next(words)
+        solver.cancel()
+        self.assertEqual(len(list(words)) + 1, len(solver.matches))
+        self.assertFalse(solver.complete)
+
+    def test_start_nodes(self):
+        # Only 'still' starts from the 'S' node
+        words = BoggleSolver(
+            BoggleBoard(BoggleSolverTest.STILL_BOARD),
+            BoggleSolverTest.word_list
+        ).find_words([0])
+        self.assertIn('still', words)
+        self.assertNotIn('til', words)
+
+    def test_reused_solver(self):
+        solver = BoggleSolver(
+            BoggleBoard(BoggleSolverTest.STILL_BOARD),
+            BoggleSolverTest.word_list
+        )
+        words = solver.find_words()
+        self.assertEqual(solver.find_words([0]), ['still'])
+        self.assertEqual(solver.find_words(), words)
+
+
+class FindPathsTest(unittest.TestCase):
+    BOARD = 'SERSPATGLINESERS'
+
+    @classmethod
+    def setUpClass(cls):
+        cls.board = BoggleBoard(FindPathsTest.BOARD)
+
+    def _spells(self, word, path):
+        board = FindPathsTest.board
+        self.assertEqual(len(set(path)), len(path))
+        for first, second in zip(path, path[1:]):
+            self.assertIn(second, board.neighbors[first])
+        self.assertEqual(''.join(board.cells[n] for n in path).lower(), word)
+
+    def test_paths_spell_words(self):
+        paths = BoggleSolver(FindPathsTest.board, en_us).find_paths()
+        self.assertEqual(
+            set(paths),
+            set(BoggleSolver(FindPathsTest.board, en_us).find_words())
+        )
+        for word, word_paths in paths.items():
+            self.assertEqual(len(word_paths), 1)
+            self._spells(word, word_paths[0])
+
+    def test_paths_after_words(self):
+        solver = BoggleSolver(FindPathsTest.board, en_us)
+        words = solver.find_words()
+        self.assertEqual(set(solver.find_paths()), set(words))
+        self.assertEqual(set(solver.find_paths(True)), set(words))
+
+    def test_all_paths(self):
+        paths = BoggleSolver(FindPathsTest.board, en_us).find_paths(True)
+        for word, word_paths in paths.items():
+            self.assertEqual(len(set(map(tuple, word_paths))), len(word_paths))
+            for path in word_paths:
+                self._spells(word, path)
+        # Every path the incremental solver tracks is found
+        self.assertEqual(
+            sum(len(word_paths) for word_paths in paths.values()),
+            sum(IncrementalSolver(
+                FindPathsTest.board, en_us
+            )._path_counts.values())
+        )
+
+    def test_repeated_letters(self):
+        # Most steps back from a word's last node have a choice of cells
+        board = BoggleBoard('SEESESSEESSEESES')
+        solver = BoggleSolver(board, en_us)
+        words = solver.find_words()
+        for all_paths in (False, True):
+            paths = solver.find_paths(all_paths)
+            self.assertEqual(set(paths), set(words))
+            for word, word_paths in paths.items():
+                self.assertTrue(word_paths)
+                for path in word_paths:
+                    self.assertEqual(len(set(path)), len(path))
+                    for first, second in zip(path, path[1:]):
+                        self.assertIn(second, board.neighbors[first])
+                    self.assertEqual(
+                        ''.join(board.cells[n] for n in path), word
+                    )
+
+    def test_multi_letter_tiles(self):
+        # Qu E X
+        # N  E X
+        # X  X X
+        board = BoggleBoard(['qu', 'e', 'x', 'n', 'e', 'x', 'x', 'x', 'x'], 3)
+        paths = BoggleSolver(board, en_us).find_paths(True)
+        self.assertEqual(
+            sorted(paths['queen']), [[0, 1, 4, 3], [0, 4, 1, 3]]
+        )
+
+    def test_encode_path(self):
+        self.assertEqual(encode_path([0, 1, 15], 16), '00010f')
+        self.assertEqual(encode_path([0, 300], 400), '0000012c')
+
+
+class WordFinderTest(unittest.TestCase):
+    # Qu E S T
+    # N  I L L
+    # X  X X X
+    # X  X X X
+    BOARD = ['Qu', 'E', 'S', 'T', 'N', 'I', 'L', 'L'] + ['X'] * 8
+
+    @classmethod
+    def setUpClass(cls):
+        cls.finder = WordFinder(BoggleBoard(WordFinderTest.BOARD))
+
+    def test_finds_solver_words(self):
+        board = BoggleBoard(string.ascii_uppercase[0:25], 5)
+        finder = WordFinder(board)
+        for word in BoggleSolver(board, en_us).find_words():
+            path = finder.find_path(word)
+            self.assertEqual(''.join(board.cells[n] for n in path), word)
+            self.assertEqual(len(set(path)), len(path))
+            for first, second in zip(path, path[1:]):
+                self.assertIn(second, board.neighbors[first])
+
+    def test_missing_words(self):
+        finder = WordFinderTest.finder
+        self.assertFalse(finder.contains_word('stills'))
+        # 'still' needs a 'T' next to the 'I'
+        self.assertFalse(finder.contains_word('still'))
+        # The 'Qu' tile can't be used as a plain 'Q'
+        self.assertFalse(finder.contains_word('qest'))
+        self.assertFalse(finder.contains_word(''))
+
+    def test_multi_letter_tiles(self):
+        self.assertEqual(WordFinderTest.finder.find_path('QUEST'), [0, 1, 2, 3])
+
+    def test_find_present(self):
+        self.assertEqual(
+            WordFinderTest.finder.find_present(
+                ['lilt', 'Quest', 'quest', 'still', 'lie', 'nil']
+            ),
+            ['quest', 'lie', 'nil']
+        )
+
+    def test_find_present_in_word_list(self):
+        word_list = WordList.from_words(['quest', 'nil'])
+        self.assertEqual(
+            WordFinderTest.finder.find_present(
+                ['quest', 'lilt', 'nil', 'lin'], word_list
+            ),
+            ['quest', 'nil']
+        )
+
+    def test_boards_containing(self):
+        self.assertEqual(
+            boards_containing('still', [
+                'STILXXXLXXXXXXXX', 'XXXXXXXXXXXXXXXX', 'XXXXSTILXXXLXXXX'
+            ]),
+            [0, 2]
+        )
+
+
+class SolveManyTest(unittest.TestCase):
+    BOARDS = [
+        'STILXXXLXXXXXXXX',
+        'FFAXXXXXXXXXXXXX',
+        'STILXXXLXXXXXXXX',
+    ]
+
+    @classmethod
+    def setUpClass(cls):
+        cls.word_list = WordList('boggle_app/word_lists/en.txt')
+
+    def test_matches_single_solves(self):
+        results = solve_many(
+            [list(b) for b in SolveManyTest.BOARDS], SolveManyTest.word_list
+        )
+        self.assertEqual(len(results), len(SolveManyTest.BOARDS))
+        for values, words in zip(SolveManyTest.BOARDS, results):
+            self.assertEqual(words, BoggleSolver(
+                BoggleBoard(values), SolveManyTest.word_list
+            ).find_words())
+
+    def test_invalid_board_identified(self):
+        with self.assertRaisesRegexp(ValueError, 'Board 1'):
+            solve_many(['STILXXXLXXXXXXXX', 'ST'], SolveManyTest.word_list)
+
+    def test_deadline_passed(self):
+        self.assertEqual(
+            solve_many(SolveManyTest.BOARDS, SolveManyTest.word_list,
+                       deadline=time.time() - 1),
+            [None, None, None]
+        )
+
+    def test_requires_list(self):
+        with self.assertRaises(ValueError):
+            solve_many('STILXXXLXXXXXXXX', SolveManyTest.word_list)
+
+    def test_solve_each_limits(self):
+        results = solve_each(
+            SolveManyTest.BOARDS, SolveManyTest.word_list,
+            limits={'max_words': 5}
+        )
+        self.assertEqual([len(words) for words, _ in results], [5, 4, 5])
+        self.assertEqual([complete for _, complete in results],
+                         [False, True, False])
+
+    def test_apply_limits(self):
+        words = ['stills', 'still', 'stilt', 'tills', 'sit']
+        self.assertEqual(apply_limits(words, {}), (words, False))
+        self.assertEqual(
+            apply_limits(words, {'min_length': 4, 'max_length': 5}),
+            (['still', 'stilt', 'tills'], False)
+        )
+        self.assertEqual(
+            apply_limits(words, {'longest': 2}), (['stills', 'still'], False)
+        )
+        self.assertEqual(
+            apply_limits(words, {'max_words': 2}), (['stills', 'still'], True)
+        )
+        self.assertEqual(apply_limits(words, {'max_words': 5}), (words, False))
+
+
+class SolveBatchViewTest(unittest.TestCase):
+    def setUp(self):
+        self.client = Client()
+
+    def _post(self, boards):
+        return self.client.post(
+            '/boggle/solve_batch', json.dumps(boards),
+            content_type='application/json'
+        )
+
+    def test_results_in_order(self):
+        response = self._post(
+            [list('FFAXXXXXXXXXXXXX'), list('QQQQQQQQQQQQQQQQ')]
+        )
+        self.assertEqual(response.status_code, 200)
+        results = json.loads(response.content)
+        self.assertIn('ffa', results[0])
+        self.assertEqual(results[1], [])
+
+    def test_board_sizes(self):
+        # A 5x5 board, a 3x2 board given as rows, and the 4x4 board again
+        boards = [
+            list('STILXXXXLXXXXXXXXXXXXXXXX'),
+            [list('STI'), list('XLL')],
+            list('STILXXXLXXXXXXXX'),
+        ]
+        response = self._post(boards)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content), [
+            BoggleSolver(BoggleBoard(boards[0], 5), en_us).find_words(),
+            BoggleSolver(BoggleBoard('STIXLL', 3, 2), en_us).find_words(),
+            BoggleSolver(BoggleBoard(boards[2]), en_us).find_words(),
+        ])
+
+    def test_limits(self):
+        with override_settings(BOGGLE_SOLVE_LIMITS={'max_words': 3}):
+            response = self._post([list('STILXXXLXXXXXXXX')])
+        self.assertEqual(len(json.loads(response.content)[0]), 3)
+        self.assertEqual(response['X-Boggle-Partial'], 'true')
+        response = self._post([list('STILXXXLXXXXXXXX')])
+        self.assertFalse(response.has_header('X-Boggle-Partial'))
+
+    def test_board_too_large(self):
+        with override_settings(BOGGLE_MAX_BOARD_SIZE=5):
+            self.assertEqual(self._post([[['A'] * 5] * 5]).status_code, 200)
+            self.assertEqual(self._post([[['A'] * 6]]).status_code, 400)
+            self.assertEqual(self._post([[['A']] * 6]).status_code, 400)
+            self.assertEqual(self._post([['A'] * 36]).status_code, 400)
+
+    def test_invalid_board(self):
+        self.assertEqual(self._post([['A', 'B']]).status_code, 400)
+        self.assertEqual(self._post([[['A', 'B'], ['C']]]).status_code, 400)
+        self.assertEqual(self._post({'board': ['A']}).status_code, 400)
+
+
+class CheckWordsViewTest(unittest.TestCase):
+    def setUp(self):
+        self.client = Client()
+
+    def _post(self, body):
+        return self.client.post(
+            '/boggle/check', json.dumps(body), content_type='application/json'
+        )
+
+    def test_words_present(self):
+        response = self._post({
+            'board': list('STILXXXLXXXXXXXX'),
+            'words': ['still', 'STILT', 'its', 'silt'],
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content), ['still', 'its'])
+
+    def test_invalid_request(self):
+        self.assertEqual(self._post(['still']).status_code, 400)
+        self.assertEqual(self._post({
+            'board': list('STILXXXLXXXXXXXX'), 'words': 'still'
+        }).status_code, 400)
+        self.assertEqual(self._post({
+            'board': ['S', 'T'], 'words': ['still']
+        }).status_code, 400)
+        self.assertEqual(self._post({
+            'board': ['S1'], 'words': ['still']
+        }).status_code, 400)
+
+
+class SolverPoolTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.word_list = WordList('boggle_app/word_lists/en.txt')
+        cls.pool = SolverPool(processes=2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.close()
+
+    def test_single_board_matches_solver(self):
+        board = BoggleBoard(string.ascii_uppercase[0:25], 5)
+        expected = BoggleSolver(board, SolverPoolTest.word_list).find_words()
+        words = SolverPoolTest.pool.find_words(board)
+        self.assertEqual(set(words), set(expected))
+        self.assertEqual(
+            [len(w) for w in words], [len(w) for w in expected]
+        )
+
+    def test_batch_matches_solve_many(self):
+        boards = ['STILXXXLXXXXXXXX', 'FFAXXXXXXXXXXXXX', 'STILXXXLXXXXXXXX']
+        expected = solve_many(boards, SolverPoolTest.word_list)
+        results = SolverPoolTest.pool.solve_many(boards)
+        self.assertEqual(
+            [set(words) for words in results],
+            [set(words) for words in expected]
+        )
+
+    def test_invalid_board_identified(self):
+        with self.assertRaisesRegexp(ValueError, 'Board 1'):
+            SolverPoolTest.pool.solve_many(['STILXXXLXXXXXXXX', 'ST'])
+
+
+class BulkSolverTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.word_list = WordList('boggle_app/word_lists/en.txt')
+        # A small chunk size, so that batches span several chunks
+        cls.solver = BulkSolver(cls.word_list, chunk_size=7)
+
+    def _check(self, boards, board_width, board_height=None):
+        expected = solve_many(
+            boards, BulkSolverTest.word_list, board_width,
+            board_height=board_height
+        )
+        results = BulkSolverTest.solver.find_words(
+            boards, board_width, board_height
+        )
+        self.assertEqual(
+            [set(words) for words in results],
+            [set(words) for words in expected]
+        )
+        self.assertEqual(
+            [[len(w) for w in words] for words in results],
+            [[len(w) for w in words] for words in expected]
+        )
+        self.assertEqual(
+            BulkSolverTest.solver.count_words(
+                boards, board_width, board_height
+            ),
+            [len(words) for words in expected]
+        )
+
+    def test_random_boards_match_solver(self):
+        rng = random.Random(0)
+        boards = [
+            [rng.choice(string.ascii_lowercase) for _ in range(16)]
+            for _ in range(20)
+        ]
+        self._check(boards, 4)
+
+    def test_rectangular_boards(self):
+        rng = random.Random(1)
+        boards = [[rng.choice('aeilnorst') for _ in range(15)]
+                  for _ in range(10)]
+        self._check(boards, 5, 3)
+
+    def test_multi_letter_tiles(self):
+        self._check([
+            ['Qu', 'I', 'T', 'E', 'X', 'X', 'X', 'Th', 'X', 'X', 'E', 'N',
+             'X', 'X', 'X', 'X'],
+            'STILXXXLXXXXXXXX',
+        ], 4)
+
+    def test_invalid_board_identified(self):
+        with self.assertRaisesRegexp(ValueError, 'Board 1'):
+            BulkSolverTest.solver.count_words(['STILXXXLXXXXXXXX', 'ST'])
+
+    def test_too_many_cells(self):
+        with self.assertRaises(ValueError):
+            BulkSolverTest.solver.count_words(['X' * 81], 9)
+
+    def test_rejects_dawg(self):
+        with self.assertRaises(ValueError):
+            BulkSolver(DawgWordList.from_words(['still']))
+
+
+class IncrementalSolverTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.word_list = WordList('boggle_app/word_lists/en.txt')
+
+    def _full_solve(self, board):
+        return set(BoggleSolver(
+            BoggleBoard(board.cells, board.board_width),
+            IncrementalSolverTest.word_list
+        ).find_words())
+
+    def test_initial_words_match_solver(self):
+        board = BoggleBoard('SERATLINEOSTARETNILEAROST', 5)
+        solver = IncrementalSolver(board, IncrementalSolverTest.word_list)
+        self.assertEqual(set(solver.words()), self._full_solve(board))
+
+    def test_changes_match_full_solve(self):
+        rng = random.Random(0)
+        solver = IncrementalSolver(
+            BoggleBoard('SERSPATGLINESERS'), IncrementalSolverTest.word_list
+        )
+        for _ in range(50):
+            before = set(solver.words())
+            added, removed = solver.set_cell(
+                rng.randrange(16), rng.choice(['e', 's', 't', 'qu', 'z'])
+            )
+            after = self._full_solve(solver.board)
+            self.assertEqual(set(solver.words()), after)
+            self.assertEqual(added, after - before)
+            self.assertEqual(removed, before - after)
+
+    def test_added_and_removed(self):
+        # S T I L      S T I L      S T I L
+        # X X X L  ->  X X X Q  ->  X X L Q
+        # X X X X      X X X X      X X X X
+        # X X X X      X X X X      X X X X
+        solver = IncrementalSolver(
+            BoggleBoard('STILXXXLXXXXXXXX'), IncrementalSolverTest.word_list
+        )
+        self.assertIn('still', solver.words())
+        added, removed = solver.set_cell(7, 'Q')
+        self.assertIn('still', removed)
+        added, removed = solver.set_cell(6, 'L')
+        self.assertIn('still', added)
+
+    def test_change_visits_paths_through_cell(self):
+        solver = IncrementalSolver(
+            BoggleBoard('SERSPATGLINESERS'), IncrementalSolverTest.word_list
+        )
+        # Few enough paths use the corner that the index isn't rebuilt
+        through = sum(
+            1 for paths in solver._ends for path in paths if path[1] & 1
+        )
+        self.assertLess(through, solver._recorded / 2)
+        solver.set_cell(0, 'e')
+        self.assertEqual(solver._dropped, through)
+
+    def test_invalid_value(self):
+        solver = IncrementalSolver(
+            BoggleBoard('STILXXXLXXXXXXXX'), IncrementalSolverTest.word_list
+        )
+        with self.assertRaises(ValueError):
+            solver.set_cell(0, '1')
+
+    def test_deadline(self):
+        solver = IncrementalSolver(
+            BoggleBoard('SERATLINEOSTARETNILEAROST', 5),
+            IncrementalSolverTest.word_list, time.time() - 1
+        )
+        self.assertFalse(solver.complete)
+
+
+class EditorSessionsTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.word_list = WordList('boggle_app/word_lists/en.txt')
+
+    def _solve(self, sessions, token, values, name='en', deadline=None):
+        return sessions.solve(
+            token, BoggleBoard(values), name, EditorSessionsTest.word_list,
+            deadline
+        )
+
+    def test_incremental_after_small_change(self):
+        sessions = EditorSessions()
+        words, incremental, complete = self._solve(
+            sessions, 'a', 'STILXXXLXXXXXXXX'
+        )
+        self.assertFalse(incremental)
+        words, incremental, complete = self._solve(
+            sessions, 'a', 'STALXXXLXXXXXXXX'
+        )
+        self.assertTrue(incremental)
+        self.assertTrue(complete)
+        self.assertIn('stall', words)
+        self.assertNotIn('still', words)
+
+    def test_full_solve_after_large_change(self):
+        sessions = EditorSessions()
+        self._solve(sessions, 'a', 'STILXXXLXXXXXXXX')
+        words, incremental, _ = self._solve(sessions, 'a', 'STALXXXLXXXXXQQQ')
+        self.assertFalse(incremental)
+        words, incremental, _ = self._solve(
+            sessions, 'a', 'STALXXXLXXXXXQQQ', 'other'
+        )
+        self.assertFalse(incremental)
+
+    def test_clients_kept_apart(self):
+        sessions = EditorSessions(max_sessions=1)
+        self._solve(sessions, 'a', 'STILXXXLXXXXXXXX')
+        self._solve(sessions, 'b', 'STILXXXLXXXXXXXX')
+        self.assertEqual(len(sessions), 1)
+        _, incremental, _ = self._solve(sessions, 'a', 'STILXXXLXXXXXXXX')
+        self.assertFalse(incremental)
+
+    def test_incomplete_solve_not_kept(self):
+        sessions = EditorSessions()
+        _, _, complete = self._solve(
+            sessions, 'a', 'STILXXXLXXXXXXXX', deadline=time.time() - 1
+        )
+        self.assertFalse(complete)
+        self.assertEqual(len(sessions), 0)
+
+
+@ddt
+class ScoringTest(unittest.TestCase):
+    @data(
+        ('cat', 1), ('cats', 1), ('stile', 2), ('stiles', 3), ('station', 5),
+        ('stations', 11), ('stationary', 11), ('quit', 1)
+    )
+    def test_score_word(self, (word, points)):
+        self.assertEqual(score_word(word), points)
+
+    def test_score_words(self):
+        self.assertEqual(score_words(['cat', 'stile', 'stations']), 14)
+
+    def test_roll_uses_each_die_once(self):
+        dice, values = roll_board(random.Random(0))
+        self.assertEqual(sorted(dice), list(range(16)))
+        for die, value in zip(dice, values):
+            self.assertIn(value, STANDARD_DICE[die])
+        BoggleBoard(values)
+
+
+class BoardSearchTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.word_list = WordList('boggle_app/word_lists/en.txt')
+
+    def test_search_improves_on_start(self):
+        word_list = BoardSearchTest.word_list
+        start = roll_board(random.Random(1))[1]
+        start_score = score_words(
+            BoggleSolver(BoggleBoard(start), word_list).find_words()
+        )
+        result = BoardSearch(word_list, rng=random.Random(1)).run(100)
+        self.assertGreater(result['score'], start_score)
+        words = BoggleSolver(
+            BoggleBoard(result['board']), word_list
+        ).find_words()
+        self.assertEqual(set(result['words']), set(words))
+        self.assertEqual(result['score'], score_words(words))
+        self.assertEqual(result['word_count'], len(words))
+
+    def test_unknown_objective(self):
+        with self.assertRaises(ValueError):
+            BoardSearch(BoardSearchTest.word_list, objective='fun')
+
+    def test_generate_boards(self):
+        out = StringIO()
+        call_command(
+            'generate_boards', count=2, seed=0, search=True, iterations=10,
+            processes=1, stdout=out
+        )
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertRegexpMatches(lines[0], r'^(\w{4,8} ){4} score \d+, \d+ words$')
+
+
+class BoardCacheKeyTest(unittest.TestCase):
+    # A B C
+    # D E F
+    # G H I
+    BOARD = 'ABCDEFGHI'
+
+    def _key(self, values, board_width=3):
+        return board_cache_key(BoggleBoard(values, board_width), 'en_us')
+
+    def test_rotations_and_reflections_share_key(self):
+        key = self._key(BoardCacheKeyTest.BOARD)
+        for values in [
+            'GDAHEBIFC',  # rotated clockwise
+            'IHGFEDCBA',  # rotated 180 degrees
+            'CFIBEHADG',  # rotated anticlockwise
+            'CBAFEDIHG',  # reflected left to right
+            'GHIDEFABC',  # reflected top to bottom
+            'ADGBEHCFI',  # transposed
+            'IFCHEBGDA',  # transposed on the other diagonal
+        ]:
+            self.assertEqual(self._key(values), key)
+
+    def test_case_insensitive(self):
+        self.assertEqual(
+            self._key(BoardCacheKeyTest.BOARD.lower()),
+            self._key(BoardCacheKeyTest.BOARD)
+        )
+
+    def test_different_boards(self):
+        self.assertNotEqual(
+            self._key('ABCDEFGHI'), self._key('ABCDEFGIH')
+        )
+
+    def test_symmetry_tables_bounded(self):
+        key = self._key(BoardCacheKeyTest.BOARD)
+        for width in range(1, result_cache.MAX_SYMMETRY_TABLES + 2):
+            board_cache_key(BoggleBoard(['A'] * width, width, 1), 'en_us')
+        self.assertEqual(len(result_cache._symmetry_tables),
+                         result_cache.MAX_SYMMETRY_TABLES)
+        self.assertEqual(self._key(BoardCacheKeyTest.BOARD), key)
+
+    def test_rectangular_rotations_share_key(self):
+        # A B C
+        # D E F
+        key = board_cache_key(BoggleBoard('ABCDEF', 3, 2), 'en_us')
+        for values, board_width, board_height in [
+            ('FEDCBA', 3, 2),  # rotated 180 degrees
+            ('CBAFED', 3, 2),  # reflected left to right
+            ('DAEBFC', 2, 3),  # rotated clockwise
+            ('CFBEAD', 2, 3),  # rotated anticlockwise
+            ('ADBECF', 2, 3),  # transposed
+        ]:
+            self.assertEqual(board_cache_key(
+                BoggleBoard(values, board_width, board_height), 'en_us'
+            ), key)
+
+    def test_largest_board_key_length(self):
+        # The largest board the index page offers, all two-letter tiles
+        size = views.MAX_INDEX_BOARD_SIZE
+        rng = random.Random(0)
+        values = [
+            rng.choice(string.ascii_lowercase) + 'u'
+            for _ in range(0, size ** 2)
+        ]
+        key = self._key(values, size)
+        self.assertLessEqual(len(key), MAX_KEY_LENGTH)
+        reflected = [
+            value for row in range(0, size)
+            for value in reversed(values[row * size:(row + 1) * size])
+        ]
+        self.assertEqual(self._key(reflected, size), key)
+        values[0] = 'zz' if values[0] != 'zz' else 'yy'
+        self.assertNotEqual(self._key(values, size), key)
+
+    def test_limits_in_key(self):
+        board = BoggleBoard(BoardCacheKeyTest.BOARD, 3)
+        key = board_cache_key(board, 'en_us')
+        self.assertEqual(board_cache_key(board, 'en_us', {}), key)
+        self.assertEqual(
+            board_cache_key(board, 'en_us', {'longest': None}), key
+        )
+        self.assertNotEqual(
+            board_cache_key(board, 'en_us', {'longest': 5}), key
+        )
+        self.assertNotEqual(
+            board_cache_key(board, 'en_us', {'longest': 5}),
+            board_cache_key(board, 'en_us', {'max_words': 5})
+        )
+        self.assertEqual(
+            board_cache_key(board, 'en_us', {'longest': 5, 'min_length': 4}),
+            board_cache_key(board, 'en_us', {'min_length': 4, 'longest': 5})
+        )
+
+    def test_word_list_in_key(self):
+        board = BoggleBoard(BoardCacheKeyTest.BOARD, 3)
+        self.assertNotEqual(
+            board_cache_key(board, 'en_us'), board_cache_key(board, 'other')
+        )
+
+
+class ResultCacheTest(unittest.TestCase):
+    def test_hits_and_misses(self):
+        cache = ResultCache(2)
+        self.assertIsNone(cache.get('a'))
+        cache.set('a', ['word'])
+        self.assertEqual(cache.get('a'), ['word'])
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_empty_result_cached(self):
+        cache = ResultCache(2)
+        cache.set('a', [])
+        self.assertEqual(cache.get('a'), [])
+
+    def test_least_recently_used_evicted(self):
+        cache = ResultCache(2)
+        cache.set('a', ['a'])
+        cache.set('b', ['b'])
+        cache.get('a')
+        cache.set('c', ['c'])
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), ['a'])
+        self.assertEqual(cache.get('c'), ['c'])
+
+
+class SolveViewTest(unittest.TestCase):
+    def setUp(self):
+        self.client = Client()
+
+    def _post(self, letters, **extra):
+        return self.client.post(
+            '/boggle/solve', json.dumps(list(letters)),
+            content_type='application/json', **extra
+        )
+
+    def test_solve(self):
+        response = self._post('FFAXXXXXXXXXXXXX')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('ffa', json.loads(response.content))
+
+    def test_stream(self):
+        expected = BoggleSolver(
+            BoggleBoard('STILXXXLXXXXXXXA'), en_us
+        ).find_words()
+        for _ in range(2):
+            # Once uncached, once from the cache
+            response = self._post(
+                'STILXXXLXXXXXXXA', HTTP_ACCEPT='application/x-ndjson'
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.streaming)
+            lines = b''.join(response.streaming_content).splitlines()
+            self.assertEqual(
+                set(json.loads(line) for line in lines), set(expected)
+            )
+
+    def test_invalid_board(self):
+        response = self._post('ST', HTTP_ACCEPT='application/x-ndjson')
+        self.assertEqual(response.status_code, 400)
+
+    def test_limits(self):
+        result_cache = views.result_cache
+        views.result_cache = None
+        try:
+            with override_settings(BOGGLE_SOLVE_LIMITS={'max_words': 1}):
+                response = self._post('STILXXXLXXXXXXXC')
+        finally:
+            views.result_cache = result_cache
+        self.assertEqual(len(json.loads(response.content)), 1)
+        self.assertEqual(response['X-Boggle-Partial'], 'true')
+
+    def test_limits_in_cache_key(self):
+        result_cache = views.result_cache
+        views.result_cache = ResultCache()
+        try:
+            unlimited = json.loads(self._post('STILXXXLXXXXXXXC').content)
+            with override_settings(BOGGLE_SOLVE_LIMITS={'longest': 2}):
+                limited = json.loads(self._post('STILXXXLXXXXXXXC').content)
+            self.assertEqual(
+                json.loads(self._post('STILXXXLXXXXXXXC').content), unlimited
+            )
+        finally:
+            views.result_cache = result_cache
+        self.assertEqual(len(limited), 2)
+        self.assertGreater(len(unlimited), 2)
+
+    def test_stream_longest(self):
+        result_cache = views.result_cache
+        views.result_cache = None
+        try:
+            with override_settings(BOGGLE_SOLVE_LIMITS={'longest': 5}):
+                streamed = [
+                    json.loads(line) for line in b''.join(self._post(
+                        'STILXXXLXXXXXXXC', HTTP_ACCEPT='application/x-ndjson'
+                    ).streaming_content).splitlines()
+                ]
+                words = json.loads(self._post('STILXXXLXXXXXXXC').content)
+        finally:
+            views.result_cache = result_cache
+        self.assertEqual(len(words), 5)
+        self.assertEqual(streamed, words)
+
+    def test_invalid_json(self):
+        response = self.client.post(
+            '/boggle/solve', '["A", ', content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_json_module_codec(self):
+        codec = views.ujson
+        views.ujson = None
+        try:
+            response = self._post('FFAXXXXXXXXXXXXX')
+        finally:
+            views.ujson = codec
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertIn('ffa', json.loads(response.content))
+
+    def test_rows(self):
+        response = self._post([list('STILL'), list('XXXXX')])
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('still', json.loads(response.content))
+
+    def test_uneven_rows(self):
+        response = self._post([list('STILL'), list('XXXX')])
+        self.assertEqual(response.status_code, 400)
+
+    def test_index_size(self):
+        response = self.client.get('/boggle/?width=5&height=3')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('data-board_width="5"', response.content)
+        self.assertIn('data-board_height="3"', response.content)
+
+    def test_timeout(self):
+        with override_settings(BOGGLE_SOLVE_TIMEOUT=-1):
+            response = self._post('STILXXXLXXXXXXXB')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['X-Boggle-Partial'], 'true')
+        # The partial result wasn't cached
+        response = self._post('STILXXXLXXXXXXXB')
+        self.assertFalse(response.has_header('X-Boggle-Partial'))
+        self.assertIn('still', json.loads(response.content))
+
+    def test_choose_word_list(self):
+        word_dir = tempfile.mkdtemp()
+        word_lists = views.word_lists
+        try:
+            word_file = os.path.join(word_dir, 'small.txt')
+            with open(word_file, 'w') as small:
+                small.write('sti\nstil\n')
+            views.word_lists = WordListRegistry(
+                {'en': EN_US_FILE, 'small': word_file}
+            )
+            response = self.client.post(
+                '/boggle/solve?word_list=small',
+                json.dumps(list('STILXXXLXXXXXXXD')),
+                content_type='application/json'
+            )
+            self.assertEqual(json.loads(response.content), ['stil', 'sti'])
+            response = self.client.post(
+                '/boggle/solve_batch?word_list=small',
+                json.dumps([list('STILXXXLXXXXXXXD')]),
+                content_type='application/json'
+            )
+            self.assertEqual(json.loads(response.content), [['stil', 'sti']])
+        finally:
+            views.word_lists = word_lists
+            shutil.rmtree(word_dir)
+
+    def test_timeout_starts_after_word_list_load(self):
+        # Loading en.txt from text takes longer than the timeout
+        word_lists = views.word_lists
+        result_cache = views.result_cache
+        views.word_lists = WordListRegistry({'en': EN_US_FILE})
+        views.result_cache = None
+        try:
+            with override_settings(BOGGLE_SOLVE_TIMEOUT=0.2,
+                                   BOGGLE_BOARD_STORE=False):
+                response = self._post('STILXXXLXXXXXXXG')
+        finally:
+            views.word_lists = word_lists
+            views.result_cache = result_cache
+        self.assertFalse(response.has_header('X-Boggle-Partial'))
+        self.assertEqual(
+            json.loads(response.content),
+            BoggleSolver(BoggleBoard('STILXXXLXXXXXXXG'), en_us).find_words()
+        )
+
+    def test_editor(self):
+        editor = {'HTTP_X_BOGGLE_EDITOR': 'test-editor'}
+        response = self._post('STILXXXLXXXXXXXE', **editor)
+        self.assertFalse(response.has_header('X-Boggle-Incremental'))
+        response = self._post('STALXXXLXXXXXXXE', **editor)
+        self.assertEqual(response['X-Boggle-Incremental'], 'true')
+        self.assertEqual(
+            set(json.loads(response.content)),
+            set(BoggleSolver(
+                BoggleBoard('STALXXXLXXXXXXXE'), en_us
+            ).find_words())
+        )
+
+    def test_editor_limits(self):
+        editor = {'HTTP_X_BOGGLE_EDITOR': 'test-editor-limits'}
+        with override_settings(BOGGLE_SOLVE_LIMITS={'longest': 3}):
+            self._post('STILXXXLXXXXXXXE', **editor)
+            response = self._post('STALXXXLXXXXXXXE', **editor)
+        self.assertFalse(response.has_header('X-Boggle-Incremental'))
+        self.assertEqual(len(json.loads(response.content)), 3)
+
+    def test_paths(self):
+        response = self.client.post(
+            '/boggle/solve?result=paths', json.dumps(list('STILXXXLXXXXXXXF')),
+            content_type='application/json'
+        )
+        self.assertNotIn(b' ', response.content)
+        results = json.loads(response.content)
+        # Either 'L' can come first
+        self.assertIn(results[0], [
+            ['still', 2, '0001020307'], ['still', 2, '0001020703']
+        ])
+        self.assertIn(['its', 1, '020100'], results)
+
+    def test_all_paths(self):
+        response = self.client.post(
+            '/boggle/solve?result=all_paths',
+            json.dumps(list('STILXXXLXXXXXXXF')),
+            content_type='application/json'
+        )
+        results = dict(
+            (word, paths) for word, _, paths in json.loads(response.content)
+        )
+        self.assertEqual(
+            sorted(results['till']), ['01020307', '01020703']
+        )
+
+    def test_unknown_result_mode(self):
+        response = self.client.post(
+            '/boggle/solve?result=xx', json.dumps(list('STILXXXLXXXXXXXF')),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_unknown_word_list(self):
+        response = self.client.post(
+            '/boggle/solve?word_list=xx', json.dumps(list('STILXXXLXXXXXXXD')),
+            content_type='application/json',
+            HTTP_ACCEPT='application/x-ndjson'
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class BoardStoreTest(TestCase):
+    # S T I L
+    # X X X L
+    # X X X X
+    # X X X X
+    BOARD = list('STILXXXLXXXXXXXX')
+
+    def setUp(self):
+        self.client = Client()
+        self.result_cache = views.result_cache
+        views.result_cache = None
+
+    def tearDown(self):
+        views.result_cache = self.result_cache
+
+    def _store(self, values, results, puzzle_date=None):
+        board = BoggleBoard(values)
+        return SolvedBoard.objects.create(
+            key=board_cache_key(board, 'en'), word_list='en',
+            board=','.join(board.cells), board_width=4, board_height=4,
+            results=json.dumps(results), word_count=len(results),
+            score=sum(result[1] for result in results),
+            puzzle_date=puzzle_date
+        )
+
+    def _post(self, values, url='/boggle/solve'):
+        return self.client.post(
+            url, json.dumps(values), content_type='application/json'
+        )
+
+    def test_store_boards(self):
+        stored = board_store.store_boards(
+            [BoardStoreTest.BOARD], 'en', 'boggle_app/word_lists/en.txt',
+            puzzle_date=date(2017, 6, 1), processes=1
+        )
+        expected = BoggleSolver(
+            BoggleBoard(BoardStoreTest.BOARD), en_us
+        ).find_words()
+        self.assertEqual(len(stored), 1)
+        self.assertEqual(set(stored[0].get_words()), set(expected))
+        self.assertEqual(stored[0].word_count, len(expected))
+        # Any orientation of the board finds the stored results
+        rotated = BoggleBoard('XXXXXXXXLXXXLITS')
+        self.assertEqual(
+            board_store.lookup(rotated, 'en').pk, stored[0].pk
+        )
+        self.assertEqual(
+            [puzzle.pk for puzzle in board_store.puzzles_for(
+                date(2017, 6, 1)
+            )],
+            [stored[0].pk]
+        )
+
+    def test_solve_uses_store(self):
+        self._store(BoardStoreTest.BOARD, [['stored', 3, '000102']])
+        self.assertEqual(
+            json.loads(self._post(BoardStoreTest.BOARD).content), ['stored']
+        )
+        with override_settings(BOGGLE_BOARD_STORE=False):
+            self.assertIn(
+                'still', json.loads(self._post(BoardStoreTest.BOARD).content)
+            )
+
+    def test_limits_apply_to_store(self):
+        self._store(BoardStoreTest.BOARD, [
+            ['stored', 3, '000102'], ['sto', 1, '0001'], ['sti', 1, '0002']
+        ])
+        with override_settings(BOGGLE_SOLVE_LIMITS={'longest': 2}):
+            response = self._post(BoardStoreTest.BOARD)
+            self.assertEqual(json.loads(response.content), ['stored', 'sto'])
+            self.assertFalse(response.has_header('X-Boggle-Partial'))
+            response = self._post(
+                BoardStoreTest.BOARD, '/boggle/solve?result=paths'
+            )
+            self.assertEqual(json.loads(response.content), [
+                ['stored', 3, '000102'], ['sto', 1, '0001']
+            ])
+        with override_settings(BOGGLE_SOLVE_LIMITS={'max_words': 1}):
+            response = self._post(BoardStoreTest.BOARD)
+            self.assertEqual(json.loads(response.content), ['stored'])
+            self.assertEqual(response['X-Boggle-Partial'], 'true')
+
+    def test_paths_only_in_same_orientation(self):
+        self._store(BoardStoreTest.BOARD, [['stored', 3, '000102']])
+        response = self._post(
+            BoardStoreTest.BOARD, '/boggle/solve?result=paths'
+        )
+        self.assertEqual(
+            json.loads(response.content), [['stored', 3, '000102']]
+        )
+        reflected = list('LITSLXXXXXXXXXXX')
+        response = self._post(reflected, '/boggle/solve?result=paths')
+        self.assertIn('still', [r[0] for r in json.loads(response.content)])
+
+    def test_daily(self):
+        self._store(BoardStoreTest.BOARD, [['still', 2, '0001020307']],
+                    date(2017, 6, 1))
+        response = self.client.get('/boggle/daily?date=2017-06-01')
+        self.assertEqual(response.status_code, 200)
+        puzzles = json.loads(response.content)
+        self.assertEqual(len(puzzles), 1)
+        self.assertEqual(puzzles[0]['board'], list('stilxxxlxxxxxxxx'))
+        self.assertEqual(puzzles[0]['score'], 2)
+        self.assertEqual(
+            json.loads(self.client.get('/boggle/daily?date=2017-06-02')
+                       .content), []
+        )
+        self.assertEqual(
+            self.client.get('/boggle/daily?date=June').status_code, 400
+        )
+
+    def test_solve_boards_command(self):
+        call_command(
+            'solve_boards', random=2, seed=1, date='2017-06-01', processes=1,
+            stdout=StringIO()
+        )
+        self.assertEqual(len(board_store.puzzles_for(date(2017, 6, 1))), 2)
+
+
+class InstrumentedWordListTest(unittest.TestCase):
+    def test_counts_search(self):
+        board = BoggleBoard('STILXXXLXXXXXXXX')
+        stats = SolveStats()
+        word_list = InstrumentedWordList(en_us, stats)
+        words = BoggleSolver(board, word_list).find_words()
+        word_list.update_max_depth()
+        self.assertEqual(words, BoggleSolver(board, en_us).find_words())
+        self.assertGreater(stats.nodes_visited, 0)
+        self.assertGreater(stats.prefix_checks, 0)
+        self.assertGreater(stats.word_checks, 0)
+        self.assertGreater(stats.pruned_branches, 0)
+        self.assertGreaterEqual(stats.max_depth, len('still'))
+
+
+class MetricsViewTest(unittest.TestCase):
+    def setUp(self):
+        self.client = Client()
+
+    def test_stats_header_and_metrics(self):
+        with override_settings(BOGGLE_SOLVER_METRICS=True):
+            response = self.client.post(
+                '/boggle/solve', json.dumps(list('STILXXXLXXXXXXXC')),
+                content_type='application/json'
+            )
+        self.assertIn('nodes_visited=', response['X-Boggle-Stats'])
+        self.assertIn('search_ms=', response['X-Boggle-Stats'])
+        metrics = self.client.get('/boggle/metrics')
+        self.assertEqual(metrics.status_code, 200)
+        self.assertIn(b'boggle_solver_nodes_visited_total', metrics.content)
+        self.assertIn(b'phase="search"', metrics.content)
+
+    def test_no_stats_header_by_default(self):
+        response = self.client.post(
+            '/boggle/solve', json.dumps(list('STILXXXLXXXXXXXC')),
+            content_type='application/json'
+        )
+        self.assertFalse(response.has_header('X-Boggle-Stats'))
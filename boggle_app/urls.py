@@ -3,5 +3,9 @@ from . import views
 
 urlpatterns = [
     url(r'solve$', views.solve, name='boggle_solve'),
+    url(r'solve_batch$', views.solve_batch, name='boggle_solve_batch'),
+    url(r'check$', views.check_words, name='boggle_check'),
+    url(r'daily$', views.daily, name='boggle_daily'),
+    url(r'metrics$', views.metrics, name='boggle_metrics'),
     url(r'$', views.index, name='boggle_index'),
 ]
@@ -1,32 +1,192 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 import json
+import math
+import time
 import traceback
+from datetime import datetime
 
+from django.conf import settings
 from django.shortcuts import render
-from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+from django.http import HttpResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 
-from boggle_solver import BoggleBoard, BoggleSolver
-from word_list import en_us
+import board_store
+from boggle_solver import (
+    BoggleBoard, BoggleSolver, WordFinder, apply_limits, solve_each
+)
+from editor_sessions import get_editor_sessions
+from metrics import InstrumentedWordList, SolveStats, phase, registry
+from result_cache import board_cache_key, get_result_cache
+from word_list import get_word_list_registry
 
+try:
+    # ujson parses and writes the small payloads of the solve views several
+    # times faster than the json module; it's optional
+    import ujson
+except ImportError:
+    ujson = None
+
+result_cache = get_result_cache()
+word_lists = get_word_list_registry()
+editor_sessions = get_editor_sessions()
+
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+
+# Set on responses that hold only the results found before the solve timeout
+PARTIAL_HEADER = 'X-Boggle-Partial'
+
+# Set on solve responses when BOGGLE_SOLVER_METRICS is enabled
+STATS_HEADER = 'X-Boggle-Stats'
+
+# Sent by clients editing a board, with a token identifying the client
+EDITOR_HEADER = 'X-Boggle-Editor'
+
+# Set on responses to editors when only the changed cells were searched
+INCREMENTAL_HEADER = 'X-Boggle-Incremental'
+
+# The largest board width or height that the index page will show
+MAX_INDEX_BOARD_SIZE = 16
+
+# The default for BOGGLE_MAX_BOARD_SIZE, the largest board width or height that
+# the solve views accept
+MAX_BOARD_SIZE = 32
+
+# Values of the solve view's result parameter: plain words, words with their
+# scores and one path each, or words with their scores and every path
+RESULT_MODES = ('words', 'paths', 'all_paths')
+
+
+# The board's size can be chosen with width and height query parameters; both
+# default to 4, and the height defaults to the width if only that is given.
 def index(request):
+    board_width = _get_index_dimension(request, 'width', 4)
+    board_height = _get_index_dimension(request, 'height', board_width)
     context = {
-        'board_width': range(0, 4)
+        'board_width': range(0, board_width),
+        'board_height': range(0, board_height),
     }
     return render(request, 'boggle_app/index.html', context)
 
 
-# Skip CSRF checking so so simplify automatic testing using a REST client
+# Skip CSRF checking so so simplify automatic testing using a REST client.
+# A board is sent either as a list of rows, each a list of values, or as a flat
+# row-major list of values for a square board.
+# The word list to solve against can be chosen with a word_list query
+# parameter naming one of BOGGLE_WORD_LISTS; BOGGLE_DEFAULT_WORD_LIST is used
+# if it is omitted.
+# Clients that accept application/x-ndjson are sent each word as a JSON string
+# on its own line, as soon as it is found, rather than a single sorted list.
+# A streamed response simply ends early if the solve timeout is reached. The
+# timeout starts once the word list is loaded, so that loading a list that
+# isn't yet in memory doesn't use up the time for the search.
+# If BOGGLE_SOLVER_METRICS is enabled, the solver's counters and the time spent
+# in each phase are recorded in the metrics registry and (for responses that
+# aren't streamed) returned in a header.
+# Clients that edit a board and solve it again can send an X-Boggle-Editor
+# header; see _solve_for_editor. Editor sessions keep every word on the board,
+# so the header is ignored while BOGGLE_SOLVE_LIMITS is set.
+# A result query parameter of paths or all_paths returns each word with its
+# score and path(s) instead; see _solve_with_paths.
 @csrf_exempt
 def solve(request):
     try:
-        letters = json.loads(request.body)
-        board = BoggleBoard(letters)
-        solver = BoggleSolver(board, en_us)
-        matches = solver.find_words()
-        return JsonResponse(
-            matches, safe=False, status=200
+        stats = SolveStats() if _metrics_enabled() else None
+        with phase(stats, 'parse'):
+            letters = _loads(request.body)
+            name = _get_word_list_name(request)
+            result_mode = _get_result_mode(request)
+        with phase(stats, 'board'):
+            board = _make_board(letters)
+        with phase(stats, 'word_list'):
+            word_list = word_lists.get(name)
+        deadline = _get_deadline()
+        if result_mode != 'words':
+            return _solve_with_paths(
+                board, name, word_list, deadline, stats,
+                result_mode == 'all_paths'
+            )
+        streamed = NDJSON_CONTENT_TYPE in request.META.get('HTTP_ACCEPT', '')
+        editor = request.META.get('HTTP_X_BOGGLE_EDITOR')
+        if editor and editor_sessions is not None and not _get_solve_limits():
+            return _solve_for_editor(
+                editor, board, name, word_list, deadline, stats, streamed
+            )
+        if streamed:
+            return StreamingHttpResponse(
+                _to_ndjson(
+                    _iter_words(board, name, word_list, deadline, stats)
+                ),
+                content_type=NDJSON_CONTENT_TYPE
+            )
+        with phase(stats, 'search'):
+            matches, complete = _find_words(
+                board, name, word_list, deadline, stats
+            )
+        with phase(stats, 'serialize'):
+            response = _json_response(matches)
+        if not complete:
+            response[PARTIAL_HEADER] = 'true'
+        if stats is not None:
+            registry.record(stats)
+            response[STATS_HEADER] = stats.header_value()
+        return response
+    except ValueError as e:
+        traceback.print_exc()
+        return HttpResponse(e.message, status=400)
+    except Exception:
+        traceback.print_exc()
+        return HttpResponse("Server error", status=500)
+
+
+# Solve a list of boards in one request, each in either form accepted by
+# solve, so boards of different sizes can be mixed. Results are returned as a
+# list of word lists, in the same order as the boards in the request. If the
+# solve timeout is reached, boards that weren't solved in time have null
+# results; boards whose search reached one of BOGGLE_SOLVE_LIMITS have the
+# words found before it stopped. Either way, the response is marked as partial.
+# The word list is chosen as for solve.
+@csrf_exempt
+def solve_batch(request):
+    try:
+        boards = _make_boards(_loads(request.body))
+        word_list = word_lists.get(_get_word_list_name(request))
+        deadline = _get_deadline()
+        results = solve_each(
+            boards, word_list, deadline=deadline, limits=_get_solve_limits()
+        )
+        response = _json_response([words for words, _ in results])
+        if not all(complete for _, complete in results):
+            response[PARTIAL_HEADER] = 'true'
+        return response
+    except ValueError as e:
+        traceback.print_exc()
+        return HttpResponse(e.message, status=400)
+    except Exception:
+        traceback.print_exc()
+        return HttpResponse("Server error", status=500)
+
+
+# Check which of a list of words are on a board, without solving it. The body
+# is a JSON object with a board (in either form accepted by solve) and a list
+# of words; the response lists the words, in lower case and in the order
+# given, that can be spelled out on the board and are in the word list (chosen
+# as for solve).
+@csrf_exempt
+def check_words(request):
+    try:
+        body = _loads(request.body)
+        if not isinstance(body, dict):
+            raise ValueError("Expected an object with a board and words.")
+        words = body.get('words')
+        if not isinstance(words, list) or not all(
+                isinstance(word, basestring) for word in words):
+            raise ValueError("Expected a list of words.")
+        board = _make_board(body.get('board'))
+        word_list = word_lists.get(_get_word_list_name(request))
+        return _json_response(
+            WordFinder(board).find_present(words, word_list)
         )
     except ValueError as e:
         traceback.print_exc()
@@ -34,3 +194,347 @@ def solve(request):
     except Exception:
         traceback.print_exc()
         return HttpResponse("Server error", status=500)
+
+
+# List the puzzles stored for a day (see manage.py solve_boards), given by a
+# date query parameter in YYYY-MM-DD form; today (UTC) if it is omitted. Each
+# puzzle is an object with the board's values (lower case, row-major), size,
+# word count and score.
+def daily(request):
+    try:
+        date = request.GET.get('date')
+        if date:
+            date = datetime.strptime(date, '%Y-%m-%d').date()
+        else:
+            date = timezone.now().date()
+        return _json_response([
+            {
+                'board': puzzle.board.split(','),
+                'width': puzzle.board_width,
+                'height': puzzle.board_height,
+                'word_count': puzzle.word_count,
+                'score': puzzle.score,
+            }
+            for puzzle in board_store.puzzles_for(date)
+        ])
+    except ValueError as e:
+        traceback.print_exc()
+        return HttpResponse(e.message, status=400)
+    except Exception:
+        traceback.print_exc()
+        return HttpResponse("Server error", status=500)
+
+
+# Load the default word list, so that a process doesn't have to load it while
+# serving its first request. Called by boggle/wsgi.py as each worker starts.
+def preload_word_lists():
+    word_lists.get(_default_word_list_name())
+
+
+# Report the metrics recorded by this process, in the Prometheus text format.
+def metrics(request):
+    return HttpResponse(
+        registry.render(result_cache),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
+# Solve a board for a client that is editing it, searching only the cells
+# that changed since the client's last request if its session is still held by
+# this process. The result cache isn't used, since a session has to be kept
+# up to date with each board the client solves. Streamed responses are sent
+# all at once, and have no stats header.
+def _solve_for_editor(editor, board, name, word_list, deadline, stats,
+                      streamed):
+    with phase(stats, 'search'):
+        matches, incremental, complete = editor_sessions.solve(
+            editor, board, name, word_list, deadline
+        )
+    with phase(stats, 'serialize'):
+        if streamed:
+            response = StreamingHttpResponse(
+                _to_ndjson(matches), content_type=NDJSON_CONTENT_TYPE
+            )
+        else:
+            response = _json_response(matches)
+    if incremental:
+        response[INCREMENTAL_HEADER] = 'true'
+    if not complete:
+        response[PARTIAL_HEADER] = 'true'
+    if stats is not None:
+        registry.record(stats)
+        if not streamed:
+            response[STATS_HEADER] = stats.header_value()
+    return response
+
+
+# Solve a board, returning a compact JSON list with a [word, score, path]
+# array for each word, sorted by length as for BoggleSolver.find_words. Each
+# path is a string of the board's node identifiers in order, encoded by
+# encode_path; with all_paths, the third item is a list of every path that
+# spells the word. Ordering each path's cells after the search takes a few
+# microseconds per word, up to doubling the solve time on a dense board. The
+# result cache isn't used, since it holds words for a board's canonical
+# orientation, whose paths differ from the board's own. For the same reason,
+# a stored board's results are only used if it was stored in the same
+# orientation. They are returned as stored unless BOGGLE_SOLVE_LIMITS
+# is set, in which case the limits are applied to them first.
+def _solve_with_paths(board, name, word_list, deadline, stats, all_paths):
+    limits = _get_solve_limits()
+    if not all_paths:
+        with phase(stats, 'store'):
+            stored = _stored_board(board, name)
+        if stored is not None and stored.same_orientation(board):
+            if limits:
+                words, complete = _stored_words(stored, limits)
+                words = set(words)
+                response = _json_response([
+                    result for result in stored.get_results()
+                    if result[0] in words
+                ])
+                if not complete:
+                    response[PARTIAL_HEADER] = 'true'
+            else:
+                response = HttpResponse(
+                    stored.results, content_type='application/json'
+                )
+            if stats is not None:
+                registry.record(stats)
+            return response
+    word_list = _instrument(word_list, stats)
+    solver = BoggleSolver(board, word_list, deadline, **limits)
+    with phase(stats, 'search'):
+        paths = solver.find_paths(all_paths)
+    if stats is not None:
+        word_list.update_max_depth()
+    with phase(stats, 'serialize'):
+        results = board_store.path_results(
+            paths, len(board.cells), all_paths
+        )
+        response = _json_response(results)
+    if not solver.complete:
+        response[PARTIAL_HEADER] = 'true'
+    if stats is not None:
+        registry.record(stats)
+        response[STATS_HEADER] = stats.header_value()
+    return response
+
+
+# Get a board's width or height for the index page from a query parameter,
+# ignoring values that aren't valid sizes.
+def _get_index_dimension(request, name, default):
+    try:
+        size = int(request.GET.get(name, default))
+    except ValueError:
+        return default
+    if not 0 < size <= MAX_INDEX_BOARD_SIZE:
+        return default
+    return size
+
+
+# Create the board posted to the solve view: a list of rows of equal length,
+# or a flat list of values for a square board (4x4 if the number of values
+# isn't a square). Boards wider or taller than BOGGLE_MAX_BOARD_SIZE are
+# rejected before the board is built.
+def _make_board(letters):
+    if not isinstance(letters, list):
+        raise ValueError("Expected a list of values or rows.")
+    if letters and all(isinstance(row, list) for row in letters):
+        board_width = len(letters[0])
+        board_height = len(letters)
+        if any(len(row) != board_width for row in letters):
+            raise ValueError("Expected rows of equal length.")
+        _check_board_size(board_width, board_height)
+        return BoggleBoard(
+            [value for row in letters for value in row],
+            board_width, board_height
+        )
+    board_width = int(round(math.sqrt(len(letters))))
+    if board_width * board_width != len(letters):
+        board_width = 4
+    _check_board_size(board_width, board_width)
+    return BoggleBoard(letters, board_width)
+
+
+# Reject a board wider or taller than BOGGLE_MAX_BOARD_SIZE.
+def _check_board_size(board_width, board_height):
+    max_size = getattr(settings, 'BOGGLE_MAX_BOARD_SIZE', MAX_BOARD_SIZE)
+    if max(board_width, board_height) > max_size:
+        raise ValueError("Boards may be at most {0}x{0}.".format(max_size))
+
+
+# Create the boards posted to the solve_batch view, each as for _make_board.
+def _make_boards(boards):
+    if not isinstance(boards, list):
+        raise ValueError("Expected a list of boards.")
+    result = []
+    for idx, letters in enumerate(boards):
+        try:
+            result.append(_make_board(letters))
+        except (TypeError, ValueError) as e:
+            raise ValueError("Board {}: {}".format(idx, e.message))
+    return result
+
+
+def _metrics_enabled():
+    return getattr(settings, 'BOGGLE_SOLVER_METRICS', False)
+
+
+# Look up a board's stored results, if BOGGLE_BOARD_STORE is enabled.
+def _stored_board(board, name):
+    if not getattr(settings, 'BOGGLE_BOARD_STORE', True):
+        return None
+    return board_store.lookup(board, name)
+
+
+# Get the name of the word list that a request should be solved against. The
+# name is checked up front, so that an unknown list is reported as a bad
+# request even when the response is streamed.
+def _get_word_list_name(request):
+    name = request.GET.get('word_list') or _default_word_list_name()
+    if name not in word_lists.word_files:
+        raise ValueError("Unknown word list: {}".format(name))
+    return name
+
+
+def _default_word_list_name():
+    return getattr(settings, 'BOGGLE_DEFAULT_WORD_LIST', 'en')
+
+
+# Get the result mode requested by the solve view's result query parameter.
+def _get_result_mode(request):
+    mode = request.GET.get('result') or 'words'
+    if mode not in RESULT_MODES:
+        raise ValueError("Unknown result mode: {}".format(mode))
+    return mode
+
+
+# Get the word list to solve against, counting operations on it if stats are
+# being recorded.
+def _instrument(word_list, stats):
+    if stats is None:
+        return word_list
+    return InstrumentedWordList(word_list, stats)
+
+
+# Get the limits on each search made by a request, as keyword arguments for
+# BoggleSolver.
+def _get_solve_limits():
+    return getattr(settings, 'BOGGLE_SOLVE_LIMITS', None) or {}
+
+
+# Get the time by which the current request's solving should stop.
+def _get_deadline():
+    timeout = getattr(settings, 'BOGGLE_SOLVE_TIMEOUT', None)
+    if timeout is None:
+        return None
+    return time.time() + timeout
+
+
+# Find the words on a board, using the result cache if one is configured, and
+# then the board store. Returns the words and whether the search completed
+# before the deadline and without reaching max_words or max_steps; only
+# complete results are cached. Results are cached under the limits they were
+# found with, and a stored board's words have the limits applied to them.
+def _find_words(board, name, word_list, deadline, stats=None):
+    limits = _get_solve_limits()
+    key = None
+    if result_cache is not None:
+        key = board_cache_key(board, name, limits)
+        matches = result_cache.get(key)
+        if matches is not None:
+            return matches, True
+    stored = _stored_board(board, name)
+    if stored is not None:
+        matches, complete = _stored_words(stored, limits)
+        if key is not None and complete:
+            result_cache.set(key, matches)
+        return matches, complete
+    word_list = _instrument(word_list, stats)
+    solver = BoggleSolver(board, word_list, deadline, **limits)
+    matches = solver.find_words()
+    if stats is not None:
+        word_list.update_max_depth()
+    if key is not None and solver.complete:
+        result_cache.set(key, matches)
+    return matches, solver.complete
+
+
+# Generate the words on a board as they are found. If the search finishes
+# before the deadline, the full result is added to the result cache (if there
+# is one), so a cached board is streamed straight from the cache. Stored boards
+# are streamed from the store, and added to the result cache. The cache and
+# store are used as for _find_words. With a longest limit, a word found early
+# may be displaced by longer words later, so words are only sent once the
+# search finishes. Stats are recorded once the search finishes.
+def _iter_words(board, name, word_list, deadline, stats=None):
+    limits = _get_solve_limits()
+    key = None
+    matches = None
+    if result_cache is not None:
+        key = board_cache_key(board, name, limits)
+        matches = result_cache.get(key)
+    if matches is None:
+        stored = _stored_board(board, name)
+        if stored is not None:
+            matches, complete = _stored_words(stored, limits)
+            if key is not None and complete:
+                result_cache.set(key, matches)
+    if matches is None:
+        word_list = _instrument(word_list, stats)
+        solver = BoggleSolver(board, word_list, deadline, **limits)
+        with phase(stats, 'search'):
+            if limits.get('longest') is not None:
+                words = solver.find_words()
+            else:
+                words = solver.iter_words()
+            for word in words:
+                yield word
+        if key is not None and solver.complete:
+            matches = list(solver.matches)
+            matches.sort(key=lambda s: len(s), reverse=True)
+            result_cache.set(key, matches)
+        if stats is not None:
+            word_list.update_max_depth()
+    else:
+        for word in matches:
+            yield word
+    if stats is not None:
+        registry.record(stats)
+
+
+# Get a stored board's words with a request's limits applied. Returns the
+# words and whether max_words left them complete.
+def _stored_words(stored, limits):
+    words, limit_reached = apply_limits(stored.get_words(), limits)
+    return words, not limit_reached
+
+
+def _to_ndjson(items):
+    for item in items:
+        yield _dumps(item) + '\n'
+
+
+# Parse a JSON request body, with ujson if it's installed. Bodies that ujson
+# rejects are parsed again with the json module, so that errors are reported
+# in the same way whichever codec is used.
+def _loads(body):
+    if ujson is not None:
+        try:
+            return ujson.loads(body)
+        except ValueError:
+            pass
+    return json.loads(body)
+
+
+# Serialize a value as compact JSON, with ujson if it's installed.
+def _dumps(value):
+    if ujson is not None:
+        return ujson.dumps(value)
+    return json.dumps(value, separators=(',', ':'))
+
+
+# Create a response holding a value as JSON. Results are plain lists and
+# strings, so there's no need for JsonResponse's encoder.
+def _json_response(value):
+    return HttpResponse(_dumps(value), content_type='application/json')
@@ -6,39 +6,741 @@
 # Word lists pre-processed using
 #    manage.py scrub_word_list
 # to remove words with non-ascii characters and words with < 3 or > 16
-# characters, and to convert all words to lowercase.
+# characters, and to convert all words to lowercase. Running the same command
+# with --compile writes a compiled copy of the list alongside it (see
+# WordList.save), which is loaded in preference to the text file if present.
+
+import ctypes
+import mmap
+import os
+import struct
+import threading
+from array import array
+from collections import OrderedDict
+
+import numpy as np
+
+from django.conf import settings
 
-from marisa_trie import Trie
 
 class WordList(object):
+    """
+    A list of valid words, stored as a trie.
+
+    As well as whole-word and prefix lookups, the list exposes a cursor API for
+    callers that build up words one letter at a time (such as the solver).
+    Rather than asking about each growing prefix from scratch, a caller can
+    take the root cursor and advance it a letter at a time, checking at each
+    step whether the cursor marks the end of a word and whether any longer
+    words continue from it.
+
+    The trie is flattened into three arrays, with nodes numbered in
+    breadth-first order. Node 0 is the root, and the children of each node are
+    numbered contiguously, so a node's children can be described by a single
+    offset:
+
+        labels:   labels[n] is the letter on the edge leading into node n.
+        first:    the children of node n are nodes first[n] to first[n+1] - 1.
+        terminal: 1 if the path to node n spells a complete word, 0 if not.
+
+    Advancing a cursor is therefore a single substring search over a node's (at
+    most 26) child labels, and the position of the match is the child node.
+    No per-node Python objects are created.
+
+    A fourth array, child_letters, holds for each node the set of its child
+    labels as a bitmask (see letter_mask). Callers that know which letters
+    they could possibly add next, such as the solver with a board's
+    neighboring letters, can use it to rule out a step without advancing.
+
+    Since the arrays are flat buffers, they can be written to disk as-is and
+    memory-mapped back in (see save and load). Pages of a mapped list are
+    shared between every process that loads the same file, so forked server
+    workers don't each build and hold their own copy.
+    """
+
+    # File extension for compiled lists, which are found alongside the text
+    # file they were built from.
+    COMPILED_EXTENSION = '.trie'
+
+    # Compiled lists end with a fixed-size trailer. The check value catches
+    # files compiled on a machine with a different byte order.
+    _TRAILER = struct.Struct('=8sII')
+    _MAGIC = b'BOGGLE\x00\x02'
+    _BYTE_ORDER_CHECK = 0x01020304
+
     def __init__(self, word_file):
         # TODO: Check input file exists, is readable, valid, etc
         words = []
         with open(word_file) as input_file:
             for word in input_file:
                 words.append(word.lower().strip())
-        self.trie = Trie(words)
+        (self._labels, self._first, self._terminal,
+         self._child_letters) = WordList._build_index(sorted(set(words)))
+
+    @classmethod
+    def from_words(cls, words):
+        """
+        Build a list from words that are already in memory.
+
+        :param words: An iterable of ASCII, lowercase strings.
+        :return: a WordList containing the words.
+        """
+        word_list = cls.__new__(cls)
+        (word_list._labels, word_list._first, word_list._terminal,
+         word_list._child_letters) = WordList._build_index(sorted(set(words)))
+        return word_list
+
+    @classmethod
+    def load(cls, compiled_file):
+        """
+        Load a list written by save(), mapping it into memory rather than
+        reading it.
+
+        :param compiled_file: The path to a compiled word list.
+        :return: a WordList backed by the mapped file.
+        """
+        with open(compiled_file, 'rb') as input_file:
+            input_file.seek(-cls._TRAILER.size, os.SEEK_END)
+            magic, node_count, check = cls._TRAILER.unpack(
+                input_file.read(cls._TRAILER.size)
+            )
+            if magic != cls._MAGIC or check != cls._BYTE_ORDER_CHECK:
+                raise ValueError(
+                    u"{} is not a compiled word list for this platform".format(
+                        compiled_file
+                    ))
+            mapped = mmap.mmap(
+                input_file.fileno(), 0, access=mmap.ACCESS_COPY
+            )
+        word_list = cls.__new__(cls)
+        word_list._labels = mapped
+        word_list._terminal = (ctypes.c_uint8 * node_count).from_buffer(
+            mapped, node_count
+        )
+        first_offset = WordList._first_offset(node_count)
+        word_list._first = (ctypes.c_int32 * (node_count + 1)).from_buffer(
+            mapped, first_offset
+        )
+        word_list._child_letters = (ctypes.c_int32 * node_count).from_buffer(
+            mapped, first_offset + 4 * (node_count + 1)
+        )
+        return word_list
+
+    @classmethod
+    def compiled_path(cls, word_file):
+        """
+        Get the location of the compiled copy of a text word list.
+
+        :param word_file: The path to a text word list.
+        :return: the path that save() output for the list is expected at.
+        """
+        return os.path.splitext(word_file)[0] + cls.COMPILED_EXTENSION
+
+    def save(self, compiled_file):
+        """
+        Write the list in a compiled form that can be passed to load(). The
+        file layout is the labels, terminal, first and child_letters arrays
+        described in the class documentation, followed by a trailer recording
+        the node count.
+        Numbers are written in the byte order of the current platform.
+
+        :param compiled_file: The path to write the compiled list to.
+        """
+        node_count = len(self._terminal)
+        with open(compiled_file, 'wb') as output_file:
+            output_file.write(self._labels[0:node_count])
+            output_file.write(bytearray(self._terminal))
+            output_file.write(
+                b'\x00' * (WordList._first_offset(node_count) - 2 * node_count)
+            )
+            output_file.write(array('i', self._first).tostring())
+            output_file.write(array('i', self._child_letters).tostring())
+            output_file.write(WordList._TRAILER.pack(
+                WordList._MAGIC, node_count, WordList._BYTE_ORDER_CHECK
+            ))
 
     def contains_word(self, word):
         """
         Check whether a word exists in the list.
-        
+
         :param word: An ASCII, lowercase string to check for.
         :return: True if the word is in the word list, false if it is not.
         """
         # TODO: Raise errors if the word is None, isn't ASCII or lowercase, etc
-        return word in self.trie
+        word = WordList._to_native(word)
+        if word is None:
+            return False
+        cursor = self.advance(self.root(), word)
+        return cursor is not None and self.is_terminal(cursor)
 
     def contains_prefix(self, prefix):
         """
-        Check list for words that begin with the supplied prefix
-        
+        Check list for words that begin with the supplied prefix. The check
+        walks the prefix one letter at a time, so it costs O(len(prefix)) no
+        matter how many words share the prefix.
+
         :param prefix: An ASCII, lowercase string to check as a prefix
-        :return: True if this key is a prefix for some other word or words in 
+        :return: True if this key is a prefix for some other word or words in
         the list. Note that this method will return False if the word is in the
         list but is not a prefix of any other word.
         """
         # TODO: Raise errors if prefix is None, isn't ASCII or lowercase, etc
-        return len(self.trie.keys(prefix)) > 1
+        prefix = WordList._to_native(prefix)
+        if prefix is None:
+            return False
+        cursor = self.advance(self.root(), prefix)
+        return cursor is not None and self.has_children(cursor)
+
+    def root(self):
+        """
+        Get a cursor positioned at the start of every word in the list.
+
+        Callers should treat cursors as opaque values, and should only pass them
+        back to the cursor methods of the WordList that created them.
+
+        :return: a cursor representing the empty prefix.
+        """
+        return 0
+
+    def advance(self, cursor, letters):
+        """
+        Move a cursor forward by one or more letters.
+
+        :param cursor: A cursor returned by root() or advance().
+        :param letters: An ASCII, lowercase native string (not unicode) to
+        append to the prefix that the cursor represents.
+        :return: a cursor for the extended prefix, or None if no word in the
+        list begins with the extended prefix.
+        """
+        labels = self._labels
+        first = self._first
+        for letter in letters:
+            cursor = labels.find(letter, first[cursor], first[cursor + 1])
+            if cursor < 0:
+                return None
+        return cursor
+
+    def is_terminal(self, cursor):
+        """
+        Check whether the prefix represented by a cursor is a word in the list.
+
+        :param cursor: A cursor returned by root() or advance().
+        :return: True if the cursor's prefix is a complete word.
+        """
+        return self._terminal[cursor] == 1
+
+    def has_children(self, cursor):
+        """
+        Check whether any longer words continue from a cursor.
+
+        :param cursor: A cursor returned by root() or advance().
+        :return: True if some word in the list is longer than, and begins with,
+        the cursor's prefix.
+        """
+        return self._first[cursor + 1] > self._first[cursor]
+
+    def depth(self, cursor):
+        """
+        Get the length of the prefix represented by a cursor.
+
+        :param cursor: A cursor returned by root() or advance().
+        :return: an int; 0 for the root cursor.
+        """
+        # Nodes are numbered breadth-first, so each level of the trie is a
+        # contiguous range of nodes, starting with the first child of the first
+        # node in the level above.
+        first = self._first
+        node_count = len(self._terminal)
+        level_start = 0
+        depth = -1
+        while level_start <= cursor and level_start < node_count:
+            depth += 1
+            level_start = first[level_start] if depth else 1
+        return depth
+
+    def child_letters(self, cursor):
+        """
+        Get the set of letters that some longer word continues from a cursor
+        with.
+
+        :param cursor: A cursor returned by root() or advance().
+        :return: a bitmask of letters, as returned by letter_mask. The mask is
+        0 if and only if has_children(cursor) is False.
+        """
+        return self._child_letters[cursor]
+
+    def flat_trie(self):
+        """
+        Get the flattened trie described in the class documentation, for
+        callers that work on many cursors at once rather than one at a time
+        (such as BulkSolver). A cursor is the number of its node.
+
+        :return: a tuple of the labels, first, terminal and child_letters
+        arrays. labels is a native string or buffer of one byte per node.
+        """
+        return self._labels, self._first, self._terminal, self._child_letters
+
+    @staticmethod
+    def letter_mask(letters):
+        """
+        Get the bit that represents the first of some letters in the
+        child_letters bitmask. Each of 'a' to 'z' has its own bit; any other
+        character shares a single bit with all the others.
+
+        :param letters: A non-empty string.
+        :return: an int with a single bit set.
+        """
+        offset = ord(letters[0]) - ord('a')
+        if 0 <= offset < 26:
+            return 1 << offset
+        return 1 << 26
+
+    # The flattened trie stores its labels as a native string, and searching
+    # that for a unicode letter would convert the whole string first, so
+    # convert anything a caller passes in. A prefix that can't be converted
+    # can't be in the (ASCII) list; return None to signal that.
+    @staticmethod
+    def _to_native(text):
+        try:
+            return str(text)
+        except UnicodeEncodeError:
+            return None
+
+    # Offset of the first array in a compiled file; it follows the labels and
+    # terminal arrays (one byte per node each), aligned to a 4-byte boundary.
+    @staticmethod
+    def _first_offset(node_count):
+        return (2 * node_count + 3) & ~3
+
+    # Flatten a sorted, de-duplicated list of words into the breadth-first
+    # trie layout described in the class documentation, a level at a time
+    # with NumPy rather than a node at a time. Since the list is sorted, each
+    # node is created by the first word with its prefix: the nodes at depth d
+    # are the words of at least d letters that share fewer than d letters
+    # with the word before them, in order, and each is labelled with its
+    # word's d-th letter. A node's children are the nodes in the level below
+    # created by the words from its own word up to the next node's, so their
+    # offsets can be found with a binary search of one level in the other.
+    # The root has no incoming edge, so labels[0] is a placeholder.
+    @staticmethod
+    def _build_index(words):
+        words = [str(word) for word in words]
+        word_count = len(words)
+        max_length = max(map(len, words)) if words else 0
+        letters = np.frombuffer(
+            b''.join([word.ljust(max_length, b'\x00') for word in words]),
+            dtype=np.uint8
+        ).reshape(word_count, max_length)
+        lengths = np.array([len(word) for word in words], dtype=np.int64)
+        shared = np.zeros(word_count, dtype=np.int64)
+        if word_count > 1:
+            differs = letters[1:] != letters[:-1]
+            shared[1:] = differs.argmax(axis=1)
+        letter_masks = np.array(
+            [WordList.letter_mask(chr(byte)) for byte in range(0, 256)],
+            dtype=np.int64
+        )
+
+        labels = [b'\x00']
+        first = []
+        terminal = [np.array([bool(words) and not words[0]], dtype=np.uint8)]
+        child_letters = []
+        # The words that created each node in the current level; the root is
+        # created by the first word
+        level = np.zeros(1, dtype=np.int64)
+        next_start = 1
+        for depth in range(1, max_length + 2):
+            if depth <= max_length:
+                children = np.flatnonzero(
+                    (lengths >= depth) & (shared < depth)
+                )
+                child_labels = letters[children, depth - 1]
+            else:
+                children = np.zeros(0, dtype=np.int64)
+                child_labels = np.zeros(0, dtype=np.uint8)
+            offsets = np.searchsorted(children, level)
+            first.append(next_start + offsets)
+            # Padded with an empty mask, so that every offset is a valid index
+            # for reduceat, which gives the mask at the offset itself for
+            # nodes with no children
+            child_masks = np.append(letter_masks[child_labels], 0)
+            masks = np.bitwise_or.reduceat(child_masks, offsets)
+            masks[np.diff(np.append(offsets, len(children))) == 0] = 0
+            child_letters.append(masks)
+            labels.append(child_labels.tobytes())
+            terminal.append((lengths[children] == depth).astype(np.uint8))
+            next_start += len(children)
+            level = children
+        first.append(np.array([next_start], dtype=np.int64))
+        return (
+            b''.join(labels),
+            array('i', np.concatenate(first).astype(np.int32).tobytes()),
+            bytearray(np.concatenate(terminal).tobytes()),
+            array('i', np.concatenate(child_letters).astype(np.int32).tobytes())
+        )
+
+
+class DawgWordList(WordList):
+    """
+    A list of valid words, stored as a minimal DAWG (directed acyclic word
+    graph).
+
+    A trie has a node for every distinct prefix, but most of those nodes begin
+    identical sets of suffixes: every word ending in 'ing', 'ness' or 's'
+    shares its tail with thousands of others. A DAWG merges every node whose
+    remaining words are the same into one, so the English list's 950,000 trie
+    nodes become about 145,000.
+
+    Because a node can now be reached by several edges, edges and nodes are
+    stored separately:
+
+        labels:   labels[e] is the letter on edge e.
+        targets:  targets[e] is the node that edge e leads to.
+        first:    the edges leaving node n are edges first[n] to
+                  first[n+1] - 1.
+        terminal: 1 if node n ends a word, 0 if not.
+
+    child_letters is as for WordList. Nodes are numbered breadth-first from the
+    root, which is node 0. Advancing a cursor is a substring search over a
+    node's edge labels followed by a single array lookup.
+
+    Cursors and the rest of the lookup API behave as for WordList, except
+    that depth() isn't available, since one node can end prefixes of several
+    lengths. Compiled DAWGs are written with a .dawg extension.
+    """
+
+    COMPILED_EXTENSION = '.dawg'
+
+    _TRAILER = struct.Struct('=8sIII')
+    _MAGIC = b'BOGGLE\x00\x03'
+
+    def __init__(self, word_file):
+        (self._labels, self._first, self._targets, self._terminal,
+         self._child_letters) = DawgWordList._minimize(WordList(word_file))
+
+    @classmethod
+    def from_words(cls, words):
+        """
+        Build a list from words that are already in memory.
+
+        :param words: An iterable of ASCII, lowercase strings.
+        :return: a DawgWordList containing the words.
+        """
+        return cls.from_trie(WordList.from_words(words))
+
+    @classmethod
+    def from_trie(cls, word_list):
+        """
+        Build a list containing the same words as a WordList.
+
+        :param word_list: A WordList (but not a DawgWordList).
+        :return: a DawgWordList.
+        """
+        dawg = cls.__new__(cls)
+        (dawg._labels, dawg._first, dawg._targets, dawg._terminal,
+         dawg._child_letters) = DawgWordList._minimize(word_list)
+        return dawg
+
+    @classmethod
+    def load(cls, compiled_file):
+        """
+        Load a list written by save(), mapping it into memory rather than
+        reading it.
+
+        :param compiled_file: The path to a compiled DAWG.
+        :return: a DawgWordList backed by the mapped file.
+        """
+        with open(compiled_file, 'rb') as input_file:
+            input_file.seek(-cls._TRAILER.size, os.SEEK_END)
+            magic, node_count, edge_count, check = cls._TRAILER.unpack(
+                input_file.read(cls._TRAILER.size)
+            )
+            if magic != cls._MAGIC or check != cls._BYTE_ORDER_CHECK:
+                raise ValueError(
+                    u"{} is not a compiled DAWG for this platform".format(
+                        compiled_file
+                    ))
+            mapped = mmap.mmap(
+                input_file.fileno(), 0, access=mmap.ACCESS_COPY
+            )
+        dawg = cls.__new__(cls)
+        dawg._labels = mapped
+        dawg._terminal = (ctypes.c_uint8 * node_count).from_buffer(
+            mapped, edge_count
+        )
+        offset = DawgWordList._first_offset(node_count, edge_count)
+        dawg._first = (ctypes.c_int32 * (node_count + 1)).from_buffer(
+            mapped, offset
+        )
+        offset += 4 * (node_count + 1)
+        dawg._targets = (ctypes.c_int32 * edge_count).from_buffer(
+            mapped, offset
+        )
+        offset += 4 * edge_count
+        dawg._child_letters = (ctypes.c_int32 * node_count).from_buffer(
+            mapped, offset
+        )
+        return dawg
+
+    def save(self, compiled_file):
+        """
+        Write the list in a compiled form that can be passed to load(). The
+        file layout is the labels, terminal, first, targets and child_letters
+        arrays described in the class documentation, followed by a trailer
+        recording the node and edge counts.
+        Numbers are written in the byte order of the current platform.
+
+        :param compiled_file: The path to write the compiled list to.
+        """
+        node_count = len(self._terminal)
+        edge_count = len(self._targets)
+        with open(compiled_file, 'wb') as output_file:
+            output_file.write(self._labels[0:edge_count])
+            output_file.write(bytearray(self._terminal))
+            output_file.write(b'\x00' * (
+                DawgWordList._first_offset(node_count, edge_count) -
+                edge_count - node_count
+            ))
+            output_file.write(array('i', self._first).tostring())
+            output_file.write(array('i', self._targets).tostring())
+            output_file.write(array('i', self._child_letters).tostring())
+            output_file.write(DawgWordList._TRAILER.pack(
+                DawgWordList._MAGIC, node_count, edge_count,
+                DawgWordList._BYTE_ORDER_CHECK
+            ))
+
+    def advance(self, cursor, letters):
+        """
+        Move a cursor forward by one or more letters.
+
+        :param cursor: A cursor returned by root() or advance().
+        :param letters: An ASCII, lowercase native string (not unicode) to
+        append to the prefix that the cursor represents.
+        :return: a cursor for the extended prefix, or None if no word in the
+        list begins with the extended prefix.
+        """
+        labels = self._labels
+        first = self._first
+        targets = self._targets
+        for letter in letters:
+            edge = labels.find(letter, first[cursor], first[cursor + 1])
+            if edge < 0:
+                return None
+            cursor = targets[edge]
+        return cursor
+
+    def depth(self, cursor):
+        """
+        Nodes of a DAWG are shared between prefixes of different lengths, so
+        a cursor's depth can't be recovered from it.
+
+        :return: None.
+        """
+        return None
+
+    def flat_trie(self):
+        """
+        Nodes of a DAWG are shared between different prefixes, so the list
+        can't be presented as a trie.
+
+        :return: None.
+        """
+        return None
+
+    # Offset of the first array in a compiled file; it follows the labels (one
+    # byte per edge) and terminal (one byte per node) arrays, aligned to a
+    # 4-byte boundary.
+    @staticmethod
+    def _first_offset(node_count, edge_count):
+        return (node_count + edge_count + 3) & ~3
+
+    # Merge the equivalent nodes of a flattened trie. Children are numbered
+    # after their parents, so walking the trie backwards reaches every node
+    # after all of its children have been assigned a state; two nodes are
+    # equivalent if they agree on whether they end a word and their edges
+    # have the same labels and lead to the same states. The states are then
+    # laid out breadth-first from the root, with the first trie node found for
+    # each state providing its edges.
+    @staticmethod
+    def _minimize(word_list):
+        labels = word_list._labels
+        first = word_list._first
+        terminal = word_list._terminal
+        node_count = len(terminal)
+        state_of = array('i', [0]) * node_count
+        representative = array('i')
+        register = {}
+        for node in range(node_count - 1, -1, -1):
+            lo = first[node]
+            hi = first[node + 1]
+            signature = (terminal[node], labels[lo:hi], tuple(state_of[lo:hi]))
+            state = register.get(signature)
+            if state is None:
+                state = register[signature] = len(representative)
+                representative.append(node)
+            state_of[node] = state
+        register = None
+
+        node_ids = array('i', [-1]) * len(representative)
+        node_ids[state_of[0]] = 0
+        order = [0]
+        edge_labels = []
+        dawg_first = array('i')
+        targets = array('i')
+        dawg_terminal = bytearray()
+        child_letters = array('i')
+        for node in order:
+            lo = first[node]
+            hi = first[node + 1]
+            dawg_first.append(len(targets))
+            dawg_terminal.append(terminal[node])
+            child_letters.append(word_list._child_letters[node])
+            edge_labels.append(labels[lo:hi])
+            for child in range(lo, hi):
+                state = state_of[child]
+                if node_ids[state] < 0:
+                    node_ids[state] = len(order)
+                    order.append(representative[state])
+                targets.append(node_ids[state])
+        dawg_first.append(len(targets))
+        return (''.join(edge_labels), dawg_first, targets, dawg_terminal,
+                child_letters)
+
+
+# Word list classes that can be chosen with BOGGLE_WORD_LIST_BACKEND.
+WORD_LIST_BACKENDS = {
+    'trie': WordList,
+    'dawg': DawgWordList,
+}
+
+
+def open_word_list(word_file, backend='trie'):
+    """
+    Load a word list from text, or from its compiled copy if one has been built
+    since the text file was last changed.
+
+    :param word_file: The path to a text word list.
+    :param backend: The name of the word list class to use, from
+    WORD_LIST_BACKENDS.
+    :return: a WordList containing the words in the file.
+    """
+    if backend not in WORD_LIST_BACKENDS:
+        raise ValueError(u"Unknown word list backend: {}".format(backend))
+    word_list_class = WORD_LIST_BACKENDS[backend]
+    compiled_file = word_list_class.compiled_path(word_file)
+    if os.path.exists(compiled_file) and (
+            os.path.getmtime(compiled_file) >= os.path.getmtime(word_file)):
+        return word_list_class.load(compiled_file)
+    return word_list_class(word_file)
+
+
+class WordListRegistry(object):
+    """
+    A set of named word lists (e.g. for different languages), each of which is
+    loaded on first use rather than when the registry is created.
+
+    At most max_loaded lists are kept in memory; when another list is needed,
+    the least recently used list is dropped. Requests already solving against
+    a dropped list keep their reference to it, and it is loaded again the next
+    time it is needed.
+
+    A list is loaded without holding the lock that guards the loaded lists, so
+    requests for lists that are already loaded aren't held up by the load.
+    Requests for the list being loaded wait for it to finish rather than
+    loading it again.
+    """
+
+    def __init__(self, word_files, max_loaded=None, backend='trie'):
+        """
+        :param word_files: A dict mapping each list's name to the path to its
+        text file (its compiled copy is used if there is one; see
+        open_word_list).
+        :param max_loaded: The number of lists to keep in memory at once, or
+        None to keep every list once loaded.
+        :param backend: The name of the word list class to load lists as, from
+        WORD_LIST_BACKENDS.
+        """
+        self.word_files = dict(word_files)
+        self.max_loaded = max_loaded
+        self.backend = backend
+        self._loaded = OrderedDict()
+        self._lock = threading.Lock()
+        # A lock for each list name, held while that list is loaded
+        self._load_locks = {}
+
+    def names(self):
+        """
+        :return: a sorted list of the names of the available word lists.
+        """
+        return sorted(self.word_files)
+
+    def loaded(self):
+        """
+        :return: a list of the names of the lists currently in memory, least
+        recently used first.
+        """
+        with self._lock:
+            return list(self._loaded)
+
+    def get(self, name):
+        """
+        Get a word list by name, loading it if it isn't already in memory.
+
+        :param name: The name of the list.
+        :return: a WordList.
+        :raises ValueError: if there is no list with the given name.
+        """
+        if name not in self.word_files:
+            raise ValueError(u"Unknown word list: {}".format(name))
+        with self._lock:
+            word_list = self._use(name)
+            if word_list is not None:
+                return word_list
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+        with load_lock:
+            # Another request may have loaded the list while this one waited
+            with self._lock:
+                word_list = self._use(name)
+            if word_list is None:
+                word_list = open_word_list(self.word_files[name], self.backend)
+                with self._lock:
+                    self._add(name, word_list)
+            return word_list
+
+    # Get a loaded list, marking it as the most recently used, or None if the
+    # list isn't loaded. Called with the lock held.
+    def _use(self, name):
+        word_list = self._loaded.pop(name, None)
+        if word_list is not None:
+            self._loaded[name] = word_list
+        return word_list
+
+    # Add a newly loaded list, dropping the least recently used lists if
+    # there are now more than max_loaded. Called with the lock held.
+    def _add(self, name, word_list):
+        self._loaded[name] = word_list
+        while self.max_loaded and len(self._loaded) > self.max_loaded:
+            self._loaded.popitem(last=False)
+
+
+def get_word_list_registry():
+    """
+    Create the registry of word lists described by the project settings:
+
+        BOGGLE_WORD_LISTS: a dict mapping list names to text files (default:
+            English only, as 'en').
+        BOGGLE_MAX_LOADED_WORD_LISTS: the number of lists each process keeps
+            in memory (default: all of them).
+        BOGGLE_WORD_LIST_BACKEND: how lists are stored; 'trie' (the default)
+            for WordList, or 'dawg' for the smaller DawgWordList.
+
+    :return: a WordListRegistry.
+    """
+    return WordListRegistry(
+        getattr(settings, 'BOGGLE_WORD_LISTS', {'en': EN_US_FILE}),
+        getattr(settings, 'BOGGLE_MAX_LOADED_WORD_LISTS', None),
+        getattr(settings, 'BOGGLE_WORD_LIST_BACKEND', 'trie')
+    )
+
 
-en_us = WordList('boggle_app/word_lists/en.txt')
+EN_US_FILE = 'boggle_app/word_lists/en.txt'